@@ -0,0 +1,48 @@
+'''Mide el arranque en frío: cuánto tarda un proceso nuevo en importar modules.sistema o en abrir el menú de main.py.
+
+Cada caso se corre varias veces en un proceso nuevo (mediana), descontando lo que tarda el intérprete solo.
+Antes se corre una vez para que Python deje compilados los .pyc (como en una instalación normal).
+Termina con error si algún caso supera su objetivo.
+
+Uso: python benchmarks/arranque.py [repeticiones]
+'''
+import sys
+import os
+import subprocess
+import time
+
+CARPETA = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# (descripción, argumentos de python, entrada, objetivo en ms por encima del intérprete solo)
+CASOS = (
+    ("import modules.sistema", ["-c", "import modules.sistema"], "", 30),
+    ("import main (no ejecuta nada)", ["-c", "import main"], "", 40),
+    ("main.py --no-seed (menú y salir)", ["main.py", "--no-seed"], "0\n", 50),
+    ("main.py (semilla, menú y salir)", ["main.py"], "0\n", 60),
+)
+
+def correr(argumentos:list[str], entrada:str, repeticiones:int):
+    '''Mediana en milisegundos de `repeticiones` procesos nuevos'''
+    entorno = dict(os.environ)
+    entorno.pop("PYTHONDONTWRITEBYTECODE", None) # que use los .pyc, como una instalación normal
+    duraciones = []
+    for _ in range(repeticiones + 1): # la primera vez compila los .pyc: no cuenta
+        inicio = time.perf_counter()
+        subprocess.run([sys.executable, *argumentos], input=entrada, cwd=CARPETA, env=entorno,
+                       stdout=subprocess.DEVNULL, check=True, text=True)
+        duraciones.append((time.perf_counter() - inicio) * 1000)
+    duraciones = sorted(duraciones[1:])
+    return duraciones[len(duraciones) // 2]
+
+if __name__ == "__main__":
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 15
+    base = correr(["-c", "pass"], "", repeticiones)
+    print(f"Intérprete solo: {base:.1f} ms\n")
+    print(f"{'caso':<34} {'total ms':>9} {'propio ms':>10} {'objetivo':>9}")
+    fallas = 0
+    for descripcion, argumentos, entrada, objetivo in CASOS:
+        total = correr(argumentos, entrada, repeticiones)
+        propio = total - base
+        cumple = propio <= objetivo
+        fallas += not cumple
+        print(f"{descripcion:<34} {total:>9.1f} {propio:>10.1f} {objetivo:>7} {'ok' if cumple else 'NO'}")
+    sys.exit(1 if fallas else 0)
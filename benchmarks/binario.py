@@ -0,0 +1,101 @@
+'''Mide la instantánea binaria (modules.binario): escribirla, y el arranque en frío de un proceso nuevo que abre
+la carpeta con AlmacenamientoBinario y busca un perro y un usuario (solo decodifica esos).
+Con --jsonl compara contra la misma carpeta con la instantánea en JSONL (AlmacenamientoDiario), que al abrir lo lee todo.
+
+Las filas se generan y escriben de a una, sin armar objetos, así se llega a varios GB sin usar esa memoria.
+
+Uso: python benchmarks/binario.py [cantidad_de_perros] [--jsonl] [--repeticiones 5]
+'''
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import argparse
+import json
+import shutil
+import subprocess
+import tempfile
+import time
+from modules.binario import AlmacenamientoBinario, escribir_binario
+from modules.diario import AlmacenamientoDiario
+
+CARPETA = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ESTADOS = ("disponible", "disponible", "disponible", "disponible", "adoptado") # según el ID (sin reservas)
+# Proceso nuevo: abre la carpeta y busca un perro y un usuario. Imprime los ms de cada paso
+ARRANQUE = '''
+import sys, time
+inicio = time.perf_counter()
+from modules.sistema import SistemaAdopcion
+from modules.{modulo} import {clase}
+sistema = SistemaAdopcion({clase}(sys.argv[1]))
+abierto = time.perf_counter()
+perro, usuario = sistema.buscar_perro(int(sys.argv[2])), sistema.buscar_usuario(sys.argv[3])
+assert perro is not None and usuario is not None
+print((abierto - inicio) * 1000, (time.perf_counter() - abierto) * 1000)
+'''
+
+def razas():
+    return ((f"Raza {i:02d}", "SMLX"[i % 4], "Amigable") for i in range(50))
+
+def usuarios(cantidad:int, perros:int):
+    '''Usuarios ordenados por DNI, con el historial de los perros que adoptaron (ver perros)'''
+    for i in range(cantidad):
+        yield (f"{i:08d}", f"Usuario {i}", f"usuario{i}@mail.com", f"Raza {i % 50:02d}" if i % 2 else "",
+               str(i % 16) if i % 3 else "", "", None, list(range(5 * i + 4, perros + 1, 5 * cantidad)))
+
+def perros(cantidad:int, usuarios:int):
+    '''Perros ordenados por ID. Uno de cada 5 está adoptado, repartidos entre los usuarios'''
+    for i in range(1, cantidad + 1):
+        estado = ESTADOS[i % len(ESTADOS)]
+        adoptante = f"{i // 5 % usuarios:08d}" if estado == "adoptado" else None
+        yield (i, f"Perro {i}", i % 16, 1 + i % 60, "MF"[i % 2], f"Raza {i % 50:02d}", i % 5 != 1, i % 20 == 0,
+               estado, adoptante)
+
+def escribir_jsonl(ruta:str, cantidad:int, usuarios_:int):
+    '''La misma instantánea en el formato de AlmacenamientoDiario'''
+    with open(ruta, "w", encoding="utf-8") as archivo:
+        for tipo, filas in (("R", razas()), ("U", usuarios(usuarios_, cantidad)), ("P", perros(cantidad, usuarios_))):
+            for fila in filas:
+                archivo.write(json.dumps([tipo, *fila], ensure_ascii=False, separators=(",", ":")) + "\n")
+
+def arrancar(clase, carpeta:str, cantidad:int, usuarios_:int, repeticiones:int):
+    '''Medianas (ms) de abrir la carpeta y de las dos búsquedas, cada vez en un proceso nuevo'''
+    entorno = dict(os.environ)
+    entorno.pop("PYTHONDONTWRITEBYTECODE", None) # que use los .pyc, como una instalación normal
+    codigo = ARRANQUE.format(modulo=clase.__module__.split(".")[-1], clase=clase.__name__)
+    tiempos = []
+    for vez in range(repeticiones + 1): # la primera vez compila los .pyc: no cuenta
+        salida = subprocess.run([sys.executable, "-c", codigo, carpeta, str(cantidad // 2 + vez), f"{usuarios_ // 2:08d}"],
+                                cwd=CARPETA, env=entorno, capture_output=True, check=True, text=True).stdout
+        tiempos.append(tuple(map(float, salida.split())))
+    tiempos = sorted(tiempos[1:])
+    return tiempos[len(tiempos) // 2]
+
+if __name__ == "__main__":
+    argumentos = argparse.ArgumentParser(description="Mide la instantánea binaria")
+    argumentos.add_argument("perros", nargs="?", type=int, default=2_000_000)
+    argumentos.add_argument("--jsonl", action="store_true", help="compara con la instantánea JSONL")
+    argumentos.add_argument("--repeticiones", type=int, default=5)
+    opciones = argumentos.parse_args()
+    cantidad, usuarios_ = opciones.perros, max(1, opciones.perros // 10)
+
+    carpeta = tempfile.mkdtemp(prefix="binario_")
+    try:
+        ruta = os.path.join(carpeta, AlmacenamientoBinario.ARCHIVO_INSTANTANEA)
+        inicio = time.perf_counter()
+        escribir_binario(ruta, razas(), usuarios(usuarios_, cantidad), perros(cantidad, usuarios_))
+        escritura = time.perf_counter() - inicio
+        tamanio = os.path.getsize(ruta)
+        print(f"Perros: {cantidad:,}, usuarios: {usuarios_:,}")
+        print(f"Instantánea binaria: {tamanio / 1e6:,.0f} MB, escrita en {escritura:.1f}s ({cantidad / escritura:,.0f} perros/s)\n")
+        casos = [("binaria (mmap)", AlmacenamientoBinario, carpeta)]
+        if opciones.jsonl:
+            otra = os.path.join(carpeta, "jsonl")
+            os.makedirs(otra)
+            escribir_jsonl(os.path.join(otra, AlmacenamientoDiario.ARCHIVO_INSTANTANEA), cantidad, usuarios_)
+            casos.append(("JSONL", AlmacenamientoDiario, otra))
+        print(f"{'instantánea':<16} {'abrir ms':>10} {'buscar ms':>10}")
+        for nombre, clase, ruta_carpeta in casos:
+            abrir, buscar = arrancar(clase, ruta_carpeta, cantidad, usuarios_, opciones.repeticiones)
+            print(f"{nombre:<16} {abrir:>10,.1f} {buscar:>10,.2f}")
+    finally:
+        shutil.rmtree(carpeta)
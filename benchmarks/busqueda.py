@@ -0,0 +1,101 @@
+'''Mide la búsqueda por nombre (autocompletar y con errores de tipeo) con muchos perros de nombres realistas.
+
+Los nombres se arman con sílabas al azar (uno o dos por perro, ej: "Toma Rulai"), así hay nombres repetidos
+y muchas palabras distintas, como en un refugio real. Los usuarios son los de benchmarks/datos.py.
+
+Uso: python benchmarks/busqueda.py [cantidad_de_perros] [--semilla N]
+'''
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import time
+import random
+import argparse
+import tracemalloc
+from modules.sistema import SistemaAdopcion
+from modules.busqueda import palabras
+from datos import generar_razas, generar_usuarios, generar_perros, USUARIOS_POR_PERRO
+
+SILABAS = ("ma", "to", "ru", "lai", "fi", "ne", "gro", "la", "bo", "chi", "pi", "co", "ta", "mi", "lu", "na",
+           "ro", "ca", "te", "so", "bel", "ki", "ra", "do", "ña", "pe", "li", "mon", "cho", "ti")
+
+def nombre_al_azar(azar:random.Random):
+    return " ".join("".join(azar.choice(SILABAS) for _ in range(azar.randint(2, 3))).title()
+                    for _ in range(azar.choice((1, 1, 2))))
+
+def con_errores(palabra:str, errores:int, azar:random.Random):
+    '''La palabra con `errores` letras cambiadas, borradas o agregadas'''
+    letras = list(palabra)
+    for _ in range(errores):
+        posicion = azar.randrange(len(letras))
+        cambio = azar.random()
+        if cambio < 0.4:
+            letras[posicion] = azar.choice("abcdefghijklmnopqrstuvwxyz")
+        elif cambio < 0.7 and len(letras) > 3:
+            del letras[posicion]
+        else:
+            letras.insert(posicion, azar.choice("aeiou"))
+    return "".join(letras)
+
+def medir(nombre:str, consulta, argumentos:list):
+    duraciones, encontrados = [], 0
+    for argumento in argumentos:
+        inicio = time.perf_counter()
+        encontrados += len(consulta(argumento))
+        duraciones.append(time.perf_counter() - inicio)
+    duraciones.sort()
+    media = sum(duraciones) / len(duraciones) * 1e6
+    p50 = duraciones[len(duraciones) // 2] * 1e6
+    p99 = duraciones[min(len(duraciones) - 1, int(len(duraciones) * 0.99))] * 1e6
+    print(f"{nombre:<40} {len(argumentos):>7,} {media:>10,.1f} {p50:>10,.1f} {p99:>10,.1f} {encontrados / len(argumentos):>10.1f}")
+
+if __name__ == "__main__":
+    argumentos = argparse.ArgumentParser(description="Mide la búsqueda por nombre")
+    argumentos.add_argument("perros", nargs="?", type=int, default=1_000_000)
+    argumentos.add_argument("--semilla", type=int, default=0)
+    opciones = argumentos.parse_args()
+    azar = random.Random(opciones.semilla)
+
+    razas = generar_razas(semilla=opciones.semilla)
+    usuarios = generar_usuarios(max(1, int(opciones.perros * USUARIOS_POR_PERRO)), razas, opciones.semilla)
+    perros = generar_perros(opciones.perros, razas, usuarios, opciones.semilla)
+    for perro in perros:
+        perro.nombre = nombre_al_azar(azar)
+    sistema = SistemaAdopcion()
+    sistema.registrar_razas(razas)
+    sistema.registrar_usuarios(usuarios)
+    sistema.registrar_perros(perros)
+
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    sistema.activar_busqueda()
+    armado = time.perf_counter() - inicio
+    memoria = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"Índices armados en {armado:.2f} s (midiendo la memoria, que lo hace más lento), {memoria / 2**20:,.0f} MiB "
+          f"({len(sistema._busqueda['perros']):,} palabras de perros, {len(sistema._busqueda['usuarios']):,} de usuarios)\n")
+
+    muestra = [palabras(azar.choice(perros).nombre) for _ in range(2_000)]
+    print(f"{'consulta (perros)':<40} {'llamadas':>7} {'media µs':>10} {'p50 µs':>10} {'p99 µs':>10} {'encontr.':>10}")
+    for largo in (1, 2, 3, 5):
+        medir(f"completar_nombres, prefijo de {largo}", lambda prefijo: sistema.completar_nombres("perros", prefijo),
+              [nombre[0][:largo] for nombre in muestra])
+    medir("completar_nombres, dos palabras", lambda prefijo: sistema.completar_nombres("perros", prefijo),
+          [f"{nombre[0]} {nombre[1][:2]}" for nombre in muestra if len(nombre) > 1])
+    medir("buscar_nombres, palabra exacta", lambda texto: sistema.buscar_nombres("perros", texto),
+          [nombre[0] for nombre in muestra])
+    medir("buscar_nombres, un error", lambda texto: sistema.buscar_nombres("perros", texto),
+          [con_errores(nombre[0], 1, azar) for nombre in muestra])
+    medir("buscar_nombres, dos errores", lambda texto: sistema.buscar_nombres("perros", texto),
+          [con_errores(nombre[0], 2, azar) for nombre in muestra if len(nombre[0]) >= 6])
+    medir("buscar_nombres, dos palabras con error", lambda texto: sistema.buscar_nombres("perros", texto),
+          [f"{con_errores(nombre[0], 1, azar)} {nombre[1]}" for nombre in muestra if len(nombre) > 1])
+    medir("completar_nombres (usuarios, email)", lambda prefijo: sistema.completar_nombres("usuarios", prefijo),
+          [f"usuario{azar.randrange(len(usuarios))}"[:9] for _ in range(2_000)])
+
+    # Mantener los índices al día: costo de cambiar_nombre con y sin búsqueda activa
+    elegidos = azar.sample(perros, 10_000)
+    inicio = time.perf_counter()
+    for perro in elegidos:
+        perro.cambiar_nombre(nombre_al_azar(azar))
+    print(f"\ncambiar_nombre con búsqueda activa: {(time.perf_counter() - inicio) / len(elegidos) * 1e6:.1f} µs")
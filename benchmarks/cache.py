@@ -0,0 +1,74 @@
+'''Mide el cache de resultados (SistemaAdopcion.activar_cache) con consultas repetidas, como un cliente que consulta
+cada tanto las mismas pantallas: sugerencias de usuarios al azar (todas y la primera página) y los perros de cada estado
+(primera página). Cada tanto se intercala un cambio (reservar y devolver un perro disponible), que invalida solo lo
+que depende de él. Verifica que con cache los resultados sean los mismos.
+
+Uso: python benchmarks/cache.py [cantidad_de_perros] [--consultas 20000] [--cambios 0.01] [--usuarios 200]
+'''
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import time
+import random
+import argparse
+from modules.sistema import SistemaAdopcion
+from datos import poblar
+
+def consultas(sistema:SistemaAdopcion, cantidad:int, cambios:float, usuarios:int, semilla:int=0):
+    '''Generador de consultas (funciones sin argumentos) y cambios intercalados, siempre los mismos para la semilla'''
+    azar = random.Random(semilla)
+    dnis = sorted(usuario.dni for usuario in sistema.usuarios if not usuario.reserva)[:usuarios]
+    for _ in range(cantidad):
+        if azar.random() < cambios:
+            yield "cambio", lambda dni=azar.choice(dnis), numero=azar.randrange(50): cambiar(sistema, dni, numero)
+            continue
+        dni, tipo = azar.choice(dnis), azar.random()
+        if tipo < 0.4:
+            yield "consulta", lambda: sistema.obtener_sugerencias_perros(dni)
+        elif tipo < 0.8:
+            yield "consulta", lambda: sistema.obtener_sugerencias_perros(dni, None, 20)
+        else:
+            yield "consulta", lambda estado=azar.choice(("disponible", "reservado", "adoptado")): sistema.obtener_estado_perros(estado, None, 20)
+
+def cambiar(sistema:SistemaAdopcion, dni:str, numero:int):
+    '''Reserva y devuelve uno de los primeros perros disponibles (sale y vuelve a entrar a las sugerencias)'''
+    perro = sistema.obtener_estado_perros("disponible", None, numero + 1)[-1]
+    sistema.reservar(perro, dni)
+    sistema.devolver(perro, dni)
+
+def medir(sistema:SistemaAdopcion, opciones):
+    '''Segundos de las consultas y los cambios, y resumen (un hash de los IDs de cada resultado, para comparar)'''
+    resumen = []
+    segundos = 0.0
+    for tipo, consulta in consultas(sistema, opciones.consultas, opciones.cambios, opciones.usuarios):
+        inicio = time.perf_counter()
+        resultado = consulta()
+        segundos += time.perf_counter() - inicio
+        if tipo == "consulta":
+            resumen.append(hash(tuple(perro.id for perro in resultado)))
+    return segundos, resumen
+
+if __name__ == "__main__":
+    argumentos = argparse.ArgumentParser(description="Mide el cache de resultados")
+    argumentos.add_argument("perros", nargs="?", type=int, default=100_000)
+    argumentos.add_argument("--consultas", type=int, default=20_000)
+    argumentos.add_argument("--cambios", type=float, default=0.01, help="proporción de cambios entre las consultas")
+    argumentos.add_argument("--usuarios", type=int, default=200, help="usuarios distintos que consultan")
+    argumentos.add_argument("--capacidad", type=int, default=1024)
+    opciones = argumentos.parse_args()
+
+    sin_cache = poblar(SistemaAdopcion(), opciones.perros)
+    con_cache = poblar(SistemaAdopcion(), opciones.perros)
+    cache = con_cache.activar_cache(opciones.capacidad)
+    segundos_sin, esperado = medir(sin_cache, opciones)
+    segundos_con, resumen = medir(con_cache, opciones)
+    assert resumen == esperado, "los resultados con cache no coinciden"
+    estadisticas = cache.estadisticas()
+    print(f"Perros: {opciones.perros:,}, consultas: {opciones.consultas:,} de {opciones.usuarios} usuarios, "
+          f"cambios: {opciones.cambios:.1%} (resultados verificados)\n")
+    print(f"{'':>10} {'segundos':>9} {'consultas/s':>12}")
+    for nombre, segundos in (("sin cache", segundos_sin), ("con cache", segundos_con)):
+        print(f"{nombre:>10} {segundos:>9.2f} {opciones.consultas / segundos:>12,.0f}")
+    print(f"\nAceleración: {segundos_sin / segundos_con:.1f}x")
+    print(", ".join(f"{clave}: {valor:.1%}" if clave == "tasa_aciertos" else f"{clave}: {valor}"
+                    for clave, valor in estadisticas.items()))
@@ -0,0 +1,106 @@
+'''Prueba de carga de reservas concurrentes (candados por perro y por usuario).
+
+1. Carrera: todos los hilos intentan reservar los mismos perros a la vez. Verifica que cada perro
+   quede reservado una sola vez y que perro y usuario queden de acuerdo.
+2. Rendimiento: reservas y devoluciones al azar con 1, 2, 4, ... hilos, con candados por perro/usuario
+   y con un único candado global (para comparar). El almacenamiento simula una demora de E/S por escritura.
+
+Uso: python benchmarks/concurrencia.py [max_hilos] [segundos_por_medicion] [demora_ms]
+'''
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import random
+import threading
+import time
+from modules.perro import Perro, Raza
+from modules.usuario import UsuarioAdoptante
+from modules.sistema import SistemaAdopcion
+from modules.almacenamiento import Almacenamiento
+
+class AlmacenamientoLento(Almacenamiento):
+    '''No guarda nada, pero cada escritura demora (como una base remota). time.sleep suelta el GIL'''
+    def __init__(self, demora:float):
+        self.demora = demora
+
+    def guardar_perro(self, perro):
+        time.sleep(self.demora)
+
+    def guardar_usuario(self, usuario, historial=True):
+        time.sleep(self.demora)
+
+def crear_sistema(perros:int, usuarios:int, demora:float):
+    sistema = SistemaAdopcion(AlmacenamientoLento(demora))
+    raza = sistema.registrar_raza(Raza("Mestizo", "M"))
+    sistema.registrar_perros([Perro(f"Perro {i}", i % 15, 10, "MF"[i % 2], raza, True, False) for i in range(perros)])
+    sistema.registrar_usuarios([UsuarioAdoptante(f"Usuario {i}", f"{i:08d}", "u@mail.com") for i in range(usuarios)])
+    return sistema
+
+def carrera(hilos:int, perros:int=200):
+    '''Todos los hilos intentan reservar los mismos perros al mismo tiempo, cada intento con un usuario distinto'''
+    sistema = crear_sistema(perros, hilos * perros, 0)
+    ganadores:dict[int, list[str]] = {id_perro: [] for id_perro in range(1, perros + 1)}
+    largada = threading.Barrier(hilos)
+    def trabajar(hilo:int):
+        largada.wait()
+        for id_perro in range(1, perros + 1):
+            dni = f"{hilo * perros + id_perro - 1:08d}"
+            try:
+                sistema.reservar(id_perro, dni)
+                ganadores[id_perro].append(dni) # list.append es atómico
+            except ValueError:
+                pass
+    lanzar(hilos, trabajar)
+    for id_perro, dnis in ganadores.items():
+        perro = sistema.buscar_perro(id_perro)
+        assert len(dnis) == 1, f"Perro {id_perro} reservado {len(dnis)} veces: {dnis}"
+        assert perro.estado == "reservado" and perro.adoptante == dnis[0], f"Perro {id_perro} inconsistente"
+        assert sistema.buscar_usuario(dnis[0]).reserva == id_perro, f"Usuario {dnis[0]} inconsistente"
+    print(f"Carrera: {hilos} hilos x {perros} perros -> cada perro reservado exactamente una vez")
+
+def rendimiento(hilos:int, segundos:float, demora:float, candado_global:bool):
+    '''Reservas y devoluciones al azar durante `segundos`. Retorna reservas por segundo'''
+    sistema = crear_sistema(10_000, hilos * 10, demora)
+    global_ = threading.Lock()
+    reservas = [0] * hilos
+    fin = time.perf_counter() + segundos
+    def trabajar(hilo:int):
+        azar = random.Random(hilo)
+        dnis = [f"{hilo * 10 + i:08d}" for i in range(10)] # usuarios propios: la competencia es por los perros
+        while time.perf_counter() < fin:
+            id_perro, dni = azar.randint(1, 10_000), azar.choice(dnis)
+            try:
+                if candado_global:
+                    with global_:
+                        sistema.reservar(id_perro, dni)
+                        sistema.devolver(id_perro, dni)
+                else:
+                    sistema.reservar(id_perro, dni)
+                    sistema.devolver(id_perro, dni)
+                reservas[hilo] += 1
+            except ValueError:
+                pass
+    lanzar(hilos, trabajar)
+    assert sistema.contar_estado_perros("disponible") == 10_000
+    return sum(reservas) / segundos
+
+def lanzar(hilos:int, trabajar):
+    trabajadores = [threading.Thread(target=trabajar, args=(hilo,)) for hilo in range(hilos)]
+    for trabajador in trabajadores:
+        trabajador.start()
+    for trabajador in trabajadores:
+        trabajador.join()
+
+if __name__ == "__main__":
+    max_hilos = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    segundos = float(sys.argv[2]) if len(sys.argv) > 2 else 2
+    demora = (float(sys.argv[3]) if len(sys.argv) > 3 else 1) / 1000
+    carrera(max_hilos)
+    print(f"Rendimiento (reservas+devoluciones/s, demora por escritura {demora * 1000:g} ms):")
+    print(f"{'hilos':>6} {'por perro/usuario':>18} {'candado global':>15}")
+    hilos = 1
+    while hilos <= max_hilos:
+        finos = rendimiento(hilos, segundos, demora, False)
+        gruesos = rendimiento(hilos, segundos, demora, True)
+        print(f"{hilos:>6} {finos:>18,.0f} {gruesos:>15,.0f}")
+        hilos *= 2
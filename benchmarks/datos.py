@@ -0,0 +1,70 @@
+'''Datos sintéticos reproducibles para las mediciones: razas, usuarios con preferencias variadas
+y perros con una mezcla realista de estados (disponibles, reservados y adoptados).
+
+Uso: python benchmarks/datos.py [cantidad_de_perros]  (muestra un resumen de lo generado)
+'''
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import random
+from modules.perro import Perro, Raza
+from modules.usuario import UsuarioAdoptante
+
+TEMPERAMENTOS = ("Amigable", "Tranquilo", "Enérgico", "Nervioso", "Gentil", "Juguetón")
+# Proporción de perros en cada estado (el resto, disponibles)
+RESERVADOS = 0.05
+ADOPTADOS = 0.25
+USUARIOS_POR_PERRO = 0.1
+
+def generar_razas(cantidad:int=50, semilla:int=0):
+    '''Razas "Raza 0", "Raza 1", ... con tamaño y temperamento al azar'''
+    azar = random.Random(semilla)
+    return [Raza(f"Raza {i}", azar.choice("SMLX"), azar.choice(TEMPERAMENTOS)) for i in range(cantidad)]
+
+def generar_usuarios(cantidad:int, razas:list[Raza], semilla:int=0):
+    '''Usuarios con DNI 00000000, 00000001, ... Cada preferencia (raza, edad, tamaño) está vacía
+    en la mitad de los casos, así hay usuarios exigentes y otros que aceptan cualquier perro'''
+    azar = random.Random(semilla)
+    usuarios = []
+    for i in range(cantidad):
+        usuarios.append(UsuarioAdoptante(
+            f"Usuario {i}", f"{i:08d}", f"usuario{i}@mail.com",
+            pref_raza=azar.choice(razas).nombre if azar.random() < 0.5 else "",
+            pref_edad=azar.randint(0, 15) if azar.random() < 0.5 else "",
+            pref_tamanio=azar.choice("SMLX") if azar.random() < 0.5 else ""))
+    return usuarios
+
+def generar_perros(cantidad:int, razas:list[Raza], usuarios:list[UsuarioAdoptante], semilla:int=0):
+    '''Perros con ID 1..cantidad. Una parte queda reservada (un perro por usuario, como mucho) y otra adoptada
+    (varios por usuario). Perros y usuarios quedan de acuerdo entre sí, listos para registrar'''
+    azar = random.Random(semilla)
+    perros = [Perro(f"Perro {i}", azar.randint(0, 15), round(azar.uniform(1, 60), 1), azar.choice("MF"),
+                    azar.choice(razas), azar.random() < 0.8, azar.random() < 0.05, id=i)
+              for i in range(1, cantidad + 1)]
+    if usuarios:
+        elegidos = azar.sample(range(cantidad), int(cantidad * (RESERVADOS + ADOPTADOS)))
+        reservados = elegidos[:min(int(cantidad * RESERVADOS), len(usuarios))]
+        for perro, usuario in zip((perros[i] for i in reservados), azar.sample(usuarios, len(reservados))):
+            perro.estado, perro.adoptante = "reservado", usuario.dni
+            usuario.reserva = perro.id
+        for i in elegidos[len(reservados):]:
+            usuario = azar.choice(usuarios)
+            perros[i].estado, perros[i].adoptante = "adoptado", usuario.dni
+            usuario.historial_adopciones.append(perros[i].id)
+    return perros
+
+def poblar(sistema, perros:int, semilla:int=0):
+    '''Registra en el sistema razas, usuarios (uno cada 10 perros) y perros generados. Retorna el sistema'''
+    razas = generar_razas(semilla=semilla)
+    usuarios = generar_usuarios(max(1, int(perros * USUARIOS_POR_PERRO)), razas, semilla)
+    sistema.registrar_razas(razas)
+    sistema.registrar_usuarios(usuarios)
+    sistema.registrar_perros(generar_perros(perros, razas, usuarios, semilla))
+    return sistema
+
+if __name__ == "__main__":
+    from modules.sistema import SistemaAdopcion
+    sistema = poblar(SistemaAdopcion(), int(sys.argv[1]) if len(sys.argv) > 1 else 10_000)
+    print(f"Razas: {len(sistema.razas)}, usuarios: {len(sistema.usuarios)}, perros: {len(sistema.perros)}")
+    for estado in ("disponible", "reservado", "adoptado"):
+        print(f" - {estado}: {sistema.contar_estado_perros(estado)}")
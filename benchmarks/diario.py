@@ -0,0 +1,69 @@
+'''Mide escritura y reproducción del diario (AlmacenamientoDiario) con millones de registros.
+
+Uso: python benchmarks/diario.py [cantidad_de_registros]
+'''
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import random
+import shutil
+import tempfile
+import time
+from modules.perro import Perro, Raza
+from modules.usuario import UsuarioAdoptante
+from modules.diario import AlmacenamientoDiario
+
+def generar_registros(almacenamiento:AlmacenamientoDiario, cantidad:int):
+    '''Escribe registros parecidos a los reales: cambios de perros, de usuarios y algunas bajas'''
+    razas = [Raza(f"Raza {i}", random.choice("SMLX")) for i in range(50)]
+    perros = [Perro(f"Perro {i}", random.randint(0, 15), random.uniform(1, 60), random.choice("MF"),
+                    random.choice(razas), True, False, id=i) for i in range(1, 10_001)]
+    usuarios = [UsuarioAdoptante(f"Usuario {i}", f"{i:08d}", f"u{i}@mail.com") for i in range(1_000)]
+    for raza in razas:
+        almacenamiento.guardar_raza(raza)
+    for i in range(cantidad):
+        eleccion = i % 10
+        if eleccion < 7:
+            perro = perros[i % len(perros)]
+            perro.edad = (perro.edad + 1) % 16
+            almacenamiento.guardar_perro(perro)
+        elif eleccion < 9:
+            almacenamiento.guardar_usuario(usuarios[i % len(usuarios)], historial=False)
+        else:
+            almacenamiento.eliminar_perro(perros[i % len(perros)].id)
+
+def medir(cantidad:int):
+    carpeta = tempfile.mkdtemp(prefix="diario_")
+    try:
+        # cada muy grande: que no escriba instantáneas, así se reproduce todo el diario
+        almacenamiento = AlmacenamientoDiario(carpeta, cada=2 * cantidad)
+        inicio = time.perf_counter()
+        generar_registros(almacenamiento, cantidad)
+        escritura = time.perf_counter() - inicio
+        almacenamiento.cerrar(instantanea=False)
+        tamanio = os.path.getsize(almacenamiento.ruta_diario)
+
+        inicio = time.perf_counter()
+        recuperado = AlmacenamientoDiario(carpeta, cada=2 * cantidad)
+        reproduccion = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        recuperado.escribir_instantanea()
+        instantanea = time.perf_counter() - inicio
+        recuperado.cerrar()
+
+        inicio = time.perf_counter()
+        AlmacenamientoDiario(carpeta).cerrar()
+        arranque = time.perf_counter() - inicio
+    finally:
+        shutil.rmtree(carpeta)
+    print(f"Registros:                {cantidad:,}")
+    print(f"Tamaño del diario:        {tamanio / 1e6:.1f} MB ({tamanio / cantidad:.0f} bytes/registro)")
+    print(f"Escritura:                {escritura:.2f}s ({cantidad / escritura:,.0f} registros/s)")
+    print(f"Reproducción del diario:  {reproduccion:.2f}s ({cantidad / reproduccion:,.0f} registros/s)")
+    print(f"Escribir instantánea:     {instantanea:.2f}s")
+    print(f"Arranque con instantánea: {arranque:.2f}s")
+
+if __name__ == "__main__":
+    random.seed(0)
+    medir(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,56 @@
+'''Mide la importación masiva de perros desde CSV y JSONL (Importador).
+
+Uso: python benchmarks/importacion.py [cantidad_de_perros] [lote]
+'''
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import json
+import random
+import shutil
+import tempfile
+import time
+from modules.sistema import SistemaAdopcion
+from modules.importacion import Importador
+
+def escribir_archivos(carpeta:str, cantidad:int):
+    '''Escribe razas.csv, perros.csv y perros.jsonl con datos al azar (un 0,1% de filas inválidas)'''
+    razas = [f"Raza {i}" for i in range(50)]
+    with open(os.path.join(carpeta, "razas.csv"), "w", encoding="utf-8") as archivo:
+        archivo.write("nombre,tamanio,temperamento\n")
+        for raza in razas:
+            archivo.write(f"{raza},{random.choice('SMLX')},Amigable\n")
+    perros = []
+    for i in range(cantidad):
+        edad = random.randint(0, 15) if i % 1000 else -1 # fila inválida
+        perros.append(("", f"Perro {i}", edad, round(random.uniform(1, 60), 1), random.choice("MF"),
+                       random.choice(razas), random.choice(("si", "no")), "no"))
+    columnas = ("id", "nombre", "edad", "peso", "sexo", "raza", "vacunado", "discapacitado")
+    with open(os.path.join(carpeta, "perros.csv"), "w", encoding="utf-8") as archivo:
+        archivo.write(",".join(columnas) + "\n")
+        for perro in perros:
+            archivo.write(",".join(map(str, perro)) + "\n")
+    with open(os.path.join(carpeta, "perros.jsonl"), "w", encoding="utf-8") as archivo:
+        for perro in perros:
+            archivo.write(json.dumps(dict(zip(columnas, perro))) + "\n")
+
+def medir(cantidad:int, lote:int):
+    carpeta = tempfile.mkdtemp(prefix="importacion_")
+    try:
+        escribir_archivos(carpeta, cantidad)
+        for nombre in ("perros.csv", "perros.jsonl"):
+            sistema = SistemaAdopcion()
+            importador = Importador(sistema, lote=lote)
+            importador.importar_razas(os.path.join(carpeta, "razas.csv"))
+            inicio = time.perf_counter()
+            resultado = importador.importar_perros(os.path.join(carpeta, nombre))
+            duracion = time.perf_counter() - inicio
+            print(f"{nombre:<13} {resultado.importados:,} importados, {len(resultado.rechazados):,} rechazados "
+                  f"en {duracion:.2f}s ({cantidad / duracion:,.0f} filas/s)")
+    finally:
+        shutil.rmtree(carpeta)
+
+if __name__ == "__main__":
+    random.seed(0)
+    medir(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000,
+          int(sys.argv[2]) if len(sys.argv) > 2 else 10_000)
@@ -0,0 +1,39 @@
+'''Mide la memoria por registro de Perro y UsuarioAdoptante (bytes/registro).
+
+Uso: python benchmarks/memoria.py [cantidad_de_perros]
+'''
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import gc
+import random
+import tracemalloc
+from modules.perro import Perro, Raza
+from modules.usuario import UsuarioAdoptante
+
+def medir(crear, cantidad:int):
+    '''Retorna los bytes por objeto que ocupan `cantidad` objetos creados con crear(i)'''
+    gc.collect()
+    tracemalloc.start()
+    objetos = [crear(i) for i in range(cantidad)]
+    usado, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    usado -= sys.getsizeof(objetos) # la lista no cuenta
+    del objetos
+    return usado / cantidad
+
+def main(cantidad:int):
+    random.seed(0)
+    razas = [Raza(f"Raza {i}", random.choice("SMLX")) for i in range(50)]
+    estados = ("disponible", "reservado", "adoptado")
+    def crear_perro(i):
+        perro = Perro(f"Perro {i}", i % 16, 1.5 + i % 60, "MF"[i % 2], razas[i % 50], True, False, id=i + 1)
+        perro.estado = estados[i % 3]
+        return perro
+    def crear_usuario(i):
+        return UsuarioAdoptante(f"Usuario {i}", f"{i:08d}", f"u{i}@mail.com", "Raza 1", str(i % 10), "SMLX"[i % 4])
+    print(f"Perro:            {medir(crear_perro, cantidad):.0f} bytes/registro ({cantidad:,} perros)")
+    print(f"UsuarioAdoptante: {medir(crear_usuario, cantidad // 10):.0f} bytes/registro ({cantidad // 10:,} usuarios, con Preferencias)")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
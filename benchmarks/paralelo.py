@@ -0,0 +1,70 @@
+'''Mide el reporte de todos los usuarios (sugerencias e historial de cada uno) calculado en serie y en varios procesos
+(SistemaAdopcion.obtener_reporte_usuarios, ver modules.paralelo), con 1, 2, 4, ... procesos.
+
+- serie: obtener_sugerencias_perros y obtener_historial_perros para cada usuario, uno por uno
+- agrupado: obtener_sugerencias_todos (calcula los candidatos una vez por preferencia), solo sin --cantidad
+- N procesos: obtener_reporte_usuarios(cantidad, N). Verifica que los resultados sean iguales a los de la serie
+
+El tiempo de los procesos incluye armar la instantánea e iniciarlos. Con menos núcleos que procesos no escala.
+
+Uso: python benchmarks/paralelo.py [cantidad_de_perros] [--cantidad 20] [--procesos 1,2,4]
+'''
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import time
+import argparse
+from modules.sistema import SistemaAdopcion
+from datos import poblar
+
+def serie(sistema:SistemaAdopcion, cantidad:int|None):
+    for usuario in sorted(sistema.usuarios, key=lambda usuario: usuario.dni):
+        yield usuario, sistema.obtener_sugerencias_perros(usuario, None, cantidad), sistema.obtener_historial_perros(usuario)
+
+def agrupado(sistema:SistemaAdopcion):
+    for usuario, sugerencias in sistema.obtener_sugerencias_todos():
+        yield usuario, sugerencias, sistema.obtener_historial_perros(usuario)
+
+def medir(reporte):
+    '''Segundos para recorrer todo el reporte y cantidad de perros sugeridos en total'''
+    inicio = time.perf_counter()
+    sugeridos = sum(len(sugerencias) for _, sugerencias, _ in reporte)
+    return time.perf_counter() - inicio, sugeridos
+
+def resumen(reporte):
+    '''IDs de cada resultado, para comparar dos reportes'''
+    return {usuario.dni: ([perro.id for perro in sugerencias], getattr(sugerencias, "siguiente", None),
+                          [perro.id for perro in historial]) for usuario, sugerencias, historial in reporte}
+
+if __name__ == "__main__":
+    argumentos = argparse.ArgumentParser(description="Mide el reporte de sugerencias en varios procesos")
+    argumentos.add_argument("perros", nargs="?", type=int, default=50_000)
+    argumentos.add_argument("--cantidad", type=int, default=None, help="sugerencias por usuario (por defecto, todas)")
+    argumentos.add_argument("--procesos", default=None, help="ej: 1,2,4 (por defecto, potencias de 2 hasta los núcleos)")
+    opciones = argumentos.parse_args()
+    nucleos = os.cpu_count() or 1
+    if opciones.procesos:
+        cantidades = [int(cantidad) for cantidad in opciones.procesos.split(",")]
+    else:
+        cantidades = [1]
+        while cantidades[-1] * 2 <= max(nucleos, 2):
+            cantidades.append(cantidades[-1] * 2)
+
+    sistema = poblar(SistemaAdopcion(), opciones.perros)
+    usuarios = len(sistema.usuarios)
+    esperado = resumen(serie(sistema, opciones.cantidad))
+    for procesos in cantidades:
+        assert resumen(sistema.obtener_reporte_usuarios(opciones.cantidad, procesos)) == esperado, f"{procesos} procesos"
+    print(f"Núcleos: {nucleos}, perros: {opciones.perros:,}, usuarios: {usuarios:,}, "
+          f"sugerencias por usuario: {opciones.cantidad or 'todas'} (resultados verificados)\n")
+    print(f"{'forma':>12} {'segundos':>9} {'usuarios/s':>11} {'sugeridos':>12} {'aceleración':>12}")
+    casos = [("serie", lambda: serie(sistema, opciones.cantidad))]
+    if opciones.cantidad is None:
+        casos.append(("agrupado", lambda: agrupado(sistema)))
+    casos += [(f"{procesos} procesos", lambda procesos=procesos: sistema.obtener_reporte_usuarios(opciones.cantidad, procesos))
+              for procesos in cantidades]
+    base = None
+    for nombre, reporte in casos:
+        segundos, sugeridos = medir(reporte())
+        base = base or segundos
+        print(f"{nombre:>12} {segundos:>9.2f} {usuarios / segundos:>11,.0f} {sugeridos:>12,} {base / segundos:>11.2f}x")
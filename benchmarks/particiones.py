@@ -0,0 +1,120 @@
+'''Mide el despliegue en varios procesos (modules.particiones) con 1, 2, 4, ... particiones.
+
+1. Carrera: varios hilos reservan los mismos perros a la vez con usuarios de distintas particiones
+   (los perros se mudan). Verifica que cada perro quede reservado una sola vez, de acuerdo con su usuario
+   y en la partición de su adoptante.
+2. Escalado: carga masiva, sugerencias de todos los refugios (consulta global) y búsquedas por ID desde
+   varios hilos. Cada partición usa su propio núcleo: con menos núcleos que particiones no escala.
+
+Uso: python benchmarks/particiones.py [cantidad_de_perros] [--particiones 1,2,4] [--segundos 3]
+'''
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import time
+import random
+import argparse
+import threading
+from modules.perro import Perro, Raza
+from modules.usuario import UsuarioAdoptante
+from modules.particiones import SistemaParticionado
+from datos import generar_razas, generar_usuarios, generar_perros, USUARIOS_POR_PERRO
+
+REFUGIOS = [f"Refugio {i}" for i in range(64)]
+LOTE = 20_000
+
+def lanzar(hilos:int, trabajar):
+    hilos = [threading.Thread(target=trabajar, args=(hilo,)) for hilo in range(hilos)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+def carrera(particiones:int, hilos:int=8, perros:int=100):
+    '''Todos los hilos intentan reservar los mismos perros al mismo tiempo, cada intento con un usuario distinto'''
+    sistema = SistemaParticionado(particiones)
+    raza = Raza("Mestizo", "M")
+    sistema.registrar_perros([Perro(f"Perro {i}", 3, 10, "M", raza, True, False) for i in range(perros)], REFUGIOS[0])
+    sistema.registrar_usuarios([UsuarioAdoptante(f"Usuario {i}", f"{i:08d}", "u@mail.com") for i in range(hilos * perros)],
+                               [REFUGIOS[i % len(REFUGIOS)] for i in range(hilos * perros)])
+    ganadores:dict[int, list[str]] = {id_perro: [] for id_perro in range(1, perros + 1)}
+    largada = threading.Barrier(hilos)
+    def trabajar(hilo:int):
+        largada.wait()
+        for id_perro in range(1, perros + 1):
+            dni = f"{hilo * perros + id_perro - 1:08d}"
+            try:
+                sistema.reservar(id_perro, dni)
+                ganadores[id_perro].append(dni)
+            except ValueError:
+                pass
+    lanzar(hilos, trabajar)
+    mudados = 0
+    for id_perro, dnis in ganadores.items():
+        perro = sistema.buscar_perro(id_perro)
+        assert len(dnis) == 1, f"Perro {id_perro} reservado {len(dnis)} veces: {dnis}"
+        assert perro["estado"] == "reservado" and perro["adoptante"] == dnis[0], f"Perro {id_perro} inconsistente"
+        assert sistema.buscar_usuario(dnis[0])["reserva"] == id_perro, f"Usuario {dnis[0]} inconsistente"
+        assert sistema.particion_perro(id_perro) == sistema.particion_usuario(dnis[0]), f"Perro {id_perro} fuera de lugar"
+        mudados += sistema.particion_perro(id_perro) != sistema.particion(REFUGIOS[0])
+    assert sistema.contar_estado_perros("reservado") == perros
+    sistema.cerrar()
+    print(f"Carrera: {particiones} particiones, {hilos} hilos x {perros} perros -> cada perro reservado exactamente "
+          f"una vez ({mudados} mudados de partición)")
+
+def por_segundo(segundos:float, hilos:int, operacion):
+    '''Operaciones por segundo de `hilos` hilos que repiten operacion(azar) durante `segundos`'''
+    cuentas = [0] * hilos
+    fin = time.perf_counter() + segundos
+    def trabajar(hilo:int):
+        azar = random.Random(hilo)
+        while time.perf_counter() < fin:
+            operacion(azar)
+            cuentas[hilo] += 1
+    lanzar(hilos, trabajar)
+    return sum(cuentas) / segundos
+
+def escalado(particiones:int, perros:int, segundos:float):
+    razas = generar_razas()
+    usuarios = generar_usuarios(max(1, int(perros * USUARIOS_POR_PERRO)), razas)
+    lista = generar_perros(perros, razas, usuarios)
+    azar = random.Random(0)
+    sistema = SistemaParticionado(particiones)
+    inicio = time.perf_counter()
+    sistema.registrar_razas(razas)
+    sistema.registrar_usuarios(usuarios, [azar.choice(REFUGIOS) for _ in usuarios])
+    for desde in range(0, len(lista), LOTE):
+        lote = lista[desde:desde + LOTE]
+        sistema.registrar_perros(lote, [azar.choice(REFUGIOS) for _ in lote])
+    carga = perros / (time.perf_counter() - inicio)
+    hilos = 2 * particiones # que haya trabajo para todas las particiones a la vez
+    dnis = [usuario.dni for usuario in usuarios]
+    sugerencias = por_segundo(segundos, hilos, lambda azar: sistema.obtener_sugerencias_perros(
+        azar.choice(dnis), cantidad=50, todos_los_refugios=True))
+    busquedas = por_segundo(segundos, hilos, lambda azar: sistema.buscar_perro(azar.randint(1, perros)))
+    sistema.cerrar()
+    return carga, sugerencias, busquedas
+
+if __name__ == "__main__":
+    argumentos = argparse.ArgumentParser(description="Mide el despliegue en varias particiones")
+    argumentos.add_argument("perros", nargs="?", type=int, default=200_000)
+    argumentos.add_argument("--particiones", default=None, help="ej: 1,2,4 (por defecto, potencias de 2 hasta los núcleos)")
+    argumentos.add_argument("--segundos", type=float, default=3)
+    opciones = argumentos.parse_args()
+    nucleos = os.cpu_count() or 1
+    if opciones.particiones:
+        cantidades = [int(cantidad) for cantidad in opciones.particiones.split(",")]
+    else:
+        cantidades = [1]
+        while cantidades[-1] * 2 <= max(nucleos, 2):
+            cantidades.append(cantidades[-1] * 2)
+
+    carrera(max(cantidades))
+    print(f"\nNúcleos: {nucleos}, perros: {opciones.perros:,}")
+    print(f"{'particiones':>11} {'carga perros/s':>15} {'sugerencias/s':>14} {'búsquedas/s':>12}   (aceleración)")
+    base = None
+    for cantidad in cantidades:
+        resultado = escalado(cantidad, opciones.perros, opciones.segundos)
+        base = base or resultado
+        aceleraciones = " ".join(f"{valor / inicial:.2f}x" for valor, inicial in zip(resultado, base))
+        print(f"{cantidad:>11} {resultado[0]:>15,.0f} {resultado[1]:>14,.0f} {resultado[2]:>12,.0f}   ({aceleraciones})")
@@ -0,0 +1,113 @@
+'''Generador de carga para el servidor asyncio (modules/servidor.py).
+
+Levanta el servidor en otro proceso con datos al azar y lo ataca con muchas terminales a la vez
+(70% búsquedas, 10% sugerencias, 20% reservar+devolver). Informa pedidos por segundo y latencias p50/p99.
+Con demora > 0 cada escritura al almacenamiento tarda eso: el ping sigue rápido si el bucle no se bloquea.
+
+Uso: python benchmarks/servidor.py [clientes] [segundos] [demora_ms] [perros]
+'''
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import time
+import random
+import asyncio
+import multiprocessing
+from modules.perro import Perro, Raza
+from modules.usuario import UsuarioAdoptante
+from modules.sistema import SistemaAdopcion
+from modules.almacenamiento import Almacenamiento
+from modules.servidor import ServidorAdopcion, ClienteAdopcion
+
+class AlmacenamientoLento(Almacenamiento):
+    '''No guarda nada, pero cada escritura demora (como una base remota)'''
+    def __init__(self, demora:float):
+        self.demora = demora
+
+    def guardar_perro(self, perro):
+        time.sleep(self.demora)
+
+    def guardar_usuario(self, usuario, historial=True):
+        time.sleep(self.demora)
+
+def correr_servidor(puerto, perros:int, usuarios:int, demora:float):
+    '''Proceso del servidor: arma el sistema, avisa el puerto y atiende hasta que lo terminen'''
+    random.seed(0)
+    sistema = SistemaAdopcion(AlmacenamientoLento(demora))
+    razas = [sistema.registrar_raza(Raza(f"Raza {i}", "SMLX"[i % 4])) for i in range(20)]
+    sistema.registrar_perros([Perro(f"Perro {i}", random.randint(0, 15), 10, random.choice("MF"), random.choice(razas), True, False)
+                              for i in range(perros)])
+    sistema.registrar_usuarios([UsuarioAdoptante(f"Usuario {i}", f"{i:08d}", "u@mail.com", pref_raza=f"Raza {i % 20}",
+                                                 pref_tamanio="SMLX"[i % 4]) for i in range(usuarios)])
+    async def servir():
+        servidor = ServidorAdopcion(sistema, hilos=16)
+        puerto.value = await servidor.iniciar(puerto=0)
+        await servidor._servidor.serve_forever()
+    asyncio.run(servir())
+
+async def terminal(numero:int, puerto:int, fin:float, perros:int, usuarios:int, latencias:dict[str, list[float]]):
+    '''Una terminal del refugio: pedidos uno detrás de otro hasta el fin'''
+    azar = random.Random(numero)
+    cliente = await ClienteAdopcion.conectar(puerto=puerto)
+    try:
+        while time.perf_counter() < fin:
+            tirada = azar.random()
+            dni = f"{azar.randrange(usuarios):08d}"
+            inicio = time.perf_counter()
+            if tirada < 0.6:
+                accion = "buscar_perro"
+                await cliente.pedir(accion, id=azar.randint(1, perros))
+            elif tirada < 0.7:
+                accion = "ping"
+                await cliente.pedir(accion)
+            elif tirada < 0.8:
+                accion = "sugerencias"
+                await cliente.pedir(accion, dni=dni)
+            else:
+                accion = "reservar+devolver"
+                id_perro = azar.randint(1, perros)
+                try:
+                    await cliente.pedir("reservar", id=id_perro, dni=dni)
+                    await cliente.pedir("devolver", id=id_perro, dni=dni)
+                except ValueError: # perro ocupado o usuario con reserva: cuenta igual como pedido atendido
+                    pass
+            latencias.setdefault(accion, []).append(time.perf_counter() - inicio)
+    finally:
+        await cliente.cerrar()
+
+def percentil(valores:list[float], p:float):
+    return valores[min(len(valores) - 1, int(len(valores) * p))]
+
+async def cargar(puerto:int, clientes:int, segundos:float, perros:int, usuarios:int):
+    latencias:dict[str, list[float]] = {}
+    fin = time.perf_counter() + segundos
+    await asyncio.gather(*(terminal(i, puerto, fin, perros, usuarios, latencias) for i in range(clientes)))
+    total = sum(len(valores) for valores in latencias.values())
+    print(f"{clientes} clientes, {segundos:g}s: {total:,} pedidos ({total / segundos:,.0f}/s)")
+    print(f"{'acción':<18} {'pedidos':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    todas = []
+    for accion, valores in sorted(latencias.items()):
+        valores.sort()
+        todas.extend(valores)
+        print(f"{accion:<18} {len(valores):>8,} {percentil(valores, 0.5) * 1000:>8.2f} {percentil(valores, 0.99) * 1000:>8.2f}")
+    todas.sort()
+    print(f"{'todas':<18} {len(todas):>8,} {percentil(todas, 0.5) * 1000:>8.2f} {percentil(todas, 0.99) * 1000:>8.2f}")
+
+if __name__ == "__main__":
+    clientes = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    segundos = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+    demora = (float(sys.argv[3]) if len(sys.argv) > 3 else 1) / 1000
+    perros = int(sys.argv[4]) if len(sys.argv) > 4 else 10_000
+    usuarios = clientes * 20
+    puerto = multiprocessing.Value("i", 0)
+    proceso = multiprocessing.Process(target=correr_servidor, args=(puerto, perros, usuarios, demora), daemon=True)
+    proceso.start()
+    while not puerto.value:
+        if not proceso.is_alive():
+            sys.exit("El servidor no pudo iniciar")
+        time.sleep(0.05)
+    try:
+        asyncio.run(cargar(puerto.value, clientes, segundos, perros, usuarios))
+    finally:
+        proceso.terminate()
+        proceso.join()
@@ -0,0 +1,175 @@
+'''Mide los caminos más usados de SistemaAdopcion con datos sintéticos (ver benchmarks/datos.py) a distintas escalas.
+
+Muestra una tabla y guarda los resultados en JSON, para comparar entre commits:
+    python benchmarks/sistema.py --salida antes.json
+    (cambios...)
+    python benchmarks/sistema.py --salida despues.json --comparar antes.json
+
+Uso: python benchmarks/sistema.py [escalas ...] [--salida archivo.json] [--comparar anterior.json] [--semilla N] [--metricas]
+'''
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import gc
+import json
+import time
+import random
+import argparse
+import platform
+import subprocess
+from datetime import datetime
+from modules.perro import Perro
+from modules.usuario import UsuarioAdoptante
+from modules.sistema import SistemaAdopcion
+from datos import generar_razas, generar_usuarios, generar_perros, USUARIOS_POR_PERRO
+
+PRESUPUESTO = 5_000_000 # perros recorridos por medición en las operaciones que recorren todo (limita las repeticiones)
+
+def repeticiones(perros:int, maximo:int=1_000, minimo:int=5):
+    '''Cuántas veces repetir una operación cuyo costo crece con la cantidad de perros'''
+    return max(minimo, min(maximo, PRESUPUESTO // perros))
+
+def cronometrar(operacion, argumentos:list):
+    '''Llama a operacion(argumento) para cada argumento. Retorna (duraciones en segundos, resultados)'''
+    duraciones, resultados = [], []
+    gc.collect()
+    for argumento in argumentos:
+        inicio = time.perf_counter()
+        resultado = operacion(argumento)
+        duraciones.append(time.perf_counter() - inicio)
+        resultados.append(resultado)
+    return duraciones, resultados
+
+def resumir(escala:int, nombre:str, duraciones:list[float], elementos:int|None=None):
+    '''Resultado de una medición (tiempos en microsegundos por llamada)'''
+    ordenadas = sorted(duraciones)
+    total = sum(ordenadas)
+    resultado = {
+        "escala": escala,
+        "operacion": nombre,
+        "llamadas": len(ordenadas),
+        "total_s": round(total, 6),
+        "media_us": round(total / len(ordenadas) * 1e6, 2),
+        "p50_us": round(ordenadas[len(ordenadas) // 2] * 1e6, 2),
+        "p99_us": round(ordenadas[min(len(ordenadas) - 1, int(len(ordenadas) * 0.99))] * 1e6, 2),
+    }
+    if elementos is not None: # ej: registros de un lote o perros retornados
+        resultado["elementos"] = elementos
+    return resultado
+
+def medir_escala(perros:int, semilla:int, metricas:bool=False):
+    '''Todas las mediciones con `perros` perros (con metricas=True, con las métricas activadas). Retorna la lista de resultados'''
+    azar = random.Random(semilla)
+    sistema = SistemaAdopcion()
+    if metricas:
+        sistema.activar_metricas()
+    razas = generar_razas(semilla=semilla)
+    usuarios = generar_usuarios(max(1, int(perros * USUARIOS_POR_PERRO)), razas, semilla)
+    lista_perros = generar_perros(perros, razas, usuarios, semilla)
+    resultados = []
+    def agregar(nombre:str, operacion, argumentos:list, contar=None):
+        duraciones, retornos = cronometrar(operacion, argumentos)
+        elementos = sum(map(contar, retornos)) if contar else None
+        resultados.append(resumir(perros, nombre, duraciones, elementos))
+        r = resultados[-1]
+        print(f"{perros:>10,} {nombre:<36} {r['llamadas']:>7,} {r['media_us']:>12,.1f} {r['p50_us']:>12,.1f} {r['p99_us']:>12,.1f}")
+
+    # Registro por lotes (razas, usuarios y perros) y de a uno
+    def registrar_todo(_):
+        sistema.registrar_razas(razas)
+        sistema.registrar_usuarios(usuarios)
+        sistema.registrar_perros(lista_perros)
+    agregar("registrar_lote", registrar_todo, [None])
+    resultados[-1]["elementos"] = len(razas) + len(usuarios) + len(lista_perros)
+    nuevos_usuarios = [UsuarioAdoptante(f"Nuevo {i}", f"N{i:07d}", "nuevo@mail.com") for i in range(1_000)]
+    agregar("registrar_usuario", sistema.registrar_usuario, nuevos_usuarios)
+    nuevos_perros = [Perro(f"Nuevo {i}", i % 16, 10, "MF"[i % 2], azar.choice(razas), True, False) for i in range(1_000)]
+    agregar("registrar_perro", sistema.registrar_perro, nuevos_perros)
+
+    # Búsquedas por clave
+    agregar("buscar_perro", sistema.buscar_perro, [azar.randint(1, perros) for _ in range(10_000)])
+    agregar("buscar_usuario", sistema.buscar_usuario, [azar.choice(usuarios).dni for _ in range(10_000)])
+    agregar("buscar_raza", sistema.buscar_raza, [azar.choice(razas).nombre.lower() for _ in range(10_000)])
+
+    # Consultas que retornan listas
+    for estado in ("disponible", "reservado", "adoptado"):
+        agregar(f"obtener_estado_perros[{estado}]", sistema.obtener_estado_perros,
+                [estado] * repeticiones(perros, 100), len)
+    agregar("obtener_sugerencias_perros", sistema.obtener_sugerencias_perros,
+            [azar.choice(usuarios) for _ in range(repeticiones(perros))], len)
+    # Páginas de 20 con cursor: la primera ordena las claves, las siguientes solo buscan el cursor
+    cursor = [None]
+    def pagina_siguiente(estado):
+        pagina = sistema.obtener_estado_perros(estado, cursor[0], 20)
+        cursor[0] = pagina.siguiente
+        return pagina
+    agregar("obtener_estado_perros[pagina]", pagina_siguiente, ["disponible"] * min(1_000, perros // 40), len)
+    agregar("obtener_sugerencias_perros[pagina]", lambda usuario: sistema.obtener_sugerencias_perros(usuario, None, 20),
+            [azar.choice(usuarios) for _ in range(repeticiones(perros))], len)
+    agregar("obtener_historial_perros", sistema.obtener_historial_perros,
+            [azar.choice(usuarios) for _ in range(repeticiones(perros))], len)
+
+    # Eliminación en cascada (usuario con adopciones, sus perros y su reserva)
+    con_perros = [usuario for usuario in usuarios if usuario.historial_adopciones]
+    agregar("eliminar_usuario", sistema.eliminar_usuario, azar.sample(con_perros, min(len(con_perros), repeticiones(perros, 200))))
+
+    # Eliminación por lotes (ej: dar de baja un refugio): un décimo de los usuarios que quedan con todos sus perros,
+    # y después un décimo de los perros que quedan
+    lote = azar.sample(list(sistema.usuarios), len(sistema.usuarios) // 10)
+    agregar("eliminar_usuarios[lote]", sistema.eliminar_usuarios, [lote])
+    resultados[-1]["elementos"] = len(lote)
+    lote = azar.sample(list(sistema.perros), len(sistema.perros) // 10)
+    agregar("eliminar_perros[lote]", sistema.eliminar_perros, [lote])
+    resultados[-1]["elementos"] = len(lote)
+    return resultados
+
+def commit_actual():
+    '''Commit de git del repositorio (con "+" si hay cambios sin guardar), o None si no se puede saber'''
+    carpeta = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=carpeta, capture_output=True, text=True, check=True).stdout.strip()
+        cambios = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=carpeta, capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit + ("+" if cambios else "")
+
+def comparar(resultados:list[dict], ruta_anterior:str):
+    '''Muestra cuánto cambió la media de cada operación respecto de un JSON anterior'''
+    with open(ruta_anterior, encoding="utf-8") as archivo:
+        anterior = json.load(archivo)
+    medias = {(r["escala"], r["operacion"]): r["media_us"] for r in anterior["resultados"]}
+    print(f"\nComparación con {ruta_anterior} (commit {anterior.get('commit')}): media nueva / media anterior")
+    for r in resultados:
+        previa = medias.get((r["escala"], r["operacion"]))
+        if previa:
+            proporcion = r["media_us"] / previa
+            marca = "  <- más lento" if proporcion > 1.1 else ("  <- más rápido" if proporcion < 0.9 else "")
+            print(f"{r['escala']:>10,} {r['operacion']:<36} {proporcion:>6.2f}x{marca}")
+
+if __name__ == "__main__":
+    argumentos = argparse.ArgumentParser(description="Mide los caminos más usados de SistemaAdopcion")
+    argumentos.add_argument("escalas", nargs="*", type=int, default=[1_000, 100_000, 1_000_000], help="cantidades de perros")
+    argumentos.add_argument("--salida", default="benchmark_sistema.json", help="archivo JSON con los resultados")
+    argumentos.add_argument("--comparar", help="JSON de una medición anterior")
+    argumentos.add_argument("--semilla", type=int, default=0)
+    argumentos.add_argument("--metricas", action="store_true", help="medir con las métricas activadas (para ver su costo)")
+    opciones = argumentos.parse_args()
+
+    print(f"{'perros':>10} {'operación':<36} {'llamadas':>7} {'media µs':>12} {'p50 µs':>12} {'p99 µs':>12}")
+    resultados = []
+    for escala in opciones.escalas:
+        resultados.extend(medir_escala(escala, opciones.semilla, opciones.metricas))
+    informe = {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit_actual(),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "semilla": opciones.semilla,
+        "metricas": opciones.metricas,
+        "resultados": resultados,
+    }
+    with open(opciones.salida, "w", encoding="utf-8") as archivo:
+        json.dump(informe, archivo, ensure_ascii=False, indent=1)
+    print(f"\nResultados en {opciones.salida}")
+    if opciones.comparar:
+        comparar(resultados, opciones.comparar)
@@ -5,10 +5,14 @@
 # solicitar_   : pide input en bucle hasta obtener una validación correcta
 # elegir_      : muestra listado y solicita un valor
 
+import os
+from functools import partial
 from modules.perro import Raza, Perro
 from modules.usuario import UsuarioAdoptante, Preferencias
 from modules.sistema import SistemaAdopcion
 
+POR_PAGINA = 10 # elementos por página en los listados
+
 # Mostrar en pantalla
 def mostrar_objetos(objetos:list, titulo:str, attrs:str|list, vacio:str="No hay"):
     '''Recibe listado de usuarios, perros o razas, los muestra y los retorna. Puede elegir mensajes y atributos.'''
@@ -29,6 +33,15 @@ def mostrar_objetos(objetos:list, titulo:str, attrs:str|list, vacio:str="No hay"
     print("···························")
     return objetos
 
+def mostrar_paginas(paginar, titulo:str, attrs:str|list, vacio:str="No hay"):
+    '''Muestra un listado de a una página: paginar(despues, cantidad) retorna una Pagina del sistema.
+    Enter muestra la siguiente, cualquier otra cosa termina. Retorna si había algo para mostrar'''
+    pagina = mostrar_objetos(paginar(None, POR_PAGINA), titulo, attrs, vacio)
+    hay = bool(pagina)
+    while pagina.siguiente is not None and not input("[+] Enter para ver más, 0 para terminar: ").strip():
+        pagina = mostrar_objetos(paginar(pagina.siguiente, POR_PAGINA), titulo, attrs, vacio)
+    return hay
+
 def mostrar_detalles(texto, titulo):
     '''Da título y marco a información'''
     print("\n"+(" "+titulo+" ").center(27,"·"))
@@ -85,30 +98,51 @@ def solicitar_raza(mensaje="Ingrese nombre de la raza: "):
     return solicitar_dato(mensaje, sistema.buscar_raza)
 
 # Elige, muestra y retorna una instancia
-def elegir_usuario(mensaje="Ingrese DNI del usuario: ", detalles=True):
-    '''Muestra lista resumida de usuarios, solicita uno, muestra sus detalles y lo retorna.'''
-    if not mostrar_objetos(sistema.usuarios, " Usuarios ", ["dni", "nombre"], "No hay usuarios"):
+def elegir_de_paginas(paginar, titulo:str, attrs:str|list, vacio:str, mensaje:str, buscar, tipo:str|None=None):
+    '''Muestra un listado de a una página y solicita un valor en bucle (Enter sin nada: página siguiente).
+    Retorna lo que encuentra buscar(valor), o None si el listado está vacío.
+    Con tipo ("perros", "usuarios" o "razas"), si no lo encuentra sugiere los de nombre parecido al valor.'''
+    pagina = mostrar_objetos(paginar(None, POR_PAGINA), titulo, attrs, vacio)
+    if not pagina:
         return None
-    usuario = solicitar_usuario(mensaje)
-    if detalles:
+    while True:
+        if pagina.siguiente is not None:
+            print("[+] Enter para ver más")
+        valor = input(mensaje)
+        if not valor.strip() and pagina.siguiente is not None:
+            pagina = mostrar_objetos(paginar(pagina.siguiente, POR_PAGINA), titulo, attrs, vacio)
+            continue
+        try:
+            return buscar(valor)
+        except Exception as e:
+            print("[!]", e)
+            parecidos = sistema.buscar_nombres(tipo, valor, limite=5) if tipo and valor.strip() else []
+            if parecidos:
+                mostrar_objetos(parecidos, " ¿Quiso decir? ", attrs, "")
+
+def elegir_usuario(mensaje="Ingrese DNI del usuario: ", detalles=True):
+    '''Muestra lista resumida de usuarios (por páginas), solicita uno, muestra sus detalles y lo retorna.'''
+    usuario = elegir_de_paginas(sistema.obtener_usuarios, " Usuarios ", ["dni", "nombre"], "No hay usuarios", mensaje, sistema.buscar_usuario, "usuarios")
+    if usuario and detalles:
         mostrar_detalles(usuario, "Usuario")
     return usuario
 
-def elegir_perro(mensaje="Ingrese ID del perro: ", detalles=True):
-    '''Muestra lista resumida de perros, solicita uno, muestra sus detalles y lo retorna.'''
-    if not mostrar_objetos(sistema.perros, " Perros ", ["id", "nombre"], "No hay perros"):
-        return None
-    perro = solicitar_perro(mensaje)
-    if detalles:
+def elegir_perro(mensaje="Ingrese ID del perro: ", detalles=True, estado:str|None=None):
+    '''Muestra lista resumida de perros (por páginas; solo los de un estado, si se indica), solicita uno,
+    muestra sus detalles y lo retorna.'''
+    if estado:
+        paginar, titulo, vacio = partial(sistema.obtener_estado_perros, estado), f" Perros {estado}s ", f"No hay perros {estado}s"
+    else:
+        paginar, titulo, vacio = sistema.obtener_perros, " Perros ", "No hay perros"
+    perro = elegir_de_paginas(paginar, titulo, ["id", "nombre"], vacio, mensaje, sistema.buscar_perro, "perros")
+    if perro and detalles:
         mostrar_detalles(perro, "Perro")
     return perro
 
 def elegir_raza(mensaje="Ingrese nombre de raza: ", detalles=True):
-    '''Muestra lista resumida de razas, solicita una, muestra sus detalles y la retorna.'''
-    if not mostrar_objetos(sistema.razas, " Razas ", ["nombre"], "No hay razas"):
-        return None
-    raza = solicitar_raza(mensaje)
-    if detalles:
+    '''Muestra lista resumida de razas (por páginas), solicita una, muestra sus detalles y la retorna.'''
+    raza = elegir_de_paginas(sistema.obtener_razas, " Razas ", ["nombre"], "No hay razas", mensaje, sistema.buscar_raza, "razas")
+    if raza and detalles:
         mostrar_detalles(raza, "Raza")
     return raza
 
@@ -135,8 +169,10 @@ def opc_registrar_perro():
     edad = solicitar_dato(f"Edad de '{nombre}': ", Perro.validar_edad)
     peso = solicitar_dato(f"Peso: ", Perro.validar_peso)
     sexo = solicitar_dato(f"Sexo (M/F): ", Perro.validar_sexo)
-    mostrar_objetos(sistema.razas, " Razas ", ["nombre"], "No hay razas")
-    raza = solicitar_raza()
+    raza = elegir_raza("Ingrese nombre de la raza: ", detalles=False)
+    if not raza:
+        print("[!] Primero debe registrar una raza")
+        return
     vacunado = solicitar_bool(f"¿'{nombre}' está vacunado?")
     discapacitado = solicitar_bool(f"¿'{nombre}' tiene alguna discapacidad?")
     perro = Perro(
@@ -167,10 +203,31 @@ def opc_registrar_raza():
     sistema.registrar_raza(raza)
     mostrar_detalles(raza, "Raza nueva")
 
+def validar_archivo(ruta:str):
+    '''Ruta a un archivo CSV o JSONL existente. ValueError si falla.'''
+    ruta = ruta.strip()
+    if not ruta.removesuffix(".gz").endswith((".csv", ".jsonl", ".ndjson")):
+        raise ValueError("El archivo debe ser .csv o .jsonl (puede estar comprimido: .gz)")
+    if not os.path.isfile(ruta):
+        raise ValueError(f"No se encontró el archivo '{ruta}'")
+    return ruta
+
+def opc_importar_archivo():
+    '''Importa razas, usuarios o perros desde un archivo CSV o JSONL y muestra las filas rechazadas.'''
+    mostrar_menu("Importar", ["Razas", "Usuarios", "Perros"])
+    opcion = input("Ingrese una opción: ").strip()
+    if opcion not in ("1", "2", "3"):
+        return
+    ruta = solicitar_dato("Ruta del archivo (.csv o .jsonl): ", validar_archivo)
+    from modules.importacion import Importador # solo quien importa archivos paga por cargar csv, gzip y json
+    importador = Importador(sistema)
+    importar = (importador.importar_razas, importador.importar_usuarios, importador.importar_perros)[int(opcion) - 1]
+    mostrar_detalles(importar(ruta), "Importación")
+
 def menu_registrar():
     '''Menú de opciones para registrar usuario'''
     while True:
-        mostrar_menu("Registrar", ["Registrar usuario", "Registrar perro", "Registrar raza"])
+        mostrar_menu("Registrar", ["Registrar usuario", "Registrar perro", "Registrar raza", "Importar archivo"])
         opcion = input("Ingrese una opción: ")
         if opcion == "1":
             opc_registrar_usuario()
@@ -181,6 +238,9 @@ def menu_registrar():
         elif opcion == "3":
             opc_registrar_raza()
             input("[<] Presione 'Enter' para volver ")
+        elif opcion == "4":
+            opc_importar_archivo()
+            input("[<] Presione 'Enter' para volver ")
         elif opcion == "0":
             break
         else:
@@ -206,37 +266,42 @@ def opc_editar_perro():
     perro:Perro = elegir_perro(detalles=False)
     if not perro:
         return
+    version = perro.version # los cambios se guardan al final, solo si nadie modificó al perro mientras tanto
     mostrar_detalles(f"{perro.mostrar_datos_propios()}\nRaza: {perro.raza.nombre}", "Perro")
+    cambios = {}
     # nombre
     validado = solicitar_bool(f"¿Cambiar nombre '{perro.nombre}'?")
     if validado:
-        solicitar_dato("Nombre: ", perro.cambiar_nombre)
+        cambios["nombre"] = solicitar_dato("Nombre: ", Perro.validar_nombre)
     # edad
     validado = solicitar_bool(f"¿Cambiar edad '{perro.edad}'?")
     if validado:
-        solicitar_dato("Edad: ", perro.cambiar_edad)
+        cambios["edad"] = solicitar_dato("Edad: ", Perro.validar_edad)
     # peso
     validado = solicitar_bool(f"¿Cambiar peso '{perro.peso}'?")
     if validado:
-        solicitar_dato("Peso: ", perro.cambiar_peso)
+        cambios["peso"] = solicitar_dato("Peso: ", Perro.validar_peso)
     # sexo
     validado = solicitar_bool(f"¿Cambiar sexo '{perro.sexo}'?")
     if validado:
-        solicitar_dato("Sexo (M/F): ", perro.cambiar_sexo)
+        cambios["sexo"] = solicitar_dato("Sexo (M/F): ", Perro.validar_sexo)
     # vacunado
     validado = solicitar_bool(f"¿Cambiar estado de vacunación '{perro.vacunado}'?")
     if validado:
-        perro.cambiar_vacunado(solicitar_bool("Vacunado"))
+        cambios["vacunado"] = solicitar_bool("Vacunado")
     # discapacitado
     validado = solicitar_bool(f"¿Cambiar estado de discapacidad '{perro.discapacitado}'?")
     if validado:
-        perro.cambiar_discapacitado(solicitar_bool("Discapacitado"))
+        cambios["discapacitado"] = solicitar_bool("Discapacitado")
     # raza
     validado = solicitar_bool(f"¿Cambiar raza '{perro.raza.nombre}'?")
     if validado:
-        mostrar_objetos(sistema.razas, " Razas ", ["nombre"], "No hay razas")
-        raza = solicitar_raza("Raza: ")
-        perro.cambiar_raza(raza)
+        cambios["raza"] = elegir_raza("Raza: ", detalles=False)
+    if cambios:
+        try:
+            sistema.editar_perro(perro, version, **cambios)
+        except ValueError as e: # ConflictoVersion: otro operador lo editó, adoptó o reservó mientras tanto
+            print("[!]", e)
     mostrar_detalles(f"{perro.mostrar_datos_propios()}\nRaza: {perro.raza.nombre}", "Perro")
 
 def opc_editar_raza():
@@ -313,13 +378,11 @@ def menu_borrar():
 
 # Menu - Adopciones
 def opc_reservar():
-    perros_disponibles = mostrar_objetos(sistema.obtener_estado_perros("disponible"), " Perros Disponible ", ["id", "nombre"], "No hay perros disponibles")
-    if not perros_disponibles:
+    perro = elegir_perro("Ingrese ID del perro a reservar: ", False, "disponible")
+    if not perro:
         return
-    perro = solicitar_perro("Ingrese ID del perro a reservar: ")
     print()
-    mostrar_objetos(sistema.usuarios, " Usuarios ", ["dni", "nombre"], "No hay usuarios")
-    usuario = solicitar_usuario("Ingrese DNI del usuario que hará la reserva: ")
+    usuario = elegir_usuario("Ingrese DNI del usuario que hará la reserva: ", False)
     try:
         sistema.reservar(perro, usuario)
         print(f"[+] {usuario.nombre} ha reservado a {perro.nombre}")
@@ -327,10 +390,9 @@ def opc_reservar():
         print("[!]", e)
 
 def opc_adoptar():
-    perros_reservados = mostrar_objetos(sistema.obtener_estado_perros("reservado"), " Perros Reservados ", ["id", "nombre"], "No hay perros reservados")
-    if not perros_reservados:
+    perro = elegir_perro("Ingrese ID del perro a adoptar: ", False, "reservado")
+    if not perro:
         return
-    perro = solicitar_perro(f"Ingrese ID del perro a adoptar: ")
     if perro.estado == "reservado":
         usuario = sistema.buscar_usuario(perro.adoptante, False)
         print(f"\n{usuario.nombre} ({usuario.dni}):")
@@ -346,8 +408,8 @@ def opc_adoptar():
             print("[!]", e)
 
 def opc_devolver():
-    perros_adoptados = mostrar_objetos(sistema.obtener_estado_perros("adoptado"), " Perros Adoptados ", ["id", "nombre"])
-    perros_reservados = mostrar_objetos(sistema.obtener_estado_perros("reservado"), " Perros Reservados ", ["id", "nombre"])
+    perros_adoptados = mostrar_paginas(partial(sistema.obtener_estado_perros, "adoptado"), " Perros Adoptados ", ["id", "nombre"])
+    perros_reservados = mostrar_paginas(partial(sistema.obtener_estado_perros, "reservado"), " Perros Reservados ", ["id", "nombre"])
     if not perros_adoptados and not perros_reservados:
         print(f"[x] No hay perros para adoptar o reservar")
         return
@@ -390,6 +452,8 @@ def menu_adopciones():
 # Menú - Buscar/Mostrar/filtrar
 def opc_ver_sugerencias():
     usuario:UsuarioAdoptante = elegir_usuario(detalles=False)
+    if not usuario:
+        return
     pref = usuario.preferencias
     mostrar_detalles(pref, "Preferencias")
     validado = solicitar_bool(f"¿Quiere cambiar sus preferencias?")
@@ -408,7 +472,7 @@ def opc_ver_sugerencias():
             raza = elegir_raza("Ingrese la raza que prefiere (puede dejar en blanco): ", detalles=False)
             pref.cambiar_raza(raza.nombre)
     print()
-    mostrar_objetos(sistema.obtener_sugerencias_perros(usuario), "Sugerencias", ["id", "nombre"], "no hay coincidencia")
+    mostrar_paginas(partial(sistema.obtener_sugerencias_perros, usuario), "Sugerencias", ["id", "nombre"], "no hay coincidencia")
 
 def menu_buscar():
     while True:
@@ -427,14 +491,9 @@ def menu_buscar():
         elif opcion == "4": # Ver sugerencias
             opc_ver_sugerencias()
             input("[<] Presione 'Enter' para volver ")
-        elif opcion == "5": # Perros disponibles
-            mostrar_objetos(sistema.obtener_estado_perros("disponible"), "Disponibles", ["id", "nombre"], "No quedan")
-            input("[<] Presione 'Enter' para volver ")
-        elif opcion == "6": # Perros reservados
-            mostrar_objetos(sistema.obtener_estado_perros("reservado"), "Reservados", ["id", "nombre"])
-            input("[<] Presione 'Enter' para volver ")
-        elif opcion == "7": # Perros adoptados
-            mostrar_objetos(sistema.obtener_estado_perros("adoptado"), "Adoptados", ["id", "nombre"])
+        elif opcion in ("5", "6", "7"): # Perros disponibles, reservados o adoptados
+            estado = Perro.ESTADOS[int(opcion) - 5]
+            mostrar_paginas(partial(sistema.obtener_estado_perros, estado), estado.capitalize() + "s", ["id", "nombre"], "No quedan" if estado == "disponible" else "No hay")
             input("[<] Presione 'Enter' para volver ")
         elif opcion == "0":
             break
@@ -463,26 +522,57 @@ def menu_principal():
     print(  "_/ \\| ,,,|           ")
     print(  "     /               ")
 
-sistema = SistemaAdopcion()
-
-mestizo = sistema.registrar_raza(Raza("Mestizo"))
-chihuahua = sistema.registrar_raza(Raza(nombre="Chihuahua", temperamento="Nervioso", tamanio="S"))
-dalmata = sistema.registrar_raza(Raza(nombre="Dalmata", temperamento="Enérgico", tamanio="L"))
-gran_danes = sistema.registrar_raza(Raza(nombre="Gran Danés", temperamento="Gentil", tamanio="X"))
-sistema.registrar_raza(Raza(nombre="Poodle", temperamento="Activo", tamanio="M"))
-sistema.registrar_raza(Raza(nombre="San Bernardo", temperamento="Tranquilo", tamanio="X"))
-sistema.registrar_raza(Raza(nombre="Pug", temperamento="Divertido", tamanio="S"))
-sistema.registrar_usuario(UsuarioAdoptante(nombre="Tito", dni="11111111", email="tatetito@bgmail.com"))
-sistema.registrar_usuario(UsuarioAdoptante(nombre="Pepe", dni="22222222", email="pepocho@pp.8"))
-sistema.registrar_usuario(UsuarioAdoptante(nombre="Ana", dni="33333333", email="ana@na.com"))
-sistema.registrar_usuario(UsuarioAdoptante(nombre="Armando Esteban Quito", dni="44444444", email="a@a.a"))
-sistema.registrar_usuario(UsuarioAdoptante(nombre="Alan Brito", dni="M5555555", email="dea@luminio.com"))
-sistema.registrar_usuario(UsuarioAdoptante(nombre="Aquiles Bailo", dni="F6666666", email="b@b.com"))
-sistema.registrar_perro(Perro(nombre="Pichichus", edad=1, peso=8.5, sexo="M", raza=chihuahua, vacunado=True, discapacitado=False))
-sistema.registrar_perro(Perro(nombre="Catrina", edad=2, peso=7, sexo="F", raza=chihuahua, vacunado=True, discapacitado=False))
-sistema.registrar_perro(Perro(nombre="La Tuerta", edad=13, peso=22.4, sexo="F", raza=mestizo, vacunado=True, discapacitado=True))
-sistema.registrar_perro(Perro(nombre="Tato", edad=2, peso=42, sexo="M", raza=dalmata, vacunado=True, discapacitado=False))
-sistema.registrar_perro(Perro(nombre="Milanga", edad=6, peso=12.5, sexo="M", raza=chihuahua, vacunado=True, discapacitado=True))
-sistema.registrar_perro(Perro(nombre="Panceta", edad=8, peso=99.9, sexo="F", raza=gran_danes, vacunado=True, discapacitado=False))
-
-menu_principal()
+def cargar_semilla():
+    '''Razas, usuarios y perros de ejemplo'''
+    mestizo = sistema.registrar_raza(Raza("Mestizo"))
+    chihuahua = sistema.registrar_raza(Raza(nombre="Chihuahua", temperamento="Nervioso", tamanio="S"))
+    dalmata = sistema.registrar_raza(Raza(nombre="Dalmata", temperamento="Enérgico", tamanio="L"))
+    gran_danes = sistema.registrar_raza(Raza(nombre="Gran Danés", temperamento="Gentil", tamanio="X"))
+    sistema.registrar_raza(Raza(nombre="Poodle", temperamento="Activo", tamanio="M"))
+    sistema.registrar_raza(Raza(nombre="San Bernardo", temperamento="Tranquilo", tamanio="X"))
+    sistema.registrar_raza(Raza(nombre="Pug", temperamento="Divertido", tamanio="S"))
+    sistema.registrar_usuario(UsuarioAdoptante(nombre="Tito", dni="11111111", email="tatetito@bgmail.com"))
+    sistema.registrar_usuario(UsuarioAdoptante(nombre="Pepe", dni="22222222", email="pepocho@pp.8"))
+    sistema.registrar_usuario(UsuarioAdoptante(nombre="Ana", dni="33333333", email="ana@na.com"))
+    sistema.registrar_usuario(UsuarioAdoptante(nombre="Armando Esteban Quito", dni="44444444", email="a@a.a"))
+    sistema.registrar_usuario(UsuarioAdoptante(nombre="Alan Brito", dni="M5555555", email="dea@luminio.com"))
+    sistema.registrar_usuario(UsuarioAdoptante(nombre="Aquiles Bailo", dni="F6666666", email="b@b.com"))
+    sistema.registrar_perro(Perro(nombre="Pichichus", edad=1, peso=8.5, sexo="M", raza=chihuahua, vacunado=True, discapacitado=False))
+    sistema.registrar_perro(Perro(nombre="Catrina", edad=2, peso=7, sexo="F", raza=chihuahua, vacunado=True, discapacitado=False))
+    sistema.registrar_perro(Perro(nombre="La Tuerta", edad=13, peso=22.4, sexo="F", raza=mestizo, vacunado=True, discapacitado=True))
+    sistema.registrar_perro(Perro(nombre="Tato", edad=2, peso=42, sexo="M", raza=dalmata, vacunado=True, discapacitado=False))
+    sistema.registrar_perro(Perro(nombre="Milanga", edad=6, peso=12.5, sexo="M", raza=chihuahua, vacunado=True, discapacitado=True))
+    sistema.registrar_perro(Perro(nombre="Panceta", edad=8, peso=99.9, sexo="F", raza=gran_danes, vacunado=True, discapacitado=False))
+
+def abrir_almacenamiento(ruta:str|None):
+    '''Sin ruta: solo en memoria. Archivo .db/.sqlite/.sqlite3: SQLite. Cualquier otra ruta: carpeta con diario'''
+    if not ruta:
+        return None
+    if ruta.endswith((".db", ".sqlite", ".sqlite3")):
+        from modules.almacenamiento import AlmacenamientoSQLite
+        return AlmacenamientoSQLite(ruta)
+    from modules.diario import AlmacenamientoDiario
+    return AlmacenamientoDiario(ruta)
+
+def main(argumentos:list[str]|None=None):
+    '''Arma el sistema según los argumentos de la línea de comandos y abre el menú'''
+    global sistema
+    import argparse
+    parser = argparse.ArgumentParser(description="Sistema de adopción de perros (menú interactivo)")
+    parser.add_argument("--data", metavar="RUTA", help="guardar los datos: archivo .db (SQLite) o carpeta (diario). Sin esto, solo en memoria")
+    parser.add_argument("--no-seed", action="store_true", help="no cargar los datos de ejemplo")
+    opciones = parser.parse_args(argumentos)
+    sistema = SistemaAdopcion(abrir_almacenamiento(opciones.data))
+    sistema.activar_cache() # los listados y las sugerencias se vuelven a pedir al volver a cada pantalla
+    try:
+        # Los datos de ejemplo solo se cargan en un sistema vacío (con --data, la primera vez)
+        if not opciones.no_seed and not sistema.almacenamiento.hay("razas"):
+            cargar_semilla()
+        menu_principal()
+    finally:
+        sistema.cerrar()
+
+sistema:SistemaAdopcion|None = None # lo arma main(); importar este archivo no ejecuta nada
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,373 @@
+if __name__ == "__main__":
+    import sys
+    import os
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import sys
+import threading
+from contextlib import contextmanager
+from modules.perro import Perro, Raza
+from modules.usuario import UsuarioAdoptante
+
+# Filas: tuplas con los datos de cada objeto, en el orden en que se guardan
+# raza:    (nombre, tamanio, temperamento)
+# perro:   (id, nombre, edad, peso, sexo, raza, vacunado, discapacitado, estado, adoptante)
+# usuario: (dni, nombre, email, pref_raza, pref_edad, pref_tamanio, reserva, historial_adopciones)
+COLUMNAS = {
+    "razas": ("nombre", "tamanio", "temperamento"),
+    "perros": ("id", "nombre", "edad", "peso", "sexo", "raza", "vacunado", "discapacitado", "estado", "adoptante"),
+    "usuarios": ("dni", "nombre", "email", "pref_raza", "pref_edad", "pref_tamanio", "reserva", "historial_adopciones"),
+}
+
+def raza_a_fila(raza:Raza):
+    return (raza.nombre, raza.tamanio, raza.temperamento)
+
+def fila_a_raza(fila):
+    nombre, tamanio, temperamento = fila
+    return Raza(nombre=nombre, tamanio=tamanio, temperamento=temperamento)
+
+def perro_a_fila(perro:Perro):
+    return (perro.id, perro.nombre, perro.edad, perro.peso, perro.sexo, perro.raza.nombre,
+            perro.vacunado, perro.discapacitado, perro.estado, perro.adoptante)
+
+def fila_a_perro(fila, raza:Raza):
+    '''Arma un perro a partir de su fila. La raza se recibe ya armada (agregación)'''
+    id, nombre, edad, peso, sexo, _, vacunado, discapacitado, estado, adoptante = fila
+    perro = Perro(nombre=nombre, edad=edad, peso=peso, sexo=sexo, raza=raza,
+                  vacunado=bool(vacunado), discapacitado=bool(discapacitado), id=id)
+    perro.estado = sys.intern(estado) # un solo objeto por valor, compartido por todos los perros
+    perro.adoptante = adoptante
+    return perro
+
+def usuario_a_fila(usuario:UsuarioAdoptante):
+    pref = usuario.preferencias
+    return (usuario.dni, usuario.nombre, usuario.email, pref.raza, pref.edad or "", pref.tamanio,
+            usuario.reserva, list(usuario.historial_adopciones))
+
+def fila_a_usuario(fila):
+    dni, nombre, email, pref_raza, pref_edad, pref_tamanio, reserva, historial = fila
+    usuario = UsuarioAdoptante(nombre=nombre, dni=dni, email=email, pref_raza=pref_raza, pref_tamanio=pref_tamanio)
+    usuario.preferencias.edad = sys.intern(pref_edad) # ya es un rango de edad (C/J/A/M)
+    usuario.reserva = reserva
+    usuario.historial_adopciones.extend(historial)
+    return usuario
+
+
+class Almacenamiento:
+    '''Almacenamiento en memoria: no guarda nada (comportamiento original del sistema).
+    Las subclases persisten los cambios que les avisa el sistema y cargan filas a pedido.'''
+    persistente = False
+
+    @contextmanager
+    def transaccion(self):
+        '''Agrupa varias escrituras para que se confirmen juntas'''
+        yield
+
+    # Escritura
+    def guardar_raza(self, raza:Raza):
+        pass
+
+    def guardar_perro(self, perro:Perro):
+        pass
+
+    def guardar_usuario(self, usuario:UsuarioAdoptante, historial:bool=True):
+        '''Guarda datos y preferencias del usuario. Con historial=True también reescribe sus adopciones'''
+        pass
+
+    def eliminar_perro(self, id_perro:int):
+        pass
+
+    def eliminar_usuario(self, dni:str):
+        pass
+
+    # Escritura por lotes (las subclases pueden hacerlo en una sola operación)
+    def guardar_razas(self, razas:list[Raza]):
+        with self.transaccion():
+            for raza in razas:
+                self.guardar_raza(raza)
+
+    def guardar_perros(self, perros:list[Perro]):
+        with self.transaccion():
+            for perro in perros:
+                self.guardar_perro(perro)
+
+    def guardar_usuarios(self, usuarios:list[UsuarioAdoptante]):
+        with self.transaccion():
+            for usuario in usuarios:
+                self.guardar_usuario(usuario)
+
+    def eliminar_perros(self, ids:list[int]):
+        with self.transaccion():
+            for id_perro in ids:
+                self.eliminar_perro(id_perro)
+
+    def eliminar_usuarios(self, dnis:list[str]):
+        with self.transaccion():
+            for dni in dnis:
+                self.eliminar_usuario(dni)
+
+    # Lectura
+    def hay(self, tabla:str):
+        '''Indica si hay filas guardadas en la tabla ("razas", "perros" o "usuarios")'''
+        return False
+
+    def existentes(self, tabla:str, claves:list):
+        '''Retorna cuáles de las claves (nombre, ID o DNI) ya están guardadas en la tabla'''
+        return set()
+
+    def cargar_raza(self, nombre:str):
+        return None
+
+    def cargar_perro(self, id_perro:int):
+        return None
+
+    def cargar_usuario(self, dni:str):
+        return None
+
+    def cargar_razas(self):
+        return iter(())
+
+    def cargar_perros(self):
+        return iter(())
+
+    def cargar_usuarios(self):
+        return iter(())
+
+    def proximo_id_perro(self):
+        return 1
+
+    def cerrar(self):
+        pass
+
+
+class AlmacenamientoSQLite(Almacenamiento):
+    '''Guarda el sistema en una base SQLite (escritura inmediata, lectura a pedido)'''
+    persistente = True
+    ESQUEMA = """
+        PRAGMA foreign_keys = ON;
+        CREATE TABLE IF NOT EXISTS razas (
+            nombre       TEXT PRIMARY KEY,
+            tamanio      TEXT NOT NULL DEFAULT '',
+            temperamento TEXT NOT NULL DEFAULT ''
+        );
+        CREATE TABLE IF NOT EXISTS perros (
+            id            INTEGER PRIMARY KEY,
+            nombre        TEXT NOT NULL,
+            edad          INTEGER NOT NULL,
+            peso          REAL NOT NULL,
+            sexo          TEXT NOT NULL,
+            raza          TEXT NOT NULL,
+            vacunado      INTEGER NOT NULL,
+            discapacitado INTEGER NOT NULL,
+            estado        TEXT NOT NULL DEFAULT 'disponible',
+            adoptante     TEXT
+        );
+        CREATE INDEX IF NOT EXISTS perros_estado ON perros (estado);
+        CREATE INDEX IF NOT EXISTS perros_raza ON perros (raza);
+        CREATE INDEX IF NOT EXISTS perros_adoptante ON perros (adoptante);
+        CREATE TABLE IF NOT EXISTS usuarios (
+            dni     TEXT PRIMARY KEY,
+            nombre  TEXT NOT NULL,
+            email   TEXT NOT NULL,
+            reserva INTEGER
+        );
+        CREATE TABLE IF NOT EXISTS preferencias (
+            dni     TEXT PRIMARY KEY REFERENCES usuarios (dni) ON DELETE CASCADE,
+            raza    TEXT NOT NULL DEFAULT '',
+            edad    TEXT NOT NULL DEFAULT '',
+            tamanio TEXT NOT NULL DEFAULT ''
+        );
+        CREATE TABLE IF NOT EXISTS adopciones (
+            dni      TEXT NOT NULL REFERENCES usuarios (dni) ON DELETE CASCADE,
+            orden    INTEGER NOT NULL,
+            id_perro INTEGER NOT NULL,
+            PRIMARY KEY (dni, orden)
+        );
+    """
+    TABLAS = ("razas", "perros", "usuarios")
+    CLAVES = {"razas": "nombre", "perros": "id", "usuarios": "dni"}
+    LOTE_CLAVES = 500 # claves por consulta en existentes() (límite de parámetros de SQLite)
+    LOTE_FILAS = 1000 # filas por lectura al recorrer una tabla entera
+    CONSULTA_USUARIOS = ("SELECT u.dni, u.nombre, u.email, p.raza, p.edad, p.tamanio, u.reserva "
+                         "FROM usuarios u LEFT JOIN preferencias p USING (dni)")
+
+    def __init__(self, ruta:str=":memory:"):
+        # isolation_level=None: las transacciones se manejan a mano en transaccion()
+        # check_same_thread=False: la conexión se comparte entre hilos; lecturas y escrituras se ordenan con _candado
+        import sqlite3 # recién acá: quien no usa SQLite no paga por importarlo
+        self.conexion = sqlite3.connect(ruta, isolation_level=None, check_same_thread=False)
+        self.conexion.executescript(self.ESQUEMA)
+        self._profundidad = 0
+        self._candado = threading.RLock()
+
+    @contextmanager
+    def transaccion(self):
+        '''Abre una transacción; si ya hay una abierta en este hilo, se suma a ella.
+        Otros hilos esperan a que termine (la conexión tiene una sola transacción a la vez)'''
+        with self._candado:
+            if self._profundidad == 0:
+                self.conexion.execute("BEGIN")
+            self._profundidad += 1
+            try:
+                yield
+            except BaseException:
+                self._profundidad -= 1
+                if self._profundidad == 0:
+                    self.conexion.execute("ROLLBACK")
+                raise
+            self._profundidad -= 1
+            if self._profundidad == 0:
+                self.conexion.execute("COMMIT")
+
+    # Escritura
+    def guardar_raza(self, raza:Raza):
+        with self.transaccion():
+            self.conexion.execute(
+                "INSERT INTO razas VALUES (?, ?, ?) "
+                "ON CONFLICT (nombre) DO UPDATE SET tamanio = excluded.tamanio, temperamento = excluded.temperamento",
+                raza_a_fila(raza))
+
+    def guardar_perro(self, perro:Perro):
+        with self.transaccion():
+            self.conexion.execute(
+                "INSERT INTO perros VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET nombre = excluded.nombre, edad = excluded.edad, peso = excluded.peso, "
+                "sexo = excluded.sexo, raza = excluded.raza, vacunado = excluded.vacunado, "
+                "discapacitado = excluded.discapacitado, estado = excluded.estado, adoptante = excluded.adoptante",
+                perro_a_fila(perro))
+
+    def guardar_usuario(self, usuario:UsuarioAdoptante, historial:bool=True):
+        dni, nombre, email, pref_raza, pref_edad, pref_tamanio, reserva, adopciones = usuario_a_fila(usuario)
+        with self.transaccion():
+            self.conexion.execute(
+                "INSERT INTO usuarios VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (dni) DO UPDATE SET nombre = excluded.nombre, email = excluded.email, reserva = excluded.reserva",
+                (dni, nombre, email, reserva))
+            self.conexion.execute(
+                "INSERT INTO preferencias VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (dni) DO UPDATE SET raza = excluded.raza, edad = excluded.edad, tamanio = excluded.tamanio",
+                (dni, pref_raza, pref_edad, pref_tamanio))
+            if historial:
+                self.conexion.execute("DELETE FROM adopciones WHERE dni = ?", (dni,))
+                self.conexion.executemany("INSERT INTO adopciones VALUES (?, ?, ?)",
+                                          ((dni, orden, id_perro) for orden, id_perro in enumerate(adopciones)))
+
+    def guardar_razas(self, razas:list[Raza]):
+        with self.transaccion():
+            self.conexion.executemany(
+                "INSERT INTO razas VALUES (?, ?, ?) "
+                "ON CONFLICT (nombre) DO UPDATE SET tamanio = excluded.tamanio, temperamento = excluded.temperamento",
+                map(raza_a_fila, razas))
+
+    def guardar_perros(self, perros:list[Perro]):
+        with self.transaccion():
+            self.conexion.executemany(
+                "INSERT INTO perros VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET nombre = excluded.nombre, edad = excluded.edad, peso = excluded.peso, "
+                "sexo = excluded.sexo, raza = excluded.raza, vacunado = excluded.vacunado, "
+                "discapacitado = excluded.discapacitado, estado = excluded.estado, adoptante = excluded.adoptante",
+                map(perro_a_fila, perros))
+
+    def eliminar_perro(self, id_perro:int):
+        with self.transaccion():
+            self.conexion.execute("DELETE FROM perros WHERE id = ?", (id_perro,))
+
+    def eliminar_usuario(self, dni:str):
+        with self.transaccion(): # preferencias y adopciones se borran en cascada
+            self.conexion.execute("DELETE FROM usuarios WHERE dni = ?", (dni,))
+
+    def eliminar_perros(self, ids:list[int]):
+        with self.transaccion():
+            self.conexion.executemany("DELETE FROM perros WHERE id = ?", ((id_perro,) for id_perro in ids))
+
+    def eliminar_usuarios(self, dnis:list[str]):
+        with self.transaccion():
+            self.conexion.executemany("DELETE FROM usuarios WHERE dni = ?", ((dni,) for dni in dnis))
+
+    # Lectura: también con _candado, la conexión es compartida y otro hilo puede estar a mitad de una
+    # transacción (sin él, se leerían filas que todavía no se confirmaron y que pueden deshacerse)
+    def hay(self, tabla:str):
+        if tabla not in self.TABLAS:
+            raise ValueError(f"La tabla '{tabla}' no existe. Opciones: {list(self.TABLAS)}")
+        with self._candado:
+            return self.conexion.execute(f"SELECT EXISTS (SELECT 1 FROM {tabla})").fetchone()[0] == 1
+
+    def existentes(self, tabla:str, claves:list):
+        if tabla not in self.TABLAS:
+            raise ValueError(f"La tabla '{tabla}' no existe. Opciones: {list(self.TABLAS)}")
+        columna = self.CLAVES[tabla]
+        encontradas = set()
+        for inicio in range(0, len(claves), self.LOTE_CLAVES):
+            lote = claves[inicio:inicio + self.LOTE_CLAVES]
+            consulta = f"SELECT {columna} FROM {tabla} WHERE {columna} IN ({', '.join('?' * len(lote))})"
+            with self._candado:
+                encontradas.update(clave for (clave,) in self.conexion.execute(consulta, lote))
+        return encontradas
+
+    def cargar_raza(self, nombre:str):
+        with self._candado:
+            return self.conexion.execute("SELECT * FROM razas WHERE nombre = ?", (nombre,)).fetchone()
+
+    def cargar_perro(self, id_perro:int):
+        with self._candado:
+            return self.conexion.execute("SELECT * FROM perros WHERE id = ?", (id_perro,)).fetchone()
+
+    def cargar_usuario(self, dni:str):
+        with self._candado:
+            fila = self.conexion.execute(f"{self.CONSULTA_USUARIOS} WHERE u.dni = ?", (dni,)).fetchone()
+            if fila is None:
+                return None
+            historial = [id_perro for (id_perro,) in self.conexion.execute(
+                "SELECT id_perro FROM adopciones WHERE dni = ? ORDER BY orden", (dni,))]
+        return self._completar_usuario(fila, historial)
+
+    def cargar_razas(self):
+        return self._en_lotes(lambda ultima: self._lote("SELECT * FROM razas", "nombre", ultima))
+
+    def cargar_perros(self):
+        return self._en_lotes(lambda ultimo: self._lote("SELECT * FROM perros", "id", ultimo))
+
+    def cargar_usuarios(self):
+        return self._en_lotes(self._lote_usuarios)
+
+    def _en_lotes(self, leer):
+        '''Recorre una tabla en lotes ordenados por clave. Cada lote se lee con el candado tomado y el resto
+        del recorrido no lo retiene: las escrituras de otros hilos pueden entrar entre un lote y el siguiente'''
+        ultima = None
+        while True:
+            with self._candado:
+                filas = leer(ultima)
+            yield from filas
+            if len(filas) < self.LOTE_FILAS:
+                return
+            ultima = filas[-1][0]
+
+    def _lote(self, consulta:str, columna:str, ultima):
+        '''Las filas de la consulta que siguen a la última clave leída (None: desde el principio)'''
+        donde, parametros = ("", ()) if ultima is None else (f" WHERE {columna} > ?", (ultima,))
+        return self.conexion.execute(
+            f"{consulta}{donde} ORDER BY {columna} LIMIT {self.LOTE_FILAS}", parametros).fetchall()
+
+    def _lote_usuarios(self, ultimo:str|None):
+        '''Un lote de usuarios con sus historiales (los del rango de DNIs del lote, en la misma lectura)'''
+        filas = self._lote(self.CONSULTA_USUARIOS, "u.dni", ultimo)
+        if not filas:
+            return []
+        historiales:dict[str, list[int]] = {}
+        for dni, id_perro in self.conexion.execute(
+                "SELECT dni, id_perro FROM adopciones WHERE dni BETWEEN ? AND ? ORDER BY dni, orden",
+                (filas[0][0], filas[-1][0])):
+            historiales.setdefault(dni, []).append(id_perro)
+        return [self._completar_usuario(fila, historiales.get(fila[0], [])) for fila in filas]
+
+    @staticmethod
+    def _completar_usuario(fila, historial:list[int]):
+        '''Agrega el historial a la fila de un usuario (las preferencias pueden faltar)'''
+        dni, nombre, email, pref_raza, pref_edad, pref_tamanio, reserva = fila
+        return (dni, nombre, email, pref_raza or "", pref_edad or "", pref_tamanio or "", reserva, historial)
+
+    def proximo_id_perro(self):
+        with self._candado:
+            return self.conexion.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM perros").fetchone()[0]
+
+    def cerrar(self):
+        self.conexion.close()
@@ -0,0 +1,446 @@
+if __name__ == "__main__":
+    import sys
+    import os
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import os
+import mmap
+import shutil
+import heapq
+import struct
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections.abc import MutableMapping
+from modules.diario import AlmacenamientoDiario
+
+# Instantánea binaria: registros de ancho fijo, abiertos con mmap y leídos a pedido (sin cargar el archivo).
+#   cabecera:    MAGIA y, para cada sección, dónde empieza y cuántos elementos tiene
+#   razas:       un registro por raza, ordenados por nombre
+#   perros:      un registro por perro, en el mismo orden que ids
+#   usuarios:    un registro por usuario, ordenados por DNI
+#   ids:         IDs de los perros ordenados (enteros de 8 bytes: se buscan con bisect sobre la vista, sin copiarlos)
+#   historiales: IDs de los historiales de adopción de todos los usuarios, uno detrás del otro
+#   textos:      los textos en UTF-8, uno detrás del otro. Los registros guardan (inicio, largo) de cada uno;
+#                los que se repiten mucho (raza, sexo, estado, tamaño, ...) se guardan una sola vez
+# Todos los números en little-endian. Un texto con largo NULO es None (ej: perro sin adoptante).
+MAGIA = b"PERROS01"
+SECCIONES = ("razas", "perros", "usuarios", "ids", "historiales", "textos")
+CABECERA = struct.Struct("<8s" + "QQ" * len(SECCIONES))
+NULO = 0xFFFFFFFF
+TEXTO = "QI" # inicio y largo
+RAZA = struct.Struct("<" + TEXTO * 3)                              # nombre, tamanio, temperamento
+PERRO = struct.Struct("<" + TEXTO + "qd" + TEXTO * 2 + "BB" + TEXTO * 2) # nombre, edad, peso, sexo, raza, vacunado,
+                                                                   # discapacitado, estado, adoptante
+USUARIO = struct.Struct("<" + TEXTO * 6 + "BqQI")                  # dni, nombre, email, pref_raza, pref_edad,
+                                                                   # pref_tamanio, hay reserva, reserva, historial
+                                                                   # (inicio y cantidad en historiales)
+
+
+class _Textos:
+    '''Escribe la tabla de textos en un archivo aparte (se copia al final de la instantánea)'''
+    def __init__(self, archivo):
+        self.archivo = archivo
+        self.largo = 0
+        self.repetidos:dict[str, tuple[int, int]] = {}
+
+    def agregar(self, texto:str|None, repetido:bool=False):
+        '''Retorna (inicio, largo) del texto. Con repetido=True, si ya se escribió, reutiliza el anterior'''
+        if texto is None:
+            return 0, NULO
+        if repetido and texto in self.repetidos:
+            return self.repetidos[texto]
+        datos = texto.encode()
+        lugar = self.largo, len(datos)
+        self.archivo.write(datos)
+        self.largo += len(datos)
+        if repetido:
+            self.repetidos[texto] = lugar
+        return lugar
+
+
+def escribir_binario(ruta:str, razas, usuarios, perros):
+    '''Escribe una instantánea binaria con las filas (ver modules.almacenamiento) de razas, usuarios y perros,
+    cada una ordenada por su clave (nombre, DNI e ID). Escribe de a un registro: no arma el archivo en memoria'''
+    cantidades = dict.fromkeys(SECCIONES, 0)
+    ids, historiales = array("q"), array("q")
+    ruta_textos = ruta + ".textos"
+    with open(ruta, "wb") as archivo, open(ruta_textos, "w+b") as archivo_textos:
+        textos = _Textos(archivo_textos)
+        archivo.write(bytes(CABECERA.size))
+        inicios = {"razas": archivo.tell()}
+        anterior = None
+        for nombre, tamanio, temperamento in razas:
+            _verificar_orden("razas", anterior, nombre)
+            anterior = nombre
+            archivo.write(RAZA.pack(*textos.agregar(nombre), *textos.agregar(tamanio, True), *textos.agregar(temperamento, True)))
+            cantidades["razas"] += 1
+        inicios["perros"] = archivo.tell()
+        for id_perro, nombre, edad, peso, sexo, raza, vacunado, discapacitado, estado, adoptante in perros:
+            _verificar_orden("perros", ids[-1] if ids else None, id_perro)
+            ids.append(id_perro)
+            archivo.write(PERRO.pack(*textos.agregar(nombre), edad, peso, *textos.agregar(sexo, True), *textos.agregar(raza, True),
+                                     bool(vacunado), bool(discapacitado), *textos.agregar(estado, True), *textos.agregar(adoptante)))
+        cantidades["perros"] = cantidades["ids"] = len(ids)
+        inicios["usuarios"] = archivo.tell()
+        anterior = None
+        for dni, nombre, email, pref_raza, pref_edad, pref_tamanio, reserva, historial in usuarios:
+            _verificar_orden("usuarios", anterior, dni)
+            anterior = dni
+            inicio = len(historiales)
+            historiales.extend(historial)
+            archivo.write(USUARIO.pack(*textos.agregar(dni), *textos.agregar(nombre), *textos.agregar(email),
+                                       *textos.agregar(pref_raza, True), *textos.agregar(pref_edad or "", True),
+                                       *textos.agregar(pref_tamanio, True), reserva is not None, reserva or 0,
+                                       inicio, len(historiales) - inicio))
+            cantidades["usuarios"] += 1
+        for seccion, numeros in (("ids", ids), ("historiales", historiales)):
+            archivo.write(bytes(-archivo.tell() % 8)) # alineados a 8 bytes
+            inicios[seccion] = archivo.tell()
+            numeros.tofile(archivo)
+        cantidades["historiales"] = len(historiales)
+        inicios["textos"] = archivo.tell()
+        cantidades["textos"] = textos.largo
+        archivo_textos.seek(0)
+        shutil.copyfileobj(archivo_textos, archivo, 1 << 20)
+        archivo.seek(0)
+        archivo.write(CABECERA.pack(MAGIA, *(valor for seccion in SECCIONES for valor in (inicios[seccion], cantidades[seccion]))))
+        archivo.flush()
+        os.fsync(archivo.fileno())
+    os.remove(ruta_textos)
+
+def _verificar_orden(tabla:str, anterior, clave):
+    if anterior is not None and not anterior < clave:
+        raise ValueError(f"Las filas de {tabla} deben estar ordenadas por clave y sin repetir ({anterior!r}, {clave!r})")
+
+
+class InstantaneaBinaria:
+    '''Lee una instantánea binaria abierta con mmap: no carga nada al abrir. Cada fila se decodifica recién cuando
+    se la busca (búsqueda binaria sobre el archivo mapeado, sin copiarlo)'''
+    def __init__(self, ruta:str):
+        # Lectores en curso: al reemplazarla por una nueva se cierra recién cuando termina el último (ver retirar)
+        self._candado = threading.Lock()
+        self._lectores = 0
+        self._retirada = False
+        self.cerrada = False
+        with open(ruta, "rb") as archivo:
+            self._mapa = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ) # el mapa sigue después de cerrar
+        self._vista = memoryview(self._mapa)
+        magia, *valores = CABECERA.unpack_from(self._vista)
+        if magia != MAGIA:
+            raise ValueError(f"'{ruta}' no es una instantánea binaria")
+        secciones = dict(zip(SECCIONES, zip(valores[::2], valores[1::2])))
+        inicio, cantidad = secciones["ids"]
+        self.ids = self._vista[inicio:inicio + 8 * cantidad].cast("q")
+        inicio, cantidad = secciones["historiales"]
+        self._historiales = self._vista[inicio:inicio + 8 * cantidad].cast("q")
+        self._textos = secciones["textos"][0]
+        self.razas = TablaBinaria(self, *secciones["razas"], RAZA, self._fila_raza)
+        self.perros = TablaBinaria(self, *secciones["perros"], PERRO, self._fila_perro, self.ids)
+        self.usuarios = TablaBinaria(self, *secciones["usuarios"], USUARIO, self._fila_usuario)
+
+    def texto(self, inicio:int, largo:int):
+        if largo == NULO:
+            return None
+        inicio += self._textos
+        return str(self._vista[inicio:inicio + largo], "utf-8")
+
+    def _fila_raza(self, valores:tuple, numero:int):
+        texto = self.texto
+        return tuple(texto(*valores[i:i + 2]) for i in (0, 2, 4))
+
+    def _fila_perro(self, valores:tuple, numero:int):
+        texto = self.texto
+        return (self.ids[numero], texto(*valores[0:2]), valores[2], valores[3], texto(*valores[4:6]), texto(*valores[6:8]),
+                bool(valores[8]), bool(valores[9]), texto(*valores[10:12]), texto(*valores[12:14]))
+
+    def _fila_usuario(self, valores:tuple, numero:int):
+        texto = self.texto
+        inicio, cantidad = valores[14:16]
+        return (*(texto(*valores[i:i + 2]) for i in range(0, 12, 2)), valores[13] if valores[12] else None,
+                self._historiales[inicio:inicio + cantidad].tolist())
+
+    def tomar(self):
+        '''Empieza una lectura: hasta soltar() no se cierra. False si ya está cerrada (se reemplazó por otra)'''
+        with self._candado:
+            if self.cerrada:
+                return False
+            self._lectores += 1
+            return True
+
+    def soltar(self):
+        with self._candado:
+            self._lectores -= 1
+            if self._retirada and self._lectores == 0:
+                self._cerrar()
+
+    def retirar(self, solo_si_libre:bool=False):
+        '''Ya no se usa para lecturas nuevas: se cierra ahora o, si alguien la está leyendo, cuando termine.
+        Con solo_si_libre=True, solo si nadie la está leyendo. Retorna si se retiró'''
+        with self._candado:
+            if solo_si_libre and self._lectores:
+                return False
+            self._retirada = True
+            if self._lectores == 0:
+                self._cerrar()
+            return True
+
+    def cerrar(self):
+        '''Suelta el archivo (no se puede mientras alguien use una vista)'''
+        with self._candado:
+            self._cerrar()
+
+    def _cerrar(self):
+        if not self.cerrada:
+            self.cerrada = True
+            for vista in (self.ids, self._historiales, self._vista):
+                vista.release()
+            self._mapa.close()
+
+
+class TablaBinaria:
+    '''Una tabla de la instantánea: filas de ancho fijo ordenadas por clave (la primera columna)'''
+    def __init__(self, instantanea:InstantaneaBinaria, inicio:int, cantidad:int, registro:struct.Struct, fila, claves=None):
+        self.instantanea = instantanea
+        self._inicio = inicio
+        self._cantidad = cantidad
+        self._registro = registro
+        self._fila = fila
+        # Claves ordenadas: los IDs de los perros están en su propia sección; las demás son el primer texto del registro
+        self._claves = claves if claves is not None else _Claves(self)
+
+    def __len__(self):
+        return self._cantidad
+
+    def _valores(self, numero:int):
+        return self._registro.unpack_from(self.instantanea._vista, self._inicio + numero * self._registro.size)
+
+    def _numero(self, clave):
+        '''Posición de la clave en la tabla, o None'''
+        numero = bisect_left(self._claves, clave)
+        if numero < self._cantidad and self._claves[numero] == clave:
+            return numero
+        return None
+
+    def __contains__(self, clave):
+        return self._numero(clave) is not None
+
+    def buscar(self, clave):
+        '''Fila de la clave (ver modules.almacenamiento), o None'''
+        numero = self._numero(clave)
+        return None if numero is None else self._fila(self._valores(numero), numero)
+
+    def claves(self, al_reves:bool=False):
+        '''Todas las claves, ordenadas (con al_reves=True, de la más grande a la más chica)'''
+        return reversed(self._claves) if al_reves else iter(self._claves)
+
+    def filas(self):
+        '''Todas las filas, ordenadas por clave'''
+        for numero in range(self._cantidad):
+            yield self._fila(self._valores(numero), numero)
+
+
+class _Claves:
+    '''Secuencia de solo lectura con la clave (primer texto) de cada registro, para bisect'''
+    def __init__(self, tabla:TablaBinaria):
+        self._tabla = tabla
+
+    def __len__(self):
+        return len(self._tabla)
+
+    def __getitem__(self, numero:int):
+        if not 0 <= numero < len(self._tabla):
+            raise IndexError(numero)
+        return self._tabla.instantanea.texto(*self._tabla._valores(numero)[:2])
+
+
+class Capas(MutableMapping):
+    '''Filas de una tabla (clave -> fila): las de la instantánea binaria, de solo lectura, con los cambios
+    posteriores encima (filas nuevas o modificadas y claves eliminadas). Sin instantánea, un diccionario común'''
+    def __init__(self, base:TablaBinaria|None=None):
+        self.base = base
+        self.cambios:dict = {}      # clave -> fila nueva o modificada
+        self.eliminadas:set = set() # claves de la base que ya no están
+        self._nuevas = 0            # claves de cambios que no están en la base
+
+    def _en_base(self, clave):
+        return self.base is not None and clave in self.base
+
+    def __getitem__(self, clave):
+        fila = self.cambios.get(clave)
+        if fila is None:
+            if clave in self.eliminadas or self.base is None or (fila := self.base.buscar(clave)) is None:
+                raise KeyError(clave)
+        return fila
+
+    def __contains__(self, clave):
+        return clave in self.cambios or (clave not in self.eliminadas and self._en_base(clave))
+
+    def __setitem__(self, clave, fila):
+        if clave not in self.cambios:
+            if clave in self.eliminadas:
+                self.eliminadas.remove(clave)
+            elif not self._en_base(clave):
+                self._nuevas += 1
+        self.cambios[clave] = fila
+
+    def __delitem__(self, clave):
+        if clave in self.cambios:
+            del self.cambios[clave]
+            if self._en_base(clave):
+                self.eliminadas.add(clave)
+            else:
+                self._nuevas -= 1
+        elif clave not in self.eliminadas and self._en_base(clave):
+            self.eliminadas.add(clave)
+        else:
+            raise KeyError(clave)
+
+    def pop(self, clave, *defecto):
+        # (sin armar la fila de la base, que no se usa al eliminar)
+        if clave not in self:
+            if defecto:
+                return defecto[0]
+            raise KeyError(clave)
+        fila = self.cambios.get(clave)
+        del self[clave]
+        return fila
+
+    def __iter__(self):
+        if self.base is not None:
+            for clave in self.base.claves():
+                if clave not in self.cambios and clave not in self.eliminadas:
+                    yield clave
+        yield from list(self.cambios)
+
+    def __len__(self):
+        return (len(self.base) if self.base is not None else 0) - len(self.eliminadas) + self._nuevas
+
+    def ordenadas(self):
+        '''Filas ordenadas por clave: recorre la base en orden (sin buscar cada clave) intercalando los cambios.
+        Copia los cambios al empezar: otro hilo puede guardar mientras se recorre'''
+        cambios, eliminadas = dict(self.cambios), set(self.eliminadas)
+        base = () if self.base is None else ((fila[0], fila) for fila in self.base.filas()
+                                             if fila[0] not in cambios and fila[0] not in eliminadas)
+        for _, fila in heapq.merge(base, sorted(cambios.items()), key=lambda par: par[0]):
+            yield fila
+
+    def maxima(self):
+        '''La clave más grande (las claves de la base ya están ordenadas), o None si no hay ninguna'''
+        maxima = max(self.cambios, default=None)
+        if self.base is not None:
+            for clave in self.base.claves(al_reves=True):
+                if clave not in self.eliminadas:
+                    return clave if maxima is None or clave > maxima else maxima
+        return maxima
+
+
+class AlmacenamientoBinario(AlmacenamientoDiario):
+    '''AlmacenamientoDiario con la instantánea en formato binario (instantanea.bin, ver arriba).
+    Abrir no lee la instantánea: la mapea con mmap y solo reproduce la cola del diario, así que arranca en milisegundos
+    aunque los datos ocupen varios GB. Las filas se leen del archivo recién cuando el sistema las busca.
+    Una carpeta con instantanea.jsonl (de AlmacenamientoDiario) se convierte al abrirla'''
+    ARCHIVO_INSTANTANEA = "instantanea.bin"
+
+    def __init__(self, carpeta:str, cada:int=100_000, sincronizar:bool=False):
+        self._base:InstantaneaBinaria|None = None
+        super().__init__(carpeta, cada, sincronizar)
+        jsonl = os.path.join(carpeta, AlmacenamientoDiario.ARCHIVO_INSTANTANEA)
+        if self._base is None and os.path.exists(jsonl): # convierte la carpeta: la instantánea JSONL ya no se usa
+            self.escribir_instantanea()
+            os.remove(jsonl)
+
+    def _leer_instantanea(self):
+        if os.path.exists(self.ruta_instantanea):
+            self._abrir_base()
+            return
+        # Sin instantánea binaria: si hay una en JSONL, la carga (se convierte al terminar de abrir)
+        self._razas, self._perros, self._usuarios = Capas(), Capas(), Capas()
+        super()._leer_instantanea(os.path.join(os.path.dirname(self.ruta_diario), AlmacenamientoDiario.ARCHIVO_INSTANTANEA))
+
+    def _abrir_base(self, anteriores:tuple[Capas, Capas, Capas]=()):
+        '''Mapea la instantánea. Con anteriores (las Capas de razas, perros y usuarios sobre el mismo archivo), conserva sus cambios'''
+        self._base = InstantaneaBinaria(self.ruta_instantanea)
+        capas = Capas(self._base.razas), Capas(self._base.perros), Capas(self._base.usuarios)
+        for nueva, anterior in zip(capas, anteriores):
+            nueva.cambios, nueva.eliminadas, nueva._nuevas = anterior.cambios, anterior.eliminadas, anterior._nuevas
+        self._razas, self._perros, self._usuarios = capas
+
+    def escribir_instantanea(self):
+        '''Escribe todo el estado en una instantánea binaria nueva y vacía el diario'''
+        temporal = self.ruta_instantanea + ".tmp"
+        escribir_binario(temporal, self._razas.ordenadas(), self._usuarios.ordenadas(), self._perros.ordenadas())
+        anterior = self._base
+        # La anterior se cierra ya si nadie la está leyendo, si no cuando termine el último lector (ver _leer).
+        # Windows no reemplaza un archivo mapeado: si todavía la leen, se vuelve a intentar en la próxima transacción
+        if anterior is not None and not anterior.retirar(solo_si_libre=os.name == "nt"):
+            os.remove(temporal)
+            return
+        try:
+            os.replace(temporal, self.ruta_instantanea) # reemplazo atómico
+        except BaseException:
+            if anterior is not None:
+                self._abrir_base((self._razas, self._perros, self._usuarios)) # vuelve a mapear la anterior, con sus cambios
+            raise
+        self._abrir_base()
+        self._archivo.close()
+        self._archivo = open(self.ruta_diario, "w", encoding="utf-8")
+        self.registros_diario = 0
+
+    # Lectura: con la instantánea tomada, para que no se cierre en el medio si otro hilo escribe una nueva
+    def _tomar(self, tabla:str):
+        '''Retorna (capas de la tabla, su instantánea ya tomada, o None). Si justo se cerró, toma la nueva'''
+        while True:
+            capas = self._tabla(tabla)
+            base = None if capas.base is None else capas.base.instantanea
+            if base is None or base.tomar():
+                return capas, base
+            time.sleep(0) # (otro hilo está terminando de abrir la nueva)
+
+    def _leer(self, tabla:str, leer):
+        '''Retorna leer(capas de la tabla) con su instantánea tomada'''
+        capas, base = self._tomar(tabla)
+        try:
+            return leer(capas)
+        finally:
+            if base is not None:
+                base.soltar()
+
+    def existentes(self, tabla:str, claves:list):
+        return self._leer(tabla, lambda capas: {clave for clave in set(claves) if clave in capas})
+
+    def cargar_raza(self, nombre:str):
+        return self._leer("razas", lambda capas: capas.get(nombre))
+
+    def cargar_perro(self, id_perro:int):
+        return self._leer("perros", lambda capas: capas.get(id_perro))
+
+    def cargar_usuario(self, dni:str):
+        return self._leer("usuarios", lambda capas: capas.get(dni))
+
+    # Recorridos de a una fila (sin armar la lista de toda la tabla, como el diario)
+    def cargar_razas(self):
+        return self._recorrer("razas")
+
+    def cargar_perros(self):
+        return self._recorrer("perros")
+
+    def cargar_usuarios(self):
+        return self._recorrer("usuarios")
+
+    def _recorrer(self, tabla:str):
+        '''Filas ordenadas de la tabla. La instantánea queda tomada hasta terminar (o abandonar) el recorrido'''
+        capas, base = self._tomar(tabla)
+        try:
+            yield from capas.ordenadas()
+        finally:
+            if base is not None:
+                base.soltar()
+
+    def proximo_id_perro(self):
+        return self._leer("perros", lambda capas: (capas.maxima() or 0) + 1)
+
+    def cerrar(self, instantanea:bool=True):
+        super().cerrar(instantanea)
+        if self._base is not None:
+            self._base.cerrar()
@@ -0,0 +1,291 @@
+if __name__ == "__main__":
+    import sys
+    import os
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import re
+import heapq
+import unicodedata
+from bisect import bisect_left
+
+_PALABRA = re.compile(r"[a-z0-9]+")
+
+def normalizar(texto:str):
+    '''Minúsculas y sin tildes ("Gran Danés" -> "gran danes")'''
+    texto = texto.lower()
+    if texto.isascii():
+        return texto
+    return unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode("ascii")
+
+def palabras(texto:str):
+    '''Palabras normalizadas de un texto, en orden y sin repetir (un email se separa en partes: "ana@mail.com" -> ana, mail, com)'''
+    return list(dict.fromkeys(_PALABRA.findall(normalizar(texto))))
+
+def errores_admitidos(palabra:str, errores:int=2):
+    '''Errores (distancia de edición) que se aceptan para una palabra: ninguno hasta 2 letras o si tiene números,
+    uno hasta 5 letras y `errores` (como mucho 2) desde 6. En palabras cortas, dos errores encuentran cualquier cosa'''
+    if len(palabra) <= 2 or not palabra.isalpha():
+        return 0
+    return max(0, min(errores, 1 if len(palabra) <= 5 else 2))
+
+def distancia(a:str, b:str, maximo:int):
+    '''Distancia de edición (Levenshtein) entre a y b, o maximo + 1 si es mayor a maximo (corta apenas se pasa)'''
+    if abs(len(a) - len(b)) > maximo:
+        return maximo + 1
+    # El principio y el final en común no cambian la distancia: se compara solo el medio
+    inicio = 0
+    while inicio < len(a) and inicio < len(b) and a[inicio] == b[inicio]:
+        inicio += 1
+    fin = 0
+    while fin < len(a) - inicio and fin < len(b) - inicio and a[-1 - fin] == b[-1 - fin]:
+        fin += 1
+    a, b = a[inicio:len(a) - fin], b[inicio:len(b) - fin]
+    if not a or not b:
+        return len(a) + len(b) if len(a) + len(b) <= maximo else maximo + 1
+    # Algoritmo de vectores de bits de Myers: una columna de la tabla de distancias por cada letra de b,
+    # con las diferencias entre filas guardadas como bits de un entero (mucho más rápido que la tabla en Python)
+    posiciones = {}
+    for i, letra in enumerate(a):
+        posiciones[letra] = posiciones.get(letra, 0) | 1 << i
+    todos = (1 << len(a)) - 1
+    ultimo = 1 << (len(a) - 1)
+    positivos, negativos, resultado = todos, 0, len(a)
+    for letra in b:
+        iguales = posiciones.get(letra, 0)
+        vertical = iguales | negativos
+        horizontal = (((iguales & positivos) + positivos) ^ positivos) | iguales
+        suben = negativos | ~(horizontal | positivos) & todos
+        bajan = positivos & horizontal
+        if suben & ultimo:
+            resultado += 1
+        elif bajan & ultimo:
+            resultado -= 1
+        suben = (suben << 1) | 1
+        bajan <<= 1
+        positivos = (bajan | ~(vertical | suben)) & todos
+        negativos = suben & vertical
+    return resultado if resultado <= maximo else maximo + 1
+
+def variantes(palabra:str, borrar:int):
+    '''La palabra y todo lo que queda al borrarle hasta `borrar` letras. Dos palabras están a distancia de edición
+    <= n solo si comparten alguna variante con n borradas (así se encuentran sin comparar contra todo el vocabulario)'''
+    resultado = {palabra}
+    ultimas = {palabra}
+    for _ in range(borrar):
+        ultimas = {variante[:i] + variante[i + 1:] for variante in ultimas for i in range(len(variante))}
+        resultado |= ultimas
+    return resultado
+
+# Índices de una clave a uno o varios valores: un solo valor se guarda suelto (la mayoría de las palabras
+# es de un solo registro) y recién con el segundo se arma el conjunto
+def _agregar_a(indice:dict, clave, valor):
+    '''Retorna True si la clave es nueva en el índice'''
+    actual = indice.get(clave)
+    if actual is None:
+        indice[clave] = valor
+        return True
+    if isinstance(actual, set):
+        actual.add(valor)
+    elif actual != valor:
+        indice[clave] = {actual, valor}
+    return False
+
+def _quitar_de(indice:dict, clave, valor):
+    '''Retorna True si la clave quedó sin valores (y se quitó del índice)'''
+    actual = indice.get(clave)
+    if isinstance(actual, set):
+        actual.discard(valor)
+        if len(actual) == 1:
+            indice[clave] = next(iter(actual))
+    elif actual is not None and actual == valor:
+        del indice[clave]
+        return True
+    return False
+
+def _valores(indice:dict, clave):
+    actual = indice.get(clave)
+    if actual is None:
+        return ()
+    return actual if isinstance(actual, set) else (actual,)
+
+
+class IndiceTexto:
+    '''Índice de palabras para buscar registros por nombre (o cualquier texto): por prefijo (autocompletar)
+    y con errores de tipeo (distancia de edición acotada).
+
+    - palabra -> clave del registro (o claves, si la tienen varios)
+    - vocabulario ordenado, para los prefijos (búsqueda binaria). Las palabras nuevas esperan en un conjunto chico
+      y se ordenan junto con el resto recién cuando se juntan muchas
+    - variante -> palabras (cada palabra con hasta 1 o 2 letras borradas, ver variantes), para los errores de tipeo
+
+    No guarda los textos: texto_de(clave) retorna el texto actual de un registro (para verificar las otras palabras
+    de la consulta), y quien cambia un texto avisa con cambiar(clave, anterior, nuevo)'''
+    LIMITE_NUEVAS = 2048 # palabras nuevas que se revisan una por una antes de volver a ordenar el vocabulario
+    TOPE_ESTIMACION = 20_000 # registros que se cuentan como mucho al estimar qué palabra de la consulta es más rara
+
+    def __init__(self, texto_de):
+        self._texto_de = texto_de
+        self._claves:dict[str, object] = {}
+        self._ordenadas:list[str] = [] # puede tener palabras que ya no están (se limpian al volver a ordenar)
+        self._nuevas:set[str] = set()
+        self._variantes:dict[str, object] = {}
+
+    def __len__(self):
+        '''Cantidad de palabras distintas'''
+        return len(self._claves)
+
+    # Agregar, quitar y cambiar
+    def agregar(self, clave, texto:str):
+        for palabra in palabras(texto):
+            self._agregar_palabra(palabra, clave)
+
+    def quitar(self, clave, texto:str):
+        for palabra in palabras(texto):
+            self._quitar_palabra(palabra, clave)
+
+    def cambiar(self, clave, anterior:str, nuevo:str):
+        '''Actualiza un registro cuyo texto cambió (solo toca las palabras que entran o salen)'''
+        anteriores, nuevas = set(palabras(anterior)), set(palabras(nuevo))
+        for palabra in anteriores - nuevas:
+            self._quitar_palabra(palabra, clave)
+        for palabra in nuevas - anteriores:
+            self._agregar_palabra(palabra, clave)
+
+    def _agregar_palabra(self, palabra:str, clave):
+        if _agregar_a(self._claves, palabra, clave): # palabra nueva en el vocabulario
+            self._nuevas.add(palabra)
+            for variante in variantes(palabra, errores_admitidos(palabra)):
+                _agregar_a(self._variantes, variante, palabra)
+
+    def _quitar_palabra(self, palabra:str, clave):
+        if _quitar_de(self._claves, palabra, clave): # ningún registro la usa
+            self._nuevas.discard(palabra)
+            for variante in variantes(palabra, errores_admitidos(palabra)):
+                _quitar_de(self._variantes, variante, palabra)
+
+    # Prefijos
+    def _con_prefijo(self, prefijo:str):
+        '''Generador de las palabras que empiezan con el prefijo, en orden alfabético'''
+        if len(self._nuevas) > self.LIMITE_NUEVAS:
+            vigentes = [palabra for palabra in self._ordenadas if palabra in self._claves and palabra not in self._nuevas]
+            self._ordenadas = sorted(vigentes + sorted(self._nuevas)) # (dos tramos ordenados: se mezclan en tiempo lineal)
+            self._nuevas = set()
+        ordenadas = self._ordenadas
+        def ordenado():
+            for i in range(bisect_left(ordenadas, prefijo), len(ordenadas)):
+                if not ordenadas[i].startswith(prefijo):
+                    return
+                if ordenadas[i] in self._claves:
+                    yield ordenadas[i]
+        nuevas = sorted(palabra for palabra in self._nuevas if palabra.startswith(prefijo))
+        return heapq.merge(ordenado(), nuevas)
+
+    def completar(self, texto:str, limite:int=10):
+        '''Claves de los registros que tienen, para cada palabra del texto, una palabra que empieza con ella
+        (ej: "gran d" encuentra "Gran Danés"). Como mucho `limite`, en orden alfabético de la palabra más rara'''
+        consulta = palabras(texto)
+        if not consulta:
+            return []
+        if len(consulta) == 1:
+            return self._elegir(self._con_prefijo(consulta[0]), limite)
+        return self._combinar({prefijo: list(self._con_prefijo(prefijo)) for prefijo in consulta},
+                              lambda prefijo, propia: propia.startswith(prefijo), limite)
+
+    def _estimar(self, encontradas:list[str]):
+        '''Cantidad de registros de las palabras encontradas (deja de contar al pasar TOPE_ESTIMACION)'''
+        total = 0
+        for palabra in encontradas:
+            total += len(_valores(self._claves, palabra))
+            if total > self.TOPE_ESTIMACION:
+                break
+        return total
+
+    def _combinar(self, encontradas:dict[str, list[str]], coincide, limite:int):
+        '''Claves de los registros que tienen alguna de las palabras encontradas para cada palabra de la consulta.
+        Recorre las de la palabra con menos registros; las demás se cruzan como conjuntos de claves, salvo las mucho
+        más comunes (armar el conjunto costaría más), que se verifican en el texto de cada registro con coincide(consulta, propia)'''
+        estimados = {palabra: self._estimar(suyas) for palabra, suyas in encontradas.items()}
+        guia = min(encontradas, key=estimados.get)
+        # Armar un conjunto cuesta mucho menos por clave que leer el texto de un registro: conviene mientras
+        # no tenga muchas más claves que los registros de la guía
+        tope = min(self.TOPE_ESTIMACION, 20 * estimados[guia])
+        dentro, comunes = None, []
+        for palabra, suyas in encontradas.items():
+            if palabra == guia:
+                continue
+            if estimados[palabra] > tope:
+                comunes.append(palabra)
+                continue
+            sueltas = [self._claves[suya] for suya in suyas if not isinstance(self._claves[suya], set)]
+            claves = set(sueltas).union(*(self._claves[suya] for suya in suyas if isinstance(self._claves[suya], set)))
+            dentro = claves if dentro is None else dentro & claves
+        cumple = None
+        if comunes:
+            def cumple(clave):
+                propias = palabras(self._texto_de(clave))
+                return all(any(coincide(palabra, propia) for propia in propias) for palabra in comunes)
+        return self._elegir(encontradas[guia], limite, dentro, cumple)
+
+    def _elegir(self, encontradas, limite:int, dentro:set|None=None, cumple=None):
+        '''Primeras `limite` claves (sin repetir) de las palabras encontradas, solo las que están `dentro`
+        (si no es None) y cumplen con el resto de la consulta'''
+        elegidas = {}
+        for palabra in encontradas:
+            claves = _valores(self._claves, palabra)
+            if dentro is not None:
+                claves = dentro.intersection(claves)
+            for clave in claves:
+                if clave not in elegidas and (cumple is None or cumple(clave)):
+                    elegidas[clave] = None
+                    if len(elegidas) >= limite:
+                        return list(elegidas)
+        return list(elegidas)
+
+    # Con errores de tipeo
+    def parecidas(self, palabra:str, errores:int=2):
+        '''[(palabra del índice, distancia)] a no más de los errores admitidos, de la más cercana a la más lejana'''
+        return list(self._parecidas(palabra, errores))
+
+    def _parecidas(self, palabra:str, errores:int):
+        '''Generador de parecidas, de a un nivel de distancia por vez: si las exactas alcanzan, no busca las demás'''
+        if palabra in self._claves:
+            yield palabra, 0
+        maximo = errores_admitidos(palabra, errores)
+        vistas = {palabra}
+        lejanas = {} # candidatas ya medidas que están más lejos que el nivel actual: distancia -> palabras
+        for nivel in range(1, maximo + 1):
+            # Las variantes con `nivel` borradas encuentran todas las palabras a esa distancia (y algunas más lejanas)
+            candidatas = set()
+            for variante in variantes(palabra, nivel):
+                candidatas.update(_valores(self._variantes, variante))
+            candidatas -= vistas
+            vistas |= candidatas
+            for candidata in candidatas:
+                lejanas.setdefault(distancia(palabra, candidata, maximo), []).append(candidata)
+            for candidata in sorted(lejanas.pop(nivel, ())):
+                yield candidata, nivel
+
+    def buscar(self, texto:str, errores:int=2, limite:int=10):
+        '''Claves de los registros que tienen, para cada palabra del texto, una palabra igual o con pocos errores
+        (ver errores_admitidos). Como mucho `limite`, primero las coincidencias más cercanas'''
+        consulta = palabras(texto)
+        if not consulta:
+            return []
+        if len(consulta) == 1:
+            return self._elegir((parecida for parecida, _ in self._parecidas(consulta[0], errores)), limite)
+        maximos = {palabra: errores_admitidos(palabra, errores) for palabra in consulta}
+        return self._combinar({palabra: [parecida for parecida, _ in self._parecidas(palabra, errores)] for palabra in consulta},
+                              lambda palabra, propia: distancia(palabra, propia, maximos[palabra]) <= maximos[palabra], limite)
+
+
+if __name__ == "__main__":
+    nombres = {1: "Gran Danés", 2: "Granito", 3: "Dalmata", 4: "Golden Retriever", 5: "Pastor Alemán"}
+    indice = IndiceTexto(nombres.get)
+    for clave, nombre in nombres.items():
+        indice.agregar(clave, nombre)
+    print("gra:", [nombres[clave] for clave in indice.completar("gra")])
+    print("gran d:", [nombres[clave] for clave in indice.completar("gran d")])
+    print("dalamta:", [nombres[clave] for clave in indice.buscar("dalamta")])
+    print("pastor aleman:", [nombres[clave] for clave in indice.buscar("pastr aleman")])
+    indice.cambiar(3, nombres[3], "Dálmata")
+    nombres[3] = "Dálmata"
+    print("dalmata:", [nombres[clave] for clave in indice.buscar("dalmata")])
@@ -0,0 +1,88 @@
+import threading
+import time
+from collections import OrderedDict
+
+class CacheResultados:
+    '''Resultados de consultas ya calculados, hasta `capacidad`: al llenarse descarta el usado hace más tiempo (LRU).
+    Cada resultado se guarda con sus dependencias (ej: ("estado", "disponible")) e invalidar una dependencia descarta
+    solo los resultados que dependen de ella. Con ttl (segundos), además vencen ese tiempo después de calculados.
+    Contadores: aciertos, fallos, desalojos (por capacidad), vencidos (por ttl) e invalidados'''
+    def __init__(self, capacidad:int=1024, ttl:float|None=None):
+        if not isinstance(capacidad, int) or isinstance(capacidad, bool) or capacidad < 1:
+            raise ValueError("La capacidad del cache debe ser un entero mayor a 0")
+        if ttl is not None and (isinstance(ttl, bool) or not isinstance(ttl, (int, float)) or ttl <= 0):
+            raise ValueError("El ttl del cache debe ser un número de segundos mayor a 0 (o None)")
+        self.capacidad = capacidad
+        self.ttl = ttl
+        self._resultados:OrderedDict[tuple, tuple] = OrderedDict() # clave -> (resultado, dependencias, vence); el último, el más reciente
+        self._por_dependencia:dict[tuple, set[tuple]] = {} # dependencia -> claves de los resultados que dependen de ella
+        # Invalidaciones de cada dependencia: un resultado calculado mientras se invalidaba una de las suyas no se guarda
+        self._versiones:dict[tuple, int] = {}
+        self._candado = threading.Lock() # nunca se tiene mientras se calcula un resultado
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+        self.vencidos = 0
+        self.invalidados = 0
+
+    def obtener(self, clave:tuple, calcular, dependencias:tuple):
+        '''Retorna el resultado guardado para la clave o, si no hay (o venció), lo calcula con calcular() y lo guarda'''
+        with self._candado:
+            guardado = self._resultados.get(clave)
+            if guardado is not None:
+                if guardado[2] is None or time.monotonic() < guardado[2]:
+                    self._resultados.move_to_end(clave)
+                    self.aciertos += 1
+                    return guardado[0]
+                self._descartar(clave)
+                self.vencidos += 1
+            self.fallos += 1
+            versiones = [self._versiones.get(dependencia, 0) for dependencia in dependencias]
+        resultado = calcular()
+        with self._candado:
+            if versiones == [self._versiones.get(dependencia, 0) for dependencia in dependencias]:
+                if clave in self._resultados: # (otro hilo lo calculó mientras tanto)
+                    self._descartar(clave)
+                self._resultados[clave] = (resultado, dependencias, None if self.ttl is None else time.monotonic() + self.ttl)
+                for dependencia in dependencias:
+                    self._por_dependencia.setdefault(dependencia, set()).add(clave)
+                while len(self._resultados) > self.capacidad:
+                    self._descartar(next(iter(self._resultados)))
+                    self.desalojos += 1
+        return resultado
+
+    def invalidar(self, *dependencias:tuple):
+        '''Descarta los resultados que dependen de alguna de estas dependencias'''
+        with self._candado:
+            for dependencia in dependencias:
+                self._versiones[dependencia] = self._versiones.get(dependencia, 0) + 1
+                for clave in self._por_dependencia.pop(dependencia, ()):
+                    if clave in self._resultados:
+                        self._descartar(clave)
+                        self.invalidados += 1
+
+    def _descartar(self, clave:tuple):
+        _, dependencias, _ = self._resultados.pop(clave)
+        for dependencia in dependencias:
+            claves = self._por_dependencia.get(dependencia)
+            if claves is not None:
+                claves.discard(clave)
+                if not claves:
+                    del self._por_dependencia[dependencia]
+
+    def limpiar(self):
+        '''Descarta todos los resultados (los contadores siguen)'''
+        with self._candado:
+            self._resultados.clear()
+            self._por_dependencia.clear()
+
+    def __len__(self):
+        return len(self._resultados)
+
+    def estadisticas(self):
+        '''Contadores y ocupación, ej: {"aciertos": 90, "fallos": 10, "tasa_aciertos": 0.9, ...}'''
+        with self._candado:
+            consultas = self.aciertos + self.fallos
+            return {"aciertos": self.aciertos, "fallos": self.fallos, "desalojos": self.desalojos, "vencidos": self.vencidos,
+                    "invalidados": self.invalidados, "tasa_aciertos": self.aciertos / consultas if consultas else 0.0,
+                    "resultados": len(self._resultados), "capacidad": self.capacidad, "ttl": self.ttl}
@@ -0,0 +1,199 @@
+if __name__ == "__main__":
+    import sys
+    import os
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import re
+from array import array
+from modules.perro import Perro, Raza
+from modules.usuario import Preferencias
+try:
+    import numpy as np # opcional: si está instalado, las máscaras se calculan con numpy
+except ImportError:
+    np = None
+
+# Tabla de traducción por valor: byte == valor -> 1, cualquier otro -> 0
+_TABLAS_IGUAL = [bytes(int(i == valor) for i in range(256)) for valor in range(256)]
+_UNO = re.compile(b"\x01")
+
+class ColumnasPerros:
+    '''Guarda los datos filtrables de los perros en columnas paralelas (una posición por perro).
+    Los filtros se calculan sobre columnas enteras (máscaras) en vez de recorrer objetos Perro.
+    Sin numpy, las columnas de un byte se comparan con bytes.translate y las máscaras se combinan
+    como enteros (AND bit a bit), todo en C. Los objetos Perro no se guardan: el sistema los arma a pedido.'''
+    ESTADOS = Perro.ESTADOS
+    SEXOS = tuple(Perro.SEXOS)
+    RANGOS_EDAD = tuple(Preferencias.EDADES)
+    TAMANIOS = ("",) + tuple(Raza.TAMANIOS)
+    COLUMNAS_BYTE = ("sexo", "vacunado", "discapacitado", "estado", "rango_edad", "tamanio", "raza_bajo", "raza_alto")
+
+    def __init__(self):
+        self.ids = array("q")
+        self.edad = array("q")
+        self.peso = array("d")
+        # Columnas de un byte (códigos)
+        self.sexo = bytearray()
+        self.vacunado = bytearray()
+        self.discapacitado = bytearray()
+        self.estado = bytearray()
+        self.rango_edad = bytearray()
+        self.tamanio = bytearray()
+        self.raza_bajo = bytearray() # índice de raza en dos bytes (hasta 65536 razas)
+        self.raza_alto = bytearray()
+        self.nombres_raza:list[str] = []
+        self._indice_raza:dict[str, int] = {}
+        self._fila:dict[int, int] = {} # ID -> posición
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, id_perro:int):
+        return id_perro in self._fila
+
+    # Codificar valores
+    def _codigo_raza(self, nombre:str):
+        if nombre not in self._indice_raza:
+            if len(self.nombres_raza) >= 1 << 16:
+                raise ValueError("Demasiadas razas para el almacén por columnas")
+            self._indice_raza[nombre] = len(self.nombres_raza)
+            self.nombres_raza.append(nombre)
+        return self._indice_raza[nombre]
+
+    def _codigos(self, edad:int, sexo:str, raza:str, tamanio:str, vacunado:bool, discapacitado:bool, estado:str):
+        raza = self._codigo_raza(raza)
+        return (self.SEXOS.index(sexo), int(vacunado), int(discapacitado), self.ESTADOS.index(estado),
+                self.RANGOS_EDAD.index(Preferencias.rango_edad(edad)), self.TAMANIOS.index(tamanio), raza & 0xFF, raza >> 8)
+
+    # Agregar, actualizar y quitar
+    def agregar(self, id_perro:int, edad:int, peso:float, sexo:str, raza:str, tamanio:str, vacunado:bool, discapacitado:bool, estado:str):
+        if id_perro in self._fila:
+            raise ValueError(f"Ya existe un perro con ID {id_perro}")
+        self._fila[id_perro] = len(self.ids)
+        self.ids.append(id_perro)
+        self.edad.append(edad)
+        self.peso.append(peso)
+        for nombre, codigo in zip(self.COLUMNAS_BYTE, self._codigos(edad, sexo, raza, tamanio, vacunado, discapacitado, estado)):
+            getattr(self, nombre).append(codigo)
+
+    def agregar_perro(self, perro:Perro):
+        self.agregar(perro.id, perro.edad, perro.peso, perro.sexo, perro.raza.nombre, perro.raza.tamanio,
+                     perro.vacunado, perro.discapacitado, perro.estado)
+
+    def agregar_fila(self, fila:tuple, tamanio:str):
+        '''Agrega un perro a partir de su fila de almacenamiento, sin armar el objeto'''
+        id_perro, _, edad, peso, sexo, raza, vacunado, discapacitado, estado, _ = fila
+        self.agregar(id_perro, edad, peso, sexo, raza, tamanio, bool(vacunado), bool(discapacitado), estado)
+
+    def actualizar(self, perro:Perro):
+        '''Reescribe la fila de un perro con sus valores actuales'''
+        fila = self._fila[perro.id]
+        self.edad[fila] = perro.edad
+        self.peso[fila] = perro.peso
+        codigos = self._codigos(perro.edad, perro.sexo, perro.raza.nombre, perro.raza.tamanio,
+                                perro.vacunado, perro.discapacitado, perro.estado)
+        for nombre, codigo in zip(self.COLUMNAS_BYTE, codigos):
+            getattr(self, nombre)[fila] = codigo
+
+    def quitar(self, id_perro:int):
+        '''Quita un perro moviendo la última fila a su lugar (O(1))'''
+        fila = self._fila.pop(id_perro)
+        ultima = len(self.ids) - 1
+        columnas = [self.ids, self.edad, self.peso] + [getattr(self, nombre) for nombre in self.COLUMNAS_BYTE]
+        if fila != ultima:
+            for columna in columnas:
+                columna[fila] = columna[ultima]
+            self._fila[self.ids[fila]] = fila
+        for columna in columnas:
+            del columna[ultima]
+
+    def cambiar_tamanio_raza(self, raza:str, tamanio:str):
+        '''Actualiza el tamaño de todos los perros de una raza'''
+        if raza not in self._indice_raza:
+            return
+        codigo = self.TAMANIOS.index(tamanio)
+        for fila in self._filas(self._mascara({"raza": raza})):
+            self.tamanio[fila] = codigo
+
+    # Filtrar
+    def filtrar(self, **criterios):
+        '''Retorna los IDs (ordenados) de los perros que cumplen todos los criterios.
+        Criterios: estado, sexo, vacunado, discapacitado, rango_edad, tamanio, raza,
+        edad_min, edad_max, peso_min, peso_max'''
+        ids = [self.ids[fila] for fila in self._filas(self._mascara(criterios))]
+        ids.sort()
+        return ids
+
+    def contar(self, **criterios):
+        '''Retorna cuántos perros cumplen todos los criterios'''
+        mascara = self._mascara(criterios)
+        if mascara is None:
+            return len(self)
+        if np is not None:
+            return int(np.count_nonzero(mascara))
+        return mascara.bit_count()
+
+    def _mascara(self, criterios:dict):
+        '''Máscara de filas que cumplen los criterios (None = todas).
+        Con numpy es un arreglo de bool; sin numpy, un entero con un bit en 1 por fila que cumple'''
+        mascaras = []
+        for nombre, valor in criterios.items():
+            if valor is None:
+                continue
+            if nombre in ("edad_min", "edad_max", "peso_min", "peso_max"):
+                mascaras.append(self._mascara_rango(nombre, valor))
+            elif nombre == "raza":
+                codigo = self._indice_raza.get(valor, -1)
+                if codigo < 0:
+                    return self._mascara_vacia()
+                mascaras.append(self._mascara_igual(self.raza_bajo, codigo & 0xFF))
+                mascaras.append(self._mascara_igual(self.raza_alto, codigo >> 8))
+            else:
+                codigo = self._codigo_criterio(nombre, valor)
+                if codigo < 0:
+                    return self._mascara_vacia()
+                mascaras.append(self._mascara_igual(getattr(self, nombre), codigo))
+        if not mascaras:
+            return None
+        resultado = mascaras[0]
+        for mascara in mascaras[1:]:
+            resultado = resultado & mascara
+        return resultado
+
+    def _codigo_criterio(self, nombre:str, valor):
+        '''Código de un valor en su columna (-1 si ningún perro puede tenerlo)'''
+        opciones = {"estado": self.ESTADOS, "sexo": self.SEXOS, "rango_edad": self.RANGOS_EDAD, "tamanio": self.TAMANIOS}
+        if nombre in ("vacunado", "discapacitado"):
+            return int(bool(valor))
+        if nombre not in opciones:
+            raise ValueError(f"Criterio '{nombre}' desconocido")
+        if valor not in opciones[nombre]:
+            return -1
+        return opciones[nombre].index(valor)
+
+    def _mascara_igual(self, columna:bytearray, codigo:int):
+        if np is not None:
+            return np.frombuffer(columna, dtype=np.uint8) == codigo
+        return int.from_bytes(columna.translate(_TABLAS_IGUAL[codigo]), "little")
+
+    def _mascara_rango(self, nombre:str, limite):
+        columna = self.edad if nombre.startswith("edad") else self.peso
+        if np is not None:
+            valores = np.frombuffer(columna, dtype=np.int64 if columna.typecode == "q" else np.float64)
+            return valores >= limite if nombre.endswith("min") else valores <= limite
+        if nombre.endswith("min"):
+            cumple = bytes(valor >= limite for valor in columna)
+        else:
+            cumple = bytes(valor <= limite for valor in columna)
+        return int.from_bytes(cumple, "little")
+
+    def _mascara_vacia(self):
+        if np is not None:
+            return np.zeros(len(self), dtype=bool)
+        return 0
+
+    def _filas(self, mascara):
+        '''Posiciones en 1 de una máscara (None = todas)'''
+        if mascara is None:
+            return range(len(self))
+        if np is not None:
+            return np.flatnonzero(mascara).tolist()
+        return [coincidencia.start() for coincidencia in _UNO.finditer(mascara.to_bytes(len(self), "little"))]
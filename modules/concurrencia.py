@@ -0,0 +1,44 @@
+import threading
+from contextlib import contextmanager
+
+class ConflictoVersion(ValueError):
+    '''Otra operación modificó el objeto después de que se leyó su versión: el cambio no se aplica'''
+
+
+class Candados:
+    '''Un candado por clave (ej: ("perro", 3) o ("usuario", "12345678")), creado la primera vez que se pide.
+    tomar() los adquiere siempre en el mismo orden (claves ordenadas: primero perros por ID, después
+    usuarios por DNI), así dos operaciones que comparten claves nunca se bloquean mutuamente.'''
+    def __init__(self):
+        self._candados:dict[tuple, threading.RLock] = {}
+        self._guardia = threading.Lock() # solo protege la creación y el descarte de candados
+
+    def candado(self, clave:tuple):
+        '''Retorna el candado de una clave (reentrante: el mismo hilo puede volver a tomarlo)'''
+        candado = self._candados.get(clave)
+        if candado is None:
+            with self._guardia:
+                candado = self._candados.setdefault(clave, threading.RLock())
+        return candado
+
+    @contextmanager
+    def tomar(self, *claves:tuple):
+        '''Toma los candados de todas las claves en orden fijo y los suelta al salir'''
+        tomados = []
+        try:
+            for clave in sorted(set(claves)):
+                candado = self.candado(clave)
+                candado.acquire()
+                tomados.append(candado)
+            yield
+        finally:
+            for candado in reversed(tomados):
+                candado.release()
+
+    def descartar(self, clave:tuple):
+        '''Olvida el candado de una clave eliminada (quien ya lo tenía lo sigue usando hasta soltarlo)'''
+        with self._guardia:
+            self._candados.pop(clave, None)
+
+    def __len__(self):
+        return len(self._candados)
@@ -0,0 +1,239 @@
+if __name__ == "__main__":
+    import sys
+    import os
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import os
+import json
+import threading
+from contextlib import contextmanager
+from modules.almacenamiento import Almacenamiento, raza_a_fila, perro_a_fila, usuario_a_fila
+
+# Registros (listas JSON, una por cambio):
+# ["R", *fila_raza]    guarda raza
+# ["P", *fila_perro]   guarda perro
+# ["U", *fila_usuario] guarda usuario (historial null = no cambió)
+# ["-P", id]           elimina perro
+# ["-U", dni]          elimina usuario
+# El diario tiene una transacción por línea (lista de registros); la instantánea, un registro por línea.
+
+class AlmacenamientoDiario(Almacenamiento):
+    '''Agrega cada cambio al final de un diario (write-ahead log) y cada tanto escribe una instantánea.
+    Al abrir carga la última instantánea y reproduce solo la cola del diario.'''
+    persistente = True
+    ARCHIVO_DIARIO = "diario.jsonl"
+    ARCHIVO_INSTANTANEA = "instantanea.jsonl"
+    BLOQUE_LECTURA = 1 << 20 # bytes leídos por bloque al reproducir el diario
+
+    def __init__(self, carpeta:str, cada:int=100_000, sincronizar:bool=False):
+        '''cada: registros del diario tras los que se escribe una instantánea nueva.
+        sincronizar: hace fsync en cada transacción (más lento, sobrevive a cortes de luz)'''
+        os.makedirs(carpeta, exist_ok=True)
+        self.ruta_diario = os.path.join(carpeta, self.ARCHIVO_DIARIO)
+        self.ruta_instantanea = os.path.join(carpeta, self.ARCHIVO_INSTANTANEA)
+        self.cada = cada
+        self.sincronizar = sincronizar
+        # Estado guardado, como filas (ver modules.almacenamiento)
+        self._razas:dict[str, tuple] = {}
+        self._perros:dict[int, tuple] = {}
+        self._usuarios:dict[str, tuple] = {}
+        # Transacción en curso
+        self._pendientes:list[list] = []
+        self._profundidad = 0
+        self._candado = threading.RLock() # una transacción a la vez (entre hilos)
+        # Recupera el estado: instantánea + cola del diario
+        self._leer_instantanea()
+        self.registros_diario = self._reproducir_diario()
+        self._archivo = open(self.ruta_diario, "a", encoding="utf-8")
+
+    # Recuperación
+    def _leer_instantanea(self, ruta:str|None=None):
+        ruta = ruta or self.ruta_instantanea
+        if not os.path.exists(ruta):
+            return
+        with open(ruta, "rb") as archivo:
+            while True:
+                lineas = archivo.readlines(self.BLOQUE_LECTURA)
+                if not lineas:
+                    break
+                for registro in json.loads(b"[" + b",".join(lineas) + b"]"):
+                    self._aplicar(registro)
+
+    def _reproducir_diario(self):
+        '''Aplica las transacciones del diario. Si la última quedó a medio escribir (corte), la descarta'''
+        if not os.path.exists(self.ruta_diario):
+            return 0
+        registros = 0
+        valido = 0 # bytes hasta la última transacción completa
+        with open(self.ruta_diario, "rb") as archivo:
+            while True:
+                lineas = archivo.readlines(self.BLOQUE_LECTURA)
+                if not lineas:
+                    break
+                # Un solo json.loads por bloque (mucho más rápido que uno por línea)
+                try:
+                    transacciones = json.loads(b"[" + b",".join(lineas) + b"]")
+                    completo = lineas[-1].endswith(b"\n")
+                except ValueError:
+                    transacciones, completo = self._leer_hasta_error(lineas), False
+                if not completo and transacciones and len(transacciones) == len(lineas):
+                    transacciones.pop() # la última línea no terminó de escribirse
+                for transaccion in transacciones:
+                    for registro in transaccion:
+                        self._aplicar(registro)
+                    registros += len(transaccion)
+                valido += sum(len(linea) for linea in lineas[:len(transacciones)])
+                if len(transacciones) < len(lineas):
+                    break
+        if valido < os.path.getsize(self.ruta_diario):
+            os.truncate(self.ruta_diario, valido)
+        return registros
+
+    @staticmethod
+    def _leer_hasta_error(lineas:list[bytes]):
+        '''Lee línea por línea y se detiene en la primera dañada o incompleta'''
+        transacciones = []
+        for linea in lineas:
+            if not linea.endswith(b"\n"):
+                break
+            try:
+                transacciones.append(json.loads(linea))
+            except ValueError:
+                break
+        return transacciones
+
+    def _aplicar(self, registro:list):
+        '''Aplica un registro sobre las filas en memoria'''
+        tipo = registro[0]
+        if tipo == "P":
+            self._perros[registro[1]] = tuple(registro[1:])
+        elif tipo == "U":
+            fila = registro[1:]
+            if fila[7] is None: # historial sin cambios
+                anterior = self._usuarios.get(fila[0])
+                fila[7] = anterior[7] if anterior else []
+            self._usuarios[fila[0]] = tuple(fila)
+        elif tipo == "R":
+            self._razas[registro[1]] = tuple(registro[1:])
+        elif tipo == "-P":
+            self._perros.pop(registro[1], None)
+        elif tipo == "-U":
+            self._usuarios.pop(registro[1], None)
+        else:
+            raise ValueError(f"Registro de diario desconocido: {registro!r}")
+
+    # Transacciones
+    @contextmanager
+    def transaccion(self):
+        '''Junta los registros y los escribe como una sola línea del diario al confirmar'''
+        with self._candado:
+            self._profundidad += 1
+            try:
+                yield
+            except BaseException:
+                self._profundidad -= 1
+                if self._profundidad == 0:
+                    self._pendientes = []
+                raise
+            self._profundidad -= 1
+            if self._profundidad == 0 and self._pendientes:
+                self._confirmar()
+
+    def _confirmar(self):
+        pendientes, self._pendientes = self._pendientes, []
+        self._archivo.write(json.dumps(pendientes, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self._archivo.flush()
+        if self.sincronizar:
+            os.fsync(self._archivo.fileno())
+        for registro in pendientes:
+            self._aplicar(registro)
+        self.registros_diario += len(pendientes)
+        if self.registros_diario >= self.cada:
+            self.escribir_instantanea()
+
+    def _registrar(self, registro:list):
+        with self.transaccion():
+            self._pendientes.append(registro)
+
+    # Escritura (la fila se arma con la transacción tomada: si dos hilos guardan el mismo objeto,
+    # el último en escribir lleva los valores más nuevos)
+    def guardar_raza(self, raza):
+        with self.transaccion():
+            self._registrar(["R", *raza_a_fila(raza)])
+
+    def guardar_perro(self, perro):
+        with self.transaccion():
+            self._registrar(["P", *perro_a_fila(perro)])
+
+    def guardar_usuario(self, usuario, historial:bool=True):
+        with self.transaccion():
+            fila = list(usuario_a_fila(usuario))
+            if not historial:
+                fila[7] = None
+            self._registrar(["U", *fila])
+
+    def eliminar_perro(self, id_perro:int):
+        self._registrar(["-P", id_perro])
+
+    def eliminar_usuario(self, dni:str):
+        self._registrar(["-U", dni])
+
+    # Instantáneas
+    def escribir_instantanea(self):
+        '''Escribe todo el estado en una instantánea nueva y vacía el diario'''
+        temporal = self.ruta_instantanea + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as archivo:
+            for tipo, filas in (("R", self._razas), ("U", self._usuarios), ("P", self._perros)):
+                for fila in filas.values():
+                    archivo.write(json.dumps([tipo, *fila], ensure_ascii=False, separators=(",", ":")) + "\n")
+            archivo.flush()
+            os.fsync(archivo.fileno())
+        os.replace(temporal, self.ruta_instantanea) # reemplazo atómico
+        # Si se corta antes de vaciar el diario, reproducirlo de nuevo no cambia nada (los registros son idempotentes)
+        self._archivo.close()
+        self._archivo = open(self.ruta_diario, "w", encoding="utf-8")
+        self.registros_diario = 0
+
+    # Lectura
+    def hay(self, tabla:str):
+        return bool(self._tabla(tabla))
+
+    def existentes(self, tabla:str, claves:list):
+        return self._tabla(tabla).keys() & set(claves)
+
+    def _tabla(self, tabla:str):
+        if tabla == "razas":
+            return self._razas
+        if tabla == "perros":
+            return self._perros
+        if tabla == "usuarios":
+            return self._usuarios
+        raise ValueError(f"La tabla '{tabla}' no existe. Opciones: ['razas', 'perros', 'usuarios']")
+
+    def cargar_raza(self, nombre:str):
+        return self._razas.get(nombre)
+
+    def cargar_perro(self, id_perro:int):
+        return self._perros.get(id_perro)
+
+    def cargar_usuario(self, dni:str):
+        return self._usuarios.get(dni)
+
+    def cargar_razas(self):
+        return iter(list(self._razas.values()))
+
+    def cargar_perros(self):
+        # Ordenados por ID y de a uno; se saltean los que otro hilo elimina mientras se recorre
+        filas = map(self._perros.get, sorted(self._perros))
+        return (fila for fila in filas if fila is not None)
+
+    def cargar_usuarios(self):
+        return iter(list(self._usuarios.values()))
+
+    def proximo_id_perro(self):
+        return max(self._perros, default=0) + 1
+
+    def cerrar(self, instantanea:bool=True):
+        '''Cierra el diario. Con instantanea=True antes deja una instantánea al día (el próximo inicio no reproduce nada)'''
+        if instantanea and self.registros_diario:
+            self.escribir_instantanea()
+        self._archivo.close()
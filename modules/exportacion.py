@@ -0,0 +1,97 @@
+if __name__ == "__main__":
+    import sys
+    import os
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import io
+import os
+import csv
+import gzip
+import json
+from itertools import islice
+from modules.almacenamiento import COLUMNAS
+
+FORMATOS = ("jsonl", "csv")
+BUFFER = 1 << 20  # bytes que se juntan antes de escribir al disco
+TANDA = 1_000     # filas que se convierten a texto y se escriben juntas
+
+def abrir_salida(ruta:str, comprimir:bool=False):
+    '''Abre un archivo de texto para escribir con buffer grande (comprimido con gzip si comprimir=True)'''
+    if comprimir:
+        crudo = gzip.GzipFile(ruta, "wb", compresslevel=6)
+    else:
+        crudo = io.FileIO(ruta, "w")
+    return io.TextIOWrapper(io.BufferedWriter(crudo, BUFFER), encoding="utf-8", newline="")
+
+def escribir_jsonl(archivo, columnas:tuple, filas):
+    '''Escribe un objeto JSON por fila, de a tandas. Retorna la cantidad de filas'''
+    cantidad = 0
+    codificar = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+    while True:
+        tanda = list(islice(filas, TANDA))
+        if not tanda:
+            return cantidad
+        archivo.write("".join(codificar(dict(zip(columnas, fila))) + "\n" for fila in tanda))
+        cantidad += len(tanda)
+
+def escribir_csv(archivo, columnas:tuple, filas):
+    '''Escribe encabezado y una línea por fila (las listas, como el historial, separadas por ";"). Retorna la cantidad de filas'''
+    escritor = csv.writer(archivo, lineterminator="\n")
+    escritor.writerow(columnas)
+    cantidad = 0
+    while True:
+        tanda = list(islice(filas, TANDA))
+        if not tanda:
+            return cantidad
+        escritor.writerows([";".join(map(str, valor)) if isinstance(valor, list) else valor for valor in fila] for fila in tanda)
+        cantidad += len(tanda)
+
+def exportar_tabla(filas, columnas:tuple, ruta:str, formato:str="jsonl", comprimir:bool=False):
+    '''Escribe las filas en un archivo nuevo. Escribe primero a un temporal y lo renombra al terminar,
+    así nunca queda un archivo a medio escribir con el nombre final. Retorna la cantidad de filas'''
+    if formato not in FORMATOS:
+        raise ValueError(f"El formato '{formato}' no está soportado. Opciones: {list(FORMATOS)}")
+    escribir = escribir_jsonl if formato == "jsonl" else escribir_csv
+    temporal = ruta + ".tmp"
+    try:
+        with abrir_salida(temporal, comprimir) as archivo:
+            cantidad = escribir(archivo, columnas, iter(filas))
+        os.replace(temporal, ruta)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+    return cantidad
+
+def exportar_sistema(sistema, carpeta:str, formato:str="jsonl", comprimir:bool=False):
+    '''Exporta razas, usuarios y perros del sistema a <carpeta>/<tabla>.<formato>[.gz].
+    Recorre las filas con generadores: nunca arma una lista con todos los registros. Retorna {ruta: cantidad}'''
+    if formato not in FORMATOS:
+        raise ValueError(f"El formato '{formato}' no está soportado. Opciones: {list(FORMATOS)}")
+    os.makedirs(carpeta, exist_ok=True)
+    tablas = (("razas", sistema.filas_razas), ("usuarios", sistema.filas_usuarios), ("perros", sistema.filas_perros))
+    resultado = {}
+    for tabla, filas in tablas:
+        ruta = os.path.join(carpeta, f"{tabla}.{formato}" + (".gz" if comprimir else ""))
+        resultado[ruta] = exportar_tabla(filas(), COLUMNAS[tabla], ruta, formato, comprimir)
+    return resultado
+
+
+if __name__ == "__main__":
+    import tempfile
+    from modules.perro import Perro, Raza
+    from modules.usuario import UsuarioAdoptante
+    from modules.sistema import SistemaAdopcion
+
+    sistema = SistemaAdopcion()
+    raza = sistema.registrar_raza(Raza("Labrador", "L", "Amigable"))
+    usuario = sistema.registrar_usuario(UsuarioAdoptante("Tito", "11111111", "tito@mail.com", pref_edad=2))
+    perro = sistema.registrar_perro(Perro("Firulais", 3, 20, "M", raza, True, False))
+    sistema.registrar_perro(Perro("Luna", 1, 8, "F", raza, True, False))
+    sistema.reservar(perro, usuario)
+    sistema.adoptar(perro, usuario)
+    carpeta = tempfile.mkdtemp()
+    for formato in FORMATOS:
+        for ruta, cantidad in sistema.exportar(carpeta, formato).items():
+            print(f"{ruta} ({cantidad} registros)")
+            with open(ruta, encoding="utf-8") as archivo:
+                print(archivo.read())
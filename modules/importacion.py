@@ -0,0 +1,314 @@
+if __name__ == "__main__":
+    import sys
+    import os
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import gc
+import csv
+import gzip
+import json
+from modules.perro import Perro, Raza
+from modules.usuario import UsuarioAdoptante, Preferencias
+
+# Archivos: CSV con encabezado o JSONL (un objeto por línea), con estas columnas
+# razas:    nombre, tamanio, temperamento
+# usuarios: dni, nombre, email, pref_raza, pref_edad, pref_tamanio, reserva e historial_adopciones (opcionales)
+# perros:   id (opcional), nombre, edad, peso, sexo, raza (nombre), vacunado, discapacitado, estado y adoptante (opcionales)
+# (las columnas de las exportaciones: un archivo exportado se vuelve a cargar igual, ver Importador.importar_perros)
+
+def abrir_entrada(ruta:str):
+    '''Abre un archivo de texto para leer (si termina en .gz, lo descomprime al leer)'''
+    if ruta.endswith(".gz"):
+        return gzip.open(ruta, "rt", encoding="utf-8", newline="")
+    return open(ruta, encoding="utf-8", newline="")
+
+def leer_registros(ruta:str):
+    '''Lee un archivo CSV o JSONL (opcionalmente .gz) de a una fila. Genera (número de línea, registro),
+    donde el registro es un dict o, si la línea no se pudo leer, el ValueError correspondiente'''
+    formato = ruta.removesuffix(".gz")
+    if formato.endswith(".csv"):
+        with abrir_entrada(ruta) as archivo:
+            lector = csv.reader(archivo)
+            columnas = next(lector, [])
+            for fila in lector:
+                if len(fila) == len(columnas):
+                    yield lector.line_num, dict(zip(columnas, fila))
+                elif fila: # las líneas vacías se saltean
+                    yield lector.line_num, ValueError(f"La fila tiene {len(fila)} valores y hay {len(columnas)} columnas")
+    elif formato.endswith((".jsonl", ".ndjson")):
+        with abrir_entrada(ruta) as archivo:
+            for linea, texto in enumerate(archivo, 1):
+                if not texto.strip():
+                    continue
+                try:
+                    registro = json.loads(texto)
+                except ValueError:
+                    yield linea, ValueError("JSON inválido")
+                    continue
+                if isinstance(registro, dict):
+                    yield linea, registro
+                else:
+                    yield linea, ValueError("Cada línea debe ser un objeto JSON")
+    else:
+        raise ValueError(f"Formato no soportado: '{ruta}'. Opciones: ['.csv', '.jsonl', '.csv.gz', '.jsonl.gz']")
+
+BOOLEANOS = {valor: True for valor in ("s", "si", "sí", "true", "t", "1")}
+BOOLEANOS.update({valor: False for valor in ("n", "no", "false", "f", "0", "")})
+
+def validar_bool(valor:bool|str) -> bool:
+    '''Acepta booleanos o textos como "si", "no", "true", "1". ValueError si falla.'''
+    if valor is True or valor is False:
+        return valor
+    if valor in (0, 1) and isinstance(valor, int):
+        return bool(valor)
+    if isinstance(valor, str):
+        booleano = BOOLEANOS.get(valor)
+        if booleano is None:
+            booleano = BOOLEANOS.get(valor.lower().strip())
+        if booleano is not None:
+            return booleano
+    raise ValueError(f"'{valor}' no es un valor de sí o no")
+
+def validar_id(valor:int|str|None):
+    '''ID opcional de un perro: vacío -> None. Solo enteros o textos con un entero: un booleano
+    (JSON true sería 1) o un decimal (3.7 se truncaría a 3) no son IDs'''
+    if valor in (None, ""):
+        return None
+    if isinstance(valor, bool) or not isinstance(valor, (int, str)):
+        raise ValueError("ID debe ser un número entero")
+    try:
+        return Perro.validar_id(int(valor))
+    except ValueError:
+        raise ValueError("ID debe ser un número entero")
+
+def validar_ids(valor:list|str|None):
+    '''Lista de IDs de perros: una lista (JSONL) o un texto separado por ";" (CSV, como en las exportaciones)'''
+    if valor in (None, ""):
+        return []
+    if isinstance(valor, str):
+        valor = valor.split(";")
+    if not isinstance(valor, list):
+        raise ValueError("El historial debe ser una lista de IDs")
+    ids = [validar_id(id_perro) for id_perro in valor]
+    if None in ids:
+        raise ValueError("ID debe ser un número entero")
+    return ids
+
+def campo(registro:dict, nombre:str):
+    '''Valor obligatorio de un registro, ValueError si falta o es nulo'''
+    if nombre not in registro:
+        raise ValueError(f"Falta la columna '{nombre}'")
+    if registro[nombre] is None:
+        raise ValueError(f"La columna '{nombre}' no puede ser nula")
+    return registro[nombre]
+
+
+class ResultadoImportacion:
+    '''Cuántas filas se importaron y cuáles se rechazaron (número de línea y motivo)'''
+    def __init__(self):
+        self.importados = 0
+        self.rechazados:list[tuple[int, str]] = []
+
+    def __str__(self):
+        texto = f"Importados: {self.importados}\nRechazados: {len(self.rechazados)}"
+        for linea, motivo in self.rechazados[:20]:
+            texto += f"\n - Línea {linea}: {motivo}"
+        if len(self.rechazados) > 20:
+            texto += f"\n - ... y {len(self.rechazados) - 20} más"
+        return texto
+
+
+class Importador:
+    '''Carga masiva de razas, usuarios y perros desde archivos CSV o JSONL.
+    Lee el archivo de a lotes (la memoria usada no depende del tamaño del archivo), valida cada fila
+    con los validar_* de las clases y registra el lote entero en el sistema de una vez.'''
+    def __init__(self, sistema, lote:int=10_000):
+        if lote < 1:
+            raise ValueError("El lote debe tener al menos una fila")
+        self.sistema = sistema
+        self.lote = lote
+        # Tabla de razas por nombre normalizado (solo las encontradas), reutilizada para todas las filas de perros
+        self._razas:dict[str, Raza] = {}
+        # Orden de los historiales leídos de los usuarios (DNI -> {ID: posición}), para adoptar en ese orden
+        self._historiales:dict[str, dict[int, int]] = {}
+        # Estado y adoptante leídos de los perros del lote (id(perro) -> (estado, DNI)), solo reservados o adoptados
+        self._estados:dict[int, tuple[str, str]] = {}
+
+    # Importar
+    def importar_razas(self, ruta:str):
+        '''Importa razas. Retorna ResultadoImportacion'''
+        return self._importar(ruta, self._armar_raza, self._registrar_razas, "La raza ya está registrada")
+
+    def importar_usuarios(self, ruta:str):
+        '''Importa usuarios. Retorna ResultadoImportacion'''
+        return self._importar(ruta, self._armar_usuario, self.sistema.registrar_usuarios, "El DNI ya está registrado")
+
+    def importar_perros(self, ruta:str):
+        '''Importa perros (la raza debe estar registrada). Retorna ResultadoImportacion.
+        Los reservados o adoptados se registran disponibles y al final se reservan y adoptan con sistema.reservar
+        y sistema.adoptar: mismas validaciones que el sistema, y la reserva y el historial de los usuarios salen de ahí'''
+        pendientes = []
+        self._estados.clear()
+        resultado = self._importar(ruta, self._armar_perro, self.sistema.registrar_perros, "El ID ya está registrado",
+                                   lambda registrados: self._separar_estados(registrados, pendientes))
+        self._aplicar_estados(pendientes, resultado)
+        return resultado
+
+    def _importar(self, ruta:str, armar, registrar, motivo_repetido:str, registrados=None):
+        '''Importa el archivo de a lotes. registrados(lista de (línea, objeto)) recibe los registrados de cada lote'''
+        resultado = ResultadoImportacion()
+        lote = []
+        # Sin recolector de ciclos mientras se importa: con millones de objetos nuevos
+        # lo recorre entero una y otra vez (y estos objetos no forman ciclos para liberar)
+        recolector = gc.isenabled()
+        gc.disable()
+        try:
+            for linea, registro in leer_registros(ruta):
+                lote.append((linea, registro))
+                if len(lote) >= self.lote:
+                    nuevos = self._procesar_lote(lote, armar, registrar, motivo_repetido, resultado)
+                    if registrados is not None:
+                        registrados(nuevos)
+                    lote = []
+            if lote:
+                nuevos = self._procesar_lote(lote, armar, registrar, motivo_repetido, resultado)
+                if registrados is not None:
+                    registrados(nuevos)
+        finally:
+            if recolector:
+                gc.enable()
+        return resultado
+
+    def _procesar_lote(self, lote:list, armar, registrar, motivo_repetido:str, resultado:ResultadoImportacion):
+        '''Valida las filas del lote, registra las válidas juntas y anota las rechazadas.
+        Retorna los registrados: lista de (línea, objeto)'''
+        lineas = {} # id(objeto) -> línea, para ubicar a los repetidos
+        objetos = []
+        rechazados = []
+        for linea, registro in lote:
+            try:
+                if isinstance(registro, Exception):
+                    raise registro
+                objeto = armar(registro)
+            except (TypeError, ValueError) as e:
+                rechazados.append((linea, str(e)))
+                continue
+            lineas[id(objeto)] = linea
+            objetos.append(objeto)
+        repetidos = registrar(objetos)
+        for objeto in repetidos:
+            rechazados.append((lineas[id(objeto)], motivo_repetido))
+        resultado.importados += len(objetos) - len(repetidos)
+        resultado.rechazados.extend(sorted(rechazados))
+        descartados = set(map(id, repetidos))
+        return [(lineas[id(objeto)], objeto) for objeto in objetos if id(objeto) not in descartados]
+
+    # Armar objetos (los constructores validan cada dato con los validar_* de su clase)
+    @staticmethod
+    def _armar_raza(registro:dict):
+        return Raza(nombre=campo(registro, "nombre"), tamanio=registro.get("tamanio", ""),
+                    temperamento=registro.get("temperamento", ""))
+
+    def _armar_usuario(self, registro:dict):
+        pref_edad = registro.get("pref_edad", "")
+        rango = pref_edad if pref_edad in Preferencias.EDADES else "" # rango ya calculado (C/J/A/M), como en las exportaciones
+        usuario = UsuarioAdoptante(nombre=campo(registro, "nombre"), dni=campo(registro, "dni"), email=campo(registro, "email"),
+                                   pref_raza=registro.get("pref_raza", ""), pref_edad="" if rango else pref_edad,
+                                   pref_tamanio=registro.get("pref_tamanio", ""))
+        if rango:
+            usuario.preferencias.edad = rango
+        # La reserva y el historial se rearman al importar los perros (ver importar_perros): del historial solo se usa el orden
+        validar_id(registro.get("reserva"))
+        historial = validar_ids(registro.get("historial_adopciones"))
+        if historial:
+            self._historiales[usuario.dni] = {id_perro: posicion for posicion, id_perro in enumerate(historial)}
+        return usuario
+
+    def _armar_perro(self, registro:dict):
+        estado = registro.get("estado") or "disponible"
+        if estado not in Perro.ESTADOS:
+            raise ValueError(f"El estado '{estado}' no está registrado. Opciones: {list(Perro.ESTADOS)}")
+        adoptante = registro.get("adoptante") or None
+        if (estado == "disponible") != (adoptante is None):
+            raise ValueError("Un perro reservado o adoptado debe tener adoptante, y uno disponible no")
+        perro = Perro(nombre=registro.get("nombre", ""), edad=campo(registro, "edad"), peso=campo(registro, "peso"),
+                      sexo=campo(registro, "sexo"), raza=self._raza(campo(registro, "raza")),
+                      vacunado=validar_bool(registro.get("vacunado", False)),
+                      discapacitado=validar_bool(registro.get("discapacitado", False)),
+                      id=validar_id(registro.get("id")))
+        if adoptante is not None: # se registra disponible: el estado se aplica después (ver _aplicar_estados)
+            self._estados[id(perro)] = (estado, UsuarioAdoptante.validar_dni(adoptante))
+        return perro
+
+    def _separar_estados(self, registrados:list, pendientes:list):
+        '''Agrega a pendientes (línea, perro, estado, DNI) los perros registrados del lote que hay que reservar o adoptar'''
+        for linea, perro in registrados:
+            estado = self._estados.get(id(perro))
+            if estado is not None:
+                pendientes.append((linea, perro, *estado))
+        self._estados.clear()
+
+    def _aplicar_estados(self, pendientes:list, resultado:ResultadoImportacion):
+        '''Reserva y adopta los perros pendientes con sistema.reservar/adoptar (si fallan, no cambian nada).
+        Primero las adopciones, en el orden del historial de cada usuario (si se importó con este importador),
+        y después las reservas. Si el sistema rechaza el cambio, el perro se elimina y su fila queda rechazada'''
+        def orden(pendiente):
+            linea, perro, estado, dni = pendiente
+            posiciones = self._historiales.get(dni, {})
+            return estado == "reservado", posiciones.get(perro.id, len(posiciones)), linea
+        rechazados = []
+        for linea, perro, estado, dni in sorted(pendientes, key=orden):
+            try:
+                usuario = self.sistema.buscar_usuario(dni, False)
+                if usuario is not None and usuario.reserva is not None: # (reservar la reemplazaría: se rechaza)
+                    raise ValueError("No puede reservar teniendo una reserva previa")
+                self.sistema.reservar(perro, dni)
+                if estado == "adoptado":
+                    self.sistema.adoptar(perro, dni)
+            except (TypeError, ValueError) as e:
+                self.sistema.eliminar_perro(perro)
+                rechazados.append((linea, str(e)))
+        if rechazados:
+            resultado.importados -= len(rechazados)
+            resultado.rechazados = sorted(resultado.rechazados + rechazados)
+
+    def _registrar_razas(self, razas:list[Raza]):
+        repetidas = self.sistema.registrar_razas(razas)
+        descartadas = set(map(id, repetidas))
+        for raza in razas:
+            if id(raza) not in descartadas:
+                self._razas[raza.nombre] = raza
+        return repetidas
+
+    def _raza(self, nombre:str):
+        '''Busca la raza (por nombre normalizado) en la tabla; si no está, la busca en el sistema.
+        Las que no encuentra no se guardan: se pueden importar después'''
+        nombre = Raza.validar_nombre(nombre)
+        raza = self._razas.get(nombre)
+        if raza is None:
+            raza = self.sistema.buscar_raza(nombre, False)
+            if raza is None:
+                raise ValueError(f"La raza '{nombre}' no está registrada")
+            self._razas[nombre] = raza
+        return raza
+
+
+if __name__ == "__main__":
+    import tempfile
+    from modules.sistema import SistemaAdopcion
+
+    sistema = SistemaAdopcion()
+    importador = Importador(sistema, lote=2)
+    carpeta = tempfile.mkdtemp()
+    ruta_razas = os.path.join(carpeta, "razas.csv")
+    ruta_perros = os.path.join(carpeta, "perros.jsonl")
+    with open(ruta_razas, "w", encoding="utf-8") as archivo:
+        archivo.write("nombre,tamanio,temperamento\nLabrador,L,Amigable\nCaniche,S,Juguetón\nlabrador,M,\n")
+    with open(ruta_perros, "w", encoding="utf-8") as archivo:
+        archivo.write('{"nombre": "Firulais", "edad": 3, "peso": 20, "sexo": "M", "raza": "labrador", "vacunado": "si"}\n')
+        archivo.write('{"nombre": "Pelusa", "edad": -1, "peso": 4, "sexo": "F", "raza": "Caniche"}\n')
+        archivo.write('{"nombre": "Toby", "edad": 1, "peso": 3, "sexo": "M", "raza": "Galgo"}\n')
+        archivo.write('{"nombre": "Luna", "edad": 5, "peso": 5, "sexo": "F", "raza": "Caniche", "discapacitado": true}\n')
+    print(importador.importar_razas(ruta_razas))
+    print(importador.importar_perros(ruta_perros))
+    for perro in sistema.perros:
+        print(f" - {perro.id}: {perro.nombre} ({perro.raza.nombre})")
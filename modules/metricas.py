@@ -0,0 +1,201 @@
+if __name__ == "__main__":
+    import sys
+    import os
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import os
+import time
+import inspect
+import threading
+from bisect import bisect_left
+from functools import wraps
+
+# Límites superiores de los baldes de los histogramas (el último balde, +Inf, es implícito)
+BALDES_DURACION = (0.00001, 0.0001, 0.001, 0.01, 0.1, 1.0, 10.0) # segundos
+BALDES_ELEMENTOS = (0, 1, 10, 100, 1_000, 10_000, 100_000, 1_000_000)
+
+class Histograma:
+    '''Cuenta valores por balde (acumulados recién al exportar), más su suma y cantidad'''
+    __slots__ = ("limites", "baldes", "suma", "cantidad")
+
+    def __init__(self, limites:tuple):
+        self.limites = limites
+        self.baldes = [0] * (len(limites) + 1)
+        self.suma = 0
+        self.cantidad = 0
+
+    def agregar(self, valor:float):
+        self.baldes[bisect_left(self.limites, valor)] += 1
+        self.suma += valor
+        self.cantidad += 1
+
+    def acumulados(self):
+        '''[(límite, cantidad de valores <= límite)], con "+Inf" al final (como Prometheus)'''
+        total, resultado = 0, []
+        for limite, cantidad in zip(self.limites + ("+Inf",), self.baldes):
+            total += cantidad
+            resultado.append((limite, total))
+        return resultado
+
+    def instantanea(self):
+        return {"cantidad": self.cantidad, "suma": self.suma, "baldes": dict(self.acumulados())}
+
+
+class MetodoMedido:
+    '''Métricas de un método: llamadas, histogramas de duración y de elementos retornados, errores por tipo'''
+    __slots__ = ("llamadas", "duracion", "elementos", "errores")
+
+    def __init__(self):
+        self.llamadas = 0
+        self.duracion = Histograma(BALDES_DURACION)
+        self.elementos = Histograma(BALDES_ELEMENTOS)
+        self.errores:dict[str, int] = {}
+
+
+class Metricas:
+    '''Llamadas, duración, tamaño del resultado y errores (por tipo de excepción) de cada método medido'''
+    def __init__(self, prefijo:str="adopcion"):
+        self.prefijo = prefijo
+        self._candado = threading.Lock() # los métodos se pueden llamar desde varios hilos
+        self._metodos:dict[str, MetodoMedido] = {}
+
+    def metodo(self, nombre:str):
+        '''Retorna las métricas de un método (las crea la primera vez)'''
+        with self._candado:
+            return self._metodos.setdefault(nombre, MetodoMedido())
+
+    def registrar(self, medido:MetodoMedido, duracion:float, elementos:int|None=None, error:BaseException|None=None):
+        '''Anota una llamada. elementos: tamaño del resultado (ej: cantidad de sugerencias), si es una colección'''
+        with self._candado:
+            medido.llamadas += 1
+            medido.duracion.agregar(duracion)
+            if elementos is not None:
+                medido.elementos.agregar(elementos)
+            if error is not None:
+                medido.errores[type(error).__name__] = medido.errores.get(type(error).__name__, 0) + 1
+
+    def reiniciar(self):
+        '''Vuelve todos los contadores a cero'''
+        with self._candado:
+            for medido in self._metodos.values():
+                medido.__init__()
+
+    def instantanea(self):
+        '''Copia de las métricas de los métodos llamados: {método: {"llamadas", "duracion", "elementos", "errores"}}'''
+        with self._candado:
+            return {nombre: {
+                        "llamadas": medido.llamadas,
+                        "duracion": medido.duracion.instantanea(),
+                        "elementos": medido.elementos.instantanea() if medido.elementos.cantidad else None,
+                        "errores": dict(medido.errores),
+                    } for nombre, medido in sorted(self._metodos.items()) if medido.llamadas}
+
+    def texto_prometheus(self):
+        '''Métricas en el formato de texto de Prometheus'''
+        nombre = self.prefijo
+        lineas = [f"# HELP {nombre}_llamadas_total Llamadas a cada método",
+                  f"# TYPE {nombre}_llamadas_total counter"]
+        metricas = self.instantanea()
+        for metodo, datos in metricas.items():
+            lineas.append(f'{nombre}_llamadas_total{{metodo="{metodo}"}} {datos["llamadas"]}')
+        lineas += [f"# HELP {nombre}_errores_total Excepciones lanzadas por cada método, por tipo",
+                   f"# TYPE {nombre}_errores_total counter"]
+        for metodo, datos in metricas.items():
+            for tipo, cantidad in sorted(datos["errores"].items()):
+                lineas.append(f'{nombre}_errores_total{{metodo="{metodo}",tipo="{tipo}"}} {cantidad}')
+        for clave, sufijo, ayuda in (("duracion", "duracion_segundos", "Duración de cada llamada"),
+                                     ("elementos", "resultado_elementos", "Elementos retornados por cada llamada")):
+            lineas += [f"# HELP {nombre}_{sufijo} {ayuda}", f"# TYPE {nombre}_{sufijo} histogram"]
+            for metodo, datos in metricas.items():
+                histograma = datos[clave]
+                if histograma is None:
+                    continue
+                for limite, cantidad in histograma["baldes"].items():
+                    lineas.append(f'{nombre}_{sufijo}_bucket{{metodo="{metodo}",le="{limite}"}} {cantidad}')
+                lineas.append(f'{nombre}_{sufijo}_sum{{metodo="{metodo}"}} {histograma["suma"]}')
+                lineas.append(f'{nombre}_{sufijo}_count{{metodo="{metodo}"}} {histograma["cantidad"]}')
+        return "\n".join(lineas) + "\n"
+
+    def escribir_prometheus(self, ruta:str):
+        '''Escribe texto_prometheus() en un archivo (primero a un temporal, así nunca se lee a medio escribir)'''
+        temporal = ruta + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as archivo:
+            archivo.write(self.texto_prometheus())
+        os.replace(temporal, ruta)
+
+
+def tamanio(resultado):
+    '''Cantidad de elementos de un resultado que sea una colección (lista, dict, ...), None si no lo es'''
+    if isinstance(resultado, (list, tuple, dict, set, frozenset)):
+        return len(resultado)
+    return None
+
+def _medir(nombre:str, metodo, metricas:Metricas):
+    '''Envuelve un método para registrar cada llamada en las métricas'''
+    medido = metricas.metodo(nombre)
+    if inspect.isgeneratorfunction(metodo):
+        @wraps(metodo)
+        def envoltorio(*args, **kwargs):
+            # Generador: mide desde la llamada hasta que se termina de recorrer, y cuenta lo generado
+            inicio = time.perf_counter()
+            generados = 0
+            try:
+                for valor in metodo(*args, **kwargs):
+                    generados += 1
+                    yield valor
+            except GeneratorExit: # se dejó de recorrer antes del final: no es un error
+                metricas.registrar(medido, time.perf_counter() - inicio, generados)
+                raise
+            except BaseException as e:
+                metricas.registrar(medido, time.perf_counter() - inicio, generados, e)
+                raise
+            metricas.registrar(medido, time.perf_counter() - inicio, generados)
+        return envoltorio
+
+    @wraps(metodo)
+    def envoltorio(*args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            resultado = metodo(*args, **kwargs)
+        except BaseException as e:
+            metricas.registrar(medido, time.perf_counter() - inicio, None, e)
+            raise
+        metricas.registrar(medido, time.perf_counter() - inicio, tamanio(resultado))
+        return resultado
+    return envoltorio
+
+def metodos_publicos(objeto, excluir:tuple=()):
+    '''Nombres de los métodos públicos de la clase del objeto (sin propiedades)'''
+    return [nombre for nombre, _ in inspect.getmembers(type(objeto), inspect.isfunction)
+            if not nombre.startswith("_") and nombre not in excluir]
+
+def instrumentar(objeto, metricas:Metricas, nombres:list[str]):
+    '''Reemplaza, solo en esta instancia, cada método por uno que registra sus llamadas.
+    Las llamadas internas (self.metodo) también pasan por el envoltorio y se cuentan'''
+    for nombre in nombres:
+        setattr(objeto, nombre, _medir(nombre, getattr(objeto, nombre), metricas))
+
+def desinstrumentar(objeto, nombres:list[str]):
+    '''Quita los envoltorios: los métodos vuelven a ser los de la clase, sin ningún costo extra'''
+    for nombre in nombres:
+        vars(objeto).pop(nombre, None)
+
+
+if __name__ == "__main__":
+    from modules.perro import Perro, Raza
+    from modules.usuario import UsuarioAdoptante
+    from modules.sistema import SistemaAdopcion
+
+    sistema = SistemaAdopcion()
+    metricas = sistema.activar_metricas()
+    raza = sistema.registrar_raza(Raza("Labrador", "L"))
+    usuario = sistema.registrar_usuario(UsuarioAdoptante("Tito", "11111111", "tito@mail.com"))
+    for i in range(20):
+        sistema.registrar_perro(Perro(f"Perro {i}", i % 10, 20, "MF"[i % 2], raza, True, False))
+    sistema.obtener_sugerencias_perros(usuario)
+    sistema.reservar(1, usuario)
+    try:
+        sistema.reservar(1, usuario)
+    except ValueError:
+        pass
+    print(metricas.instantanea()["reservar"])
+    print(metricas.texto_prometheus())
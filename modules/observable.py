@@ -0,0 +1,22 @@
+class Observable:
+    '''Permite que otros objetos (ej: el sistema) se enteren de los cambios de una instancia'''
+    __slots__ = ("_observadores", "version")
+
+    def __init__(self):
+        self._observadores = () # tupla vacía: no ocupa memoria extra mientras nadie observe
+        self.version = 0 # aumenta con cada cambio (ver notificar), para detectar ediciones simultáneas
+
+    def agregar_observador(self, observador):
+        '''Registra una función observador(objeto, atributo, valor_anterior)'''
+        if observador not in self._observadores:
+            self._observadores += (observador,)
+
+    def quitar_observador(self, observador):
+        '''Deja de notificar a un observador'''
+        self._observadores = tuple(obs for obs in self._observadores if obs != observador)
+
+    def notificar(self, atributo:str, anterior):
+        '''Avisa a los observadores que cambió un atributo, junto con su valor anterior. Aumenta la versión'''
+        self.version += 1
+        for observador in self._observadores:
+            observador(self, atributo, anterior)
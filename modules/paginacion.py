@@ -0,0 +1,61 @@
+import heapq
+from bisect import bisect_right
+from itertools import islice
+
+POR_PAGINA = 20 # elementos por página si no se indica otra cantidad
+
+class Pagina(list):
+    '''Una página de resultados: se usa como una lista común y además trae el cursor de la página siguiente.
+    siguiente: clave del último elemento (la próxima página empieza después de ella), None si no hay más.
+    Como el cursor es una clave y no una posición, se puede seguir aunque mientras tanto se agreguen o quiten elementos'''
+    __slots__ = ("siguiente",)
+
+    def __init__(self, elementos=(), siguiente=None):
+        super().__init__(elementos)
+        self.siguiente = siguiente
+
+    def __repr__(self):
+        return f"Pagina({list.__repr__(self)}, siguiente={self.siguiente!r})"
+
+
+def validar_cantidad(cantidad:int):
+    '''Cantidad de elementos por página. ValueError si no es un entero mayor a 0'''
+    if not isinstance(cantidad, int) or isinstance(cantidad, bool) or cantidad < 1:
+        raise ValueError("La cantidad por página debe ser un entero mayor a 0")
+    return cantidad
+
+def claves_pagina(ordenadas:list, despues, cantidad:int, excluir=()):
+    '''Claves de una página tomadas de una lista ordenada (búsqueda binaria, sin recorrerla), salteando las de `excluir`.
+    Retorna (claves, siguiente)'''
+    validar_cantidad(cantidad)
+    inicio = 0 if despues is None else bisect_right(ordenadas, despues)
+    if not excluir:
+        claves = ordenadas[inicio:inicio + cantidad]
+        return claves, (claves[-1] if inicio + cantidad < len(ordenadas) else None)
+    siguientes = map(ordenadas.__getitem__, range(inicio, len(ordenadas))) # (islice recorrería desde el principio)
+    elegidas = list(islice((clave for clave in siguientes if clave not in excluir), cantidad + 1))
+    if len(elegidas) > cantidad:
+        return elegidas[:cantidad], elegidas[cantidad - 1]
+    return elegidas, None
+
+def claves_pagina_sin_orden(claves, despues, cantidad:int):
+    '''Claves de una página tomadas de claves sin orden (ej: un conjunto): elige las más chicas después del cursor
+    sin ordenar todas (solo guarda cantidad + 1). Retorna (claves, siguiente)'''
+    validar_cantidad(cantidad)
+    if despues is not None:
+        claves = (clave for clave in claves if clave > despues)
+    elegidas = heapq.nsmallest(cantidad + 1, claves)
+    if len(elegidas) > cantidad:
+        return elegidas[:cantidad], elegidas[cantidad - 1]
+    return elegidas, None
+
+def recorrer(paginar, cantidad:int=POR_PAGINA):
+    '''Generador de todos los elementos, pidiendo una página por vez a paginar(despues, cantidad).
+    Nunca arma la lista completa: solo tiene en memoria la página actual'''
+    despues = None
+    while True:
+        pagina = paginar(despues, cantidad)
+        yield from pagina
+        if pagina.siguiente is None:
+            return
+        despues = pagina.siguiente
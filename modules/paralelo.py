@@ -0,0 +1,240 @@
+if __name__ == "__main__":
+    import sys
+    import os
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import os
+import atexit
+from array import array
+from bisect import bisect_left
+from collections import deque
+from itertools import chain
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+from concurrent.futures import ProcessPoolExecutor
+
+# Consultas de solo lectura sobre todos los usuarios, repartidas entre varios procesos.
+# La instantánea es un solo bloque de memoria compartida: arreglos de enteros de 8 bytes, uno detrás del otro.
+#   ids, grupos:          los perros disponibles ordenados por ID y el grupo (raza, rango de edad, tamaño) de cada uno
+#   preferencias:         la preferencia (raza, rango de edad, tamaño) de cada usuario
+#   limites, historiales: dónde empieza el historial de cada usuario y los IDs de todos los historiales juntos
+# Los grupos y las preferencias son índices en dos listas chicas, que viajan una sola vez al iniciar cada proceso.
+# Cada tarea es un lote de usuarios (desde, hasta). La respuesta son, para cada usuario, tramos (inicio, fin) de los
+# candidatos de su preferencia, en bytes; los candidatos de cada preferencia viajan una sola vez por proceso.
+# Nada de la instantánea se vuelve a serializar.
+SECCIONES = ("ids", "grupos", "preferencias", "limites", "historiales")
+LOTE = 1000 # usuarios por tarea (como mucho)
+
+def secciones(memoria:SharedMemory, largos:dict[str, int]):
+    '''Vistas (memoryview de enteros, sin copiar) de cada sección de la instantánea'''
+    vistas, desde = {}, 0
+    for seccion in SECCIONES:
+        vistas[seccion] = memoria.buf[desde:desde + 8 * largos[seccion]].cast("q")
+        desde += 8 * largos[seccion]
+    return vistas
+
+
+class Instantanea:
+    '''Copia compacta y de solo lectura de los perros disponibles y de las preferencias e historiales de los usuarios.
+    perros: (ID, (raza, rango de edad, tamaño)) ordenados por ID. usuarios: ((raza, rango de edad, tamaño), historial)
+    (preferencia vacía: "")'''
+    def __init__(self, perros, usuarios):
+        arreglos = {seccion: array("q") for seccion in SECCIONES}
+        arreglos["limites"].append(0)
+        grupos:dict[tuple, int] = {}
+        preferencias:dict[tuple, int] = {}
+        for id_perro, grupo in perros:
+            arreglos["ids"].append(id_perro)
+            arreglos["grupos"].append(grupos.setdefault(grupo, len(grupos)))
+        for preferencia, historial in usuarios:
+            arreglos["preferencias"].append(preferencias.setdefault(preferencia, len(preferencias)))
+            arreglos["historiales"].extend(historial)
+            arreglos["limites"].append(len(arreglos["historiales"]))
+        self.grupos = list(grupos)
+        self.preferencias = list(preferencias)
+        self.largos = {seccion: len(arreglo) for seccion, arreglo in arreglos.items()}
+        self.usuarios = self.largos["preferencias"]
+        self.memoria = SharedMemory(create=True, size=max(8, 8 * sum(self.largos.values())))
+        desde = 0
+        for seccion in SECCIONES:
+            datos = arreglos.pop(seccion).tobytes()
+            self.memoria.buf[desde:desde + len(datos)] = datos
+            desde += len(datos)
+
+    def cerrar(self):
+        '''Libera la memoria compartida'''
+        self.memoria.close()
+        self.memoria.unlink()
+
+
+# Lado de cada proceso: abre la instantánea una vez y resuelve lotes de usuarios
+_proceso:dict = {}
+
+def _iniciar(nombre:str, largos:dict[str, int], grupos:list[tuple], preferencias:list[tuple]):
+    memoria = SharedMemory(nombre)
+    vistas = secciones(memoria, largos)
+    por_grupo = [array("q") for _ in grupos] # IDs de los perros disponibles de cada grupo, ordenados
+    for id_perro, grupo in zip(vistas["ids"], vistas["grupos"]):
+        por_grupo[grupo].append(id_perro)
+    _proceso.update(memoria=memoria, vistas=vistas, por_grupo=por_grupo, grupos=grupos,
+                    preferencias=preferencias, candidatos={}, enviados=set())
+    atexit.register(_cerrar)
+
+def _cerrar():
+    for vista in _proceso.pop("vistas", {}).values():
+        vista.release()
+    _proceso.pop("memoria").close()
+
+def _candidatos(preferencia:int):
+    '''IDs ordenados de los perros disponibles que cumplen una preferencia (se calculan una vez por preferencia)'''
+    candidatos = _proceso["candidatos"].get(preferencia)
+    if candidatos is None:
+        raza, edad, tamanio = _proceso["preferencias"][preferencia]
+        if not (raza or edad or tamanio): # acepta cualquier disponible
+            candidatos = _proceso["vistas"]["ids"]
+        else:
+            coinciden = [_proceso["por_grupo"][numero] for numero, grupo in enumerate(_proceso["grupos"])
+                         if raza in ("", grupo[0]) and edad in ("", grupo[1]) and tamanio in ("", grupo[2])]
+            candidatos = memoryview(coinciden[0] if len(coinciden) == 1 else array("q", sorted(chain.from_iterable(coinciden))))
+        _proceso["candidatos"][preferencia] = candidatos
+    return candidatos
+
+def _tramos(candidatos:memoryview, excluir, cantidad:int|None):
+    '''Tramos (inicio, fin) de los candidatos sin los IDs de excluir (búsqueda binaria de cada uno, sin recorrerlos).
+    Con cantidad, solo los necesarios para cantidad + 1 candidatos (el último dice si hay otra página)'''
+    posiciones = []
+    for id_perro in excluir:
+        posicion = bisect_left(candidatos, id_perro)
+        if posicion < len(candidatos) and candidatos[posicion] == id_perro:
+            posiciones.append(posicion)
+    posiciones.sort()
+    posiciones.append(len(candidatos))
+    faltan = len(candidatos) if cantidad is None else cantidad + 1
+    inicio = 0
+    for posicion in posiciones:
+        fin = min(posicion, inicio + faltan)
+        if inicio < fin:
+            yield inicio, fin
+            faltan -= fin - inicio
+            if not faltan:
+                return
+        inicio = posicion + 1
+
+def _sugerir(desde:int, hasta:int, cantidad:int|None):
+    '''Sugerencias de los usuarios desde..hasta-1, como posiciones en los candidatos de su preferencia.
+    Retorna (preferencias, límites, tramos, más) como bytes y {preferencia: candidatos en bytes} con los candidatos
+    que este proceso todavía no envió. Las sugerencias del usuario i son los tramos (inicio, fin) que están en
+    tramos[límites[i]:límites[i + 1]] (de a pares), y más[i] es 1 si hay otra página'''
+    vistas = _proceso["vistas"]
+    preferencias, limites_historial, historiales = vistas["preferencias"], vistas["limites"], vistas["historiales"]
+    limites, tramos, mas = array("q", [0]), array("q"), array("q")
+    nuevos = {}
+    for usuario in range(desde, hasta):
+        preferencia = preferencias[usuario]
+        candidatos = _candidatos(preferencia)
+        if preferencia not in _proceso["enviados"]:
+            _proceso["enviados"].add(preferencia)
+            nuevos[preferencia] = candidatos.tobytes()
+        elegidos = 0
+        for inicio, fin in _tramos(candidatos, historiales[limites_historial[usuario]:limites_historial[usuario + 1]], cantidad):
+            tramos.extend((inicio, fin))
+            elegidos += fin - inicio
+        if cantidad is not None and elegidos > cantidad: # el candidato de más no es parte de la página
+            tramos[-1] -= 1
+            if tramos[-1] == tramos[-2]:
+                del tramos[-2:]
+            mas.append(1)
+        else:
+            mas.append(0)
+        limites.append(len(tramos))
+    return (preferencias[desde:hasta].tobytes(), limites.tobytes(), tramos.tobytes(), mas.tobytes()), nuevos
+
+
+class ConsultasParalelas:
+    '''Reparte consultas sobre todos los usuarios de una Instantanea entre `procesos` procesos (por defecto, uno
+    por núcleo). La instantánea se arma y se comparte una sola vez; cada proceso la lee sin copiarla.
+    Usado con `with`, al salir termina los procesos y libera la memoria compartida'''
+    def __init__(self, perros, usuarios, procesos:int|None=None, metodo:str|None=None):
+        self.procesos = procesos or os.cpu_count() or 1
+        self.instantanea = Instantanea(perros, usuarios)
+        try:
+            instantanea = self.instantanea
+            self._ejecutor = ProcessPoolExecutor(self.procesos, get_context(metodo), initializer=_iniciar,
+                initargs=(instantanea.memoria.name, instantanea.largos, instantanea.grupos, instantanea.preferencias))
+        except BaseException:
+            self.instantanea.cerrar()
+            raise
+        self._candidatos:dict[int, memoryview] = {} # preferencia -> IDs de sus candidatos (cada proceso los envía una vez)
+
+    def sugerencias(self, cantidad:int|None=None, armar=list):
+        '''Generador de (número de usuario, sugerencias, siguiente) en el orden de los usuarios de la instantánea.
+        Sugerencias: los perros disponibles que cumplen sus preferencias, ordenados por ID, sin los de su historial
+        (con cantidad, solo los primeros `cantidad`; siguiente es el cursor de la página que sigue, o None).
+        armar(IDs) retorna la lista de perros de esos IDs (None en el lugar de los que ya no están). Sin cantidad se llama
+        una sola vez por preferencia, y las sugerencias de cada usuario son pedazos de esa lista; con cantidad, una vez
+        por usuario, solo con los IDs de su página'''
+        usuarios = self.instantanea.usuarios
+        lote = max(1, min(LOTE, -(-usuarios // (4 * self.procesos)))) # varios lotes por proceso: se reparten mejor
+        lotes = iter(range(0, usuarios, lote))
+        pendientes = deque()
+        def pedir():
+            desde = next(lotes, None)
+            if desde is not None:
+                pendientes.append((desde, self._ejecutor.submit(_sugerir, desde, min(desde + lote, usuarios), cantidad)))
+        for _ in range(2 * self.procesos): # pocas tareas en vuelo: las respuestas no se acumulan en memoria
+            pedir()
+        armados = {} # preferencia -> (perros de sus candidatos, si están todos)
+        while pendientes:
+            desde, tarea = pendientes.popleft()
+            respuesta, nuevos = tarea.result()
+            pedir()
+            for preferencia, datos in nuevos.items():
+                self._candidatos.setdefault(preferencia, memoryview(datos).cast("q")) # otro proceso pudo enviarlos antes
+            preferencias, limites, tramos, mas = (memoryview(datos).cast("q") for datos in respuesta)
+            for usuario in range(len(mas)):
+                ids = self._candidatos[preferencias[usuario]]
+                suyos = tramos[limites[usuario]:limites[usuario + 1]]
+                if cantidad is not None: # páginas cortas: arma solo los perros de la página
+                    perros, completos = armar(ids[suyos[0]:suyos[-1]]) if suyos else [], False
+                    suyos = [posicion - suyos[0] for posicion in suyos]
+                elif preferencias[usuario] in armados:
+                    perros, completos = armados[preferencias[usuario]]
+                else:
+                    perros = armar(ids)
+                    perros, completos = armados[preferencias[usuario]] = perros, None not in perros
+                if len(suyos) == 2:
+                    sugerencias = perros[suyos[0]:suyos[1]]
+                else:
+                    sugerencias = list(chain.from_iterable(perros[suyos[i]:suyos[i + 1]] for i in range(0, len(suyos), 2)))
+                if not completos:
+                    sugerencias = [perro for perro in sugerencias if perro is not None]
+                yield desde + usuario, sugerencias, ids[tramos[limites[usuario + 1] - 1] - 1] if mas[usuario] else None
+
+    def cerrar(self):
+        self._ejecutor.shutdown(wait=True, cancel_futures=True)
+        self.instantanea.cerrar()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        self.cerrar()
+
+
+if __name__ == "__main__":
+    from modules.perro import Perro, Raza
+    from modules.usuario import UsuarioAdoptante
+    from modules.sistema import SistemaAdopcion
+
+    sistema = SistemaAdopcion()
+    labrador, caniche = Raza("Labrador", "L"), Raza("Caniche", "S")
+    sistema.registrar_razas([labrador, caniche])
+    sistema.registrar_perros([Perro(f"Perro {i}", i % 10, 10, "MF"[i % 2], (labrador, caniche)[i % 2], True, False)
+                              for i in range(30)])
+    sistema.registrar_usuarios([UsuarioAdoptante("Tito", "11111111", "tito@mail.com", pref_tamanio="L"),
+                                UsuarioAdoptante("Ana", "22222222", "ana@mail.com", pref_raza="caniche", pref_edad=1),
+                                UsuarioAdoptante("Luz", "33333333", "luz@mail.com")])
+    sistema.reservar(1, "33333333")
+    sistema.adoptar(1, "33333333")
+    for usuario, sugerencias, historial in sistema.obtener_reporte_usuarios(cantidad=5, procesos=2):
+        print(usuario.nombre, [perro.id for perro in sugerencias], sugerencias.siguiente, [perro.id for perro in historial])
+        assert sugerencias == sistema.obtener_sugerencias_perros(usuario, None, 5)
@@ -0,0 +1,494 @@
+if __name__ == "__main__":
+    import sys
+    import os
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import os
+import zlib
+import threading
+import multiprocessing
+from heapq import merge
+from contextlib import contextmanager
+from modules.perro import Perro, Raza
+from modules.usuario import Usuario, UsuarioAdoptante
+from modules.almacenamiento import COLUMNAS, raza_a_fila, perro_a_fila, usuario_a_fila, fila_a_raza, fila_a_perro, fila_a_usuario
+from modules.concurrencia import Candados
+from modules.paginacion import Pagina, POR_PAGINA, validar_cantidad
+
+# Cada partición es un proceso con su propio SistemaAdopcion que guarda a los usuarios y perros de algunos
+# refugios. Habla con el enrutador (SistemaParticionado) por un Pipe:
+# pedido:    (accion, *argumentos)
+# respuesta: (True, resultado) o (False, excepción)
+# Los objetos viajan como filas (ver modules.almacenamiento): tuplas chicas y rápidas de serializar.
+#
+# Consistencia: un perro reservado o adoptado vive siempre en la partición de su adoptante. Así cada reserva,
+# adopción, devolución o eliminación en cascada ocurre dentro de un solo SistemaAdopcion, con sus candados
+# y su transacción. Reservar un perro de otra partición primero lo muda (solo si está disponible).
+
+def particion_de(refugio:str, particiones:int):
+    '''Número de partición de un refugio (o región): el mismo para la misma clave, sin importar mayúsculas'''
+    if not isinstance(refugio, str) or not refugio.strip():
+        raise ValueError("El refugio debe ser un string no vacío")
+    return zlib.crc32(refugio.strip().lower().encode()) % particiones
+
+def fila_a_dict(tabla:str, fila):
+    return dict(zip(COLUMNAS[tabla], fila))
+
+
+class Particion:
+    '''Lado del proceso de una partición: resuelve los pedidos del enrutador sobre su SistemaAdopcion'''
+    ACCIONES = ("claves", "registrar_razas", "registrar_usuarios", "registrar_perros", "buscar_perro", "buscar_usuario",
+                "eliminar_perros", "eliminar_usuarios", "puede_reservar", "extraer_perro", "reservar", "adoptar",
+                "devolver", "estado", "contar", "sugerencias")
+
+    def __init__(self, sistema):
+        self.sistema = sistema
+
+    def responder(self, pedido:tuple):
+        accion, *argumentos = pedido
+        if accion not in self.ACCIONES:
+            raise ValueError(f"Acción desconocida: '{accion}'. Opciones: {list(self.ACCIONES)}")
+        return getattr(self, "_" + accion)(*argumentos)
+
+    def _claves(self):
+        '''IDs de perros, DNI de usuarios y nombres de razas guardados (para armar el directorio del enrutador)'''
+        sistema = self.sistema
+        return ([perro.id for perro in sistema.perros], [usuario.dni for usuario in sistema.usuarios],
+                [raza.nombre for raza in sistema.razas], sistema.id_proximo_perro)
+
+    def _registrar_razas(self, filas:list):
+        return [raza.nombre for raza in self.sistema.registrar_razas([fila_a_raza(fila) for fila in filas])]
+
+    def _registrar_usuarios(self, filas:list):
+        self.sistema.registrar_usuarios([fila_a_usuario(fila) for fila in filas])
+
+    def _registrar_perros(self, filas:list):
+        buscar_raza = self.sistema.buscar_raza
+        self.sistema.registrar_perros([fila_a_perro(fila, buscar_raza(fila[5], False) or Raza(fila[5])) for fila in filas])
+
+    def _buscar_perro(self, id_perro:int):
+        return perro_a_fila(self.sistema.buscar_perro(id_perro))
+
+    def _buscar_usuario(self, dni:str):
+        return usuario_a_fila(self.sistema.buscar_usuario(dni))
+
+    def _eliminar_perros(self, ids:list[int]):
+        self.sistema.eliminar_perros(ids)
+
+    def _eliminar_usuarios(self, dnis:list[str]):
+        '''Elimina a los usuarios con sus perros y retorna los IDs de los perros eliminados'''
+        sistema = self.sistema
+        ids = set()
+        for dni in dnis:
+            usuario = sistema.buscar_usuario(dni)
+            ids.update(usuario.historial_adopciones)
+            ids.add(usuario.reserva)
+            ids.update(perro.id for perro in sistema.obtener_perros_adoptante(dni))
+        ids = [id_perro for id_perro in ids if id_perro is not None and sistema.buscar_perro(id_perro, False)]
+        sistema.eliminar_usuarios(dnis)
+        return ids
+
+    def _puede_reservar(self, id_perro:int, dni:str):
+        return self.sistema.buscar_usuario(dni).puede_reservar(id_perro)
+
+    def _extraer_perro(self, id_perro:int):
+        '''Quita un perro disponible (para mudarlo a otra partición) y retorna su fila'''
+        perro = self.sistema.buscar_perro(id_perro)
+        if perro.estado != "disponible":
+            raise ValueError("No puede reservar teniendo una reserva previa")
+        fila = perro_a_fila(perro)
+        self.sistema.eliminar_perros([perro])
+        return fila
+
+    def _reservar(self, id_perro:int, dni:str):
+        return self.sistema.reservar(id_perro, dni)
+
+    def _adoptar(self, id_perro:int, dni:str):
+        return self.sistema.adoptar(id_perro, dni)
+
+    def _devolver(self, id_perro:int, dni:str):
+        return self.sistema.devolver(id_perro, dni)
+
+    def _estado(self, estado:str, despues:int|None, cantidad:int):
+        pagina = self.sistema.obtener_estado_perros(estado, despues, cantidad)
+        return [perro_a_fila(perro) for perro in pagina], pagina.siguiente
+
+    def _contar(self, estado:str):
+        return self.sistema.contar_estado_perros(estado)
+
+    def _sugerencias(self, fila_usuario, despues:int|None, cantidad:int):
+        '''Sugerencias para un usuario que puede ser de otra partición (se recibe su fila)'''
+        usuario = fila_a_usuario(fila_usuario)
+        pagina = self.sistema.obtener_sugerencias_preferencias(usuario.preferencias, usuario.historial_adopciones, despues, cantidad)
+        return [perro_a_fila(perro) for perro in pagina], pagina.siguiente
+
+
+def _trabajar(conexion, numero:int, almacenamiento):
+    '''Bucle del proceso de una partición: atiende pedidos hasta recibir None o perder la conexión'''
+    from modules.sistema import SistemaAdopcion
+    sistema = SistemaAdopcion(almacenamiento(numero) if almacenamiento else None)
+    particion = Particion(sistema)
+    try:
+        while True:
+            try:
+                pedido = conexion.recv()
+            except EOFError:
+                break
+            if pedido is None:
+                break
+            try:
+                respuesta = (True, particion.responder(pedido))
+            except Exception as e:
+                respuesta = (False, e)
+            try:
+                conexion.send(respuesta)
+            except Exception as e: # la excepción no se pudo serializar: viaja solo el mensaje
+                conexion.send((False, ValueError(f"{type(e).__name__}: {e}")))
+    finally:
+        sistema.cerrar()
+        conexion.close()
+
+
+class SistemaParticionado:
+    '''Enrutador de un despliegue en varios procesos: reparte usuarios y perros por refugio (o región) entre
+    particiones (ver particion_de) y reparte cada operación a la partición que corresponde. Las consultas
+    globales se piden a todas las particiones a la vez y se mezclan por ID.
+
+    Los resultados son diccionarios con los datos de cada perro o usuario (como los del servidor de red),
+    no objetos: los objetos viven en los procesos de las particiones. Es seguro entre hilos.
+
+    almacenamiento(numero) -> Almacenamiento: crea el almacenamiento de cada partición (en su proceso; con
+    el método "spawn" tiene que poder serializarse, ej: una función del módulo). Por defecto, en memoria'''
+
+    def __init__(self, particiones:int|None=None, almacenamiento=None, metodo:str|None=None):
+        self.particiones = particiones or os.cpu_count() or 1
+        contexto = multiprocessing.get_context(metodo)
+        self._conexiones = []
+        self._procesos = []
+        for numero in range(self.particiones):
+            propia, ajena = contexto.Pipe()
+            proceso = contexto.Process(target=_trabajar, args=(ajena, numero, almacenamiento), name=f"particion-{numero}", daemon=True)
+            proceso.start()
+            ajena.close()
+            self._conexiones.append(propia)
+            self._procesos.append(proceso)
+        # Una conversación a la vez por partición; las consultas globales las toman todas (siempre en orden)
+        self._candados_particion = [threading.Lock() for _ in range(self.particiones)]
+        # Candados por perro y por usuario: un perro no se muda ni se reserva dos veces a la vez
+        self._candados = Candados()
+        # Directorio (se protege con _guardia, nunca mientras se espera a una partición): dónde vive cada perro y cada usuario
+        self._guardia = threading.Lock()
+        self._candado_razas = threading.Lock() # registra una tanda de razas a la vez
+        self._perros = bytearray()    # ID -> partición + 1 (0: no existe). Un byte por perro
+        self._usuarios:dict[str, int] = {} # DNI -> partición
+        self._razas:set[str] = set()  # razas registradas (todas las particiones las tienen)
+        self.id_proximo_perro = 1
+        for numero, (ids, dnis, razas, proximo) in self._pedir({numero: ("claves",) for numero in range(self.particiones)}).items():
+            self._ubicar_perros(ids, numero)
+            self._usuarios.update(dict.fromkeys(dnis, numero))
+            self._razas.update(razas)
+            self.id_proximo_perro = max(self.id_proximo_perro, proximo)
+
+    def cerrar(self):
+        '''Termina los procesos de las particiones (cada una cierra su almacenamiento)'''
+        for numero, conexion in enumerate(self._conexiones):
+            with self._candados_particion[numero]:
+                if not conexion.closed:
+                    conexion.send(None)
+                    conexion.close()
+        for proceso in self._procesos:
+            proceso.join()
+
+    # Comunicación con las particiones
+    @contextmanager
+    def _tomar_particiones(self, *numeros:int):
+        tomados = []
+        try:
+            for numero in sorted(set(numeros)):
+                self._candados_particion[numero].acquire()
+                tomados.append(numero)
+            yield
+        finally:
+            for numero in reversed(tomados):
+                self._candados_particion[numero].release()
+
+    def _enviar(self, pedidos:dict[int, tuple]):
+        '''Envía un pedido a cada partición y después espera todas las respuestas (trabajan en paralelo).
+        Hay que tener tomadas esas particiones. Si alguna falla, lanza su excepción (después de leer todas)'''
+        for numero, pedido in pedidos.items():
+            self._conexiones[numero].send(pedido)
+        respuestas = {numero: self._conexiones[numero].recv() for numero in pedidos}
+        for ok, resultado in respuestas.values():
+            if not ok:
+                raise resultado
+        return {numero: resultado for numero, (_, resultado) in respuestas.items()}
+
+    def _pedir(self, pedidos:dict[int, tuple]):
+        with self._tomar_particiones(*pedidos):
+            return self._enviar(pedidos)
+
+    def _llamar(self, numero:int, accion:str, *argumentos):
+        return self._pedir({numero: (accion, *argumentos)})[numero]
+
+    def _a_todas(self, accion:str, *argumentos):
+        return self._pedir({numero: (accion, *argumentos) for numero in range(self.particiones)})
+
+    # Directorio
+    def particion(self, refugio:str):
+        '''Partición donde se guardan los usuarios y perros de un refugio'''
+        return particion_de(refugio, self.particiones)
+
+    def _ubicar_perros(self, ids, numero:int|None):
+        '''Anota en el directorio la partición de los perros (None: ya no existen)'''
+        valor = 0 if numero is None else numero + 1
+        for id_perro in ids:
+            if id_perro >= len(self._perros):
+                self._perros.extend(bytes(max(id_perro + 1 - len(self._perros), len(self._perros) // 2)))
+            self._perros[id_perro] = valor
+
+    def _existe_perro(self, id_perro:int):
+        return 0 < id_perro < len(self._perros) and self._perros[id_perro] != 0
+
+    def particion_perro(self, id_perro:int):
+        '''Partición donde vive un perro. ValueError si no está registrado'''
+        if not isinstance(id_perro, int) or isinstance(id_perro, bool):
+            raise TypeError("El ID debe ser de tipo entero")
+        if self._existe_perro(id_perro):
+            return self._perros[id_perro] - 1
+        raise ValueError("No se encontró al perro en el sistema")
+
+    def particion_usuario(self, dni:str|int):
+        '''Partición donde vive un usuario. ValueError si no está registrado'''
+        numero = self._usuarios.get(Usuario.validar_dni(dni))
+        if numero is None:
+            raise ValueError("No se encontró al usuario en el sistema")
+        return numero
+
+    def _numeros(self, objetos:list, refugios:str|list[str]):
+        '''Partición de cada objeto según su refugio (un refugio para todos o una lista con uno por objeto)'''
+        if isinstance(refugios, str):
+            return [self.particion(refugios)] * len(objetos)
+        if len(refugios) != len(objetos):
+            raise ValueError("Debe indicar un refugio por cada objeto")
+        return [self.particion(refugio) for refugio in refugios]
+
+    # Registrar
+    def registrar_raza(self, raza:Raza):
+        '''Registra una raza en todas las particiones (las razas se comparten). ValueError si ya existe'''
+        if self.registrar_razas([raza]):
+            raise ValueError(f"Ya existe la raza {raza.nombre}")
+        return fila_a_dict("razas", raza_a_fila(raza))
+
+    def registrar_razas(self, razas:list[Raza]):
+        '''Registra varias razas en todas las particiones. Retorna las no registradas por repetidas'''
+        for raza in razas:
+            if not isinstance(raza, Raza):
+                raise TypeError("Debe ingresar objetos de la clase 'Raza'")
+        with self._candado_razas:
+            nuevas = {raza.nombre: raza for raza in razas if raza.nombre not in self._razas}
+            if nuevas:
+                self._a_todas("registrar_razas", [raza_a_fila(raza) for raza in nuevas.values()])
+                self._razas.update(nuevas)
+        return [raza for raza in razas if nuevas.get(raza.nombre) is not raza]
+
+    def registrar_usuario(self, usuario:UsuarioAdoptante, refugio:str):
+        '''Registra un usuario en la partición de su refugio. ValueError si ya existe el DNI (en cualquier partición)'''
+        if self.registrar_usuarios([usuario], refugio):
+            raise ValueError(f"Ya existe un usuario con DNI {usuario.dni}")
+        return fila_a_dict("usuarios", usuario_a_fila(usuario))
+
+    def registrar_usuarios(self, usuarios:list[UsuarioAdoptante], refugios:str|list[str]):
+        '''Registra varios usuarios, cada uno en la partición de su refugio (todas a la vez).
+        Retorna los no registrados por tener un DNI repetido'''
+        for usuario in usuarios:
+            if not isinstance(usuario, UsuarioAdoptante):
+                raise TypeError("Debe ingresar objetos de la clase 'UsuarioAdoptante'")
+        numeros = self._numeros(usuarios, refugios)
+        grupos:dict[int, list[UsuarioAdoptante]] = {}
+        repetidos = []
+        with self._guardia: # reserva los DNI en el directorio (si falla el registro, se liberan)
+            for usuario, numero in zip(usuarios, numeros):
+                if usuario.dni in self._usuarios:
+                    repetidos.append(usuario)
+                else:
+                    self._usuarios[usuario.dni] = numero
+                    grupos.setdefault(numero, []).append(usuario)
+        try:
+            self._pedir({numero: ("registrar_usuarios", [usuario_a_fila(usuario) for usuario in grupo]) for numero, grupo in grupos.items()})
+        except BaseException:
+            with self._guardia:
+                for grupo in grupos.values():
+                    for usuario in grupo:
+                        self._usuarios.pop(usuario.dni, None)
+            raise
+        return repetidos
+
+    def registrar_perro(self, perro:Perro, refugio:str):
+        '''Registra un perro en la partición de su refugio, le asigna ID y retorna sus datos'''
+        if self.registrar_perros([perro], refugio):
+            raise ValueError(f"Ya existe un perro con ID {perro.id}")
+        return fila_a_dict("perros", perro_a_fila(perro))
+
+    def registrar_perros(self, perros:list[Perro], refugios:str|list[str]):
+        '''Registra varios perros, cada uno en la partición de su refugio (todas a la vez), y les asigna ID
+        a los que no tienen. Un perro reservado o adoptado va a la partición de su adoptante.
+        Retorna los no registrados por tener un ID repetido'''
+        for perro in perros:
+            if not isinstance(perro, Perro):
+                raise TypeError("Debe ingresar objetos de la clase 'Perro'")
+        self.registrar_razas(list({perro.raza.nombre: perro.raza for perro in perros}.values()))
+        numeros = self._numeros(perros, refugios)
+        grupos:dict[int, list[Perro]] = {}
+        repetidos = []
+        with self._guardia: # asigna los IDs y los reserva en el directorio (si falla el registro, se liberan)
+            vistos = set()
+            for perro, numero in zip(perros, numeros):
+                if perro.id and (perro.id in vistos or self._existe_perro(perro.id)):
+                    repetidos.append(perro)
+                    continue
+                if not perro.id:
+                    perro.id = self.id_proximo_perro
+                self.id_proximo_perro = max(self.id_proximo_perro, perro.id + 1)
+                vistos.add(perro.id)
+                destino = self._usuarios.get(perro.adoptante, numero) if perro.adoptante else numero
+                grupos.setdefault(destino, []).append(perro)
+            for numero, grupo in grupos.items():
+                self._ubicar_perros([perro.id for perro in grupo], numero)
+        try:
+            self._pedir({numero: ("registrar_perros", [perro_a_fila(perro) for perro in grupo]) for numero, grupo in grupos.items()})
+        except BaseException:
+            with self._guardia:
+                for grupo in grupos.values():
+                    self._ubicar_perros([perro.id for perro in grupo], None)
+            raise
+        return repetidos
+
+    # Buscar y eliminar
+    def buscar_perro(self, id_perro:int):
+        '''Datos de un perro. ValueError si no está registrado'''
+        with self._candados.tomar(("perro", id_perro)): # no se está mudando
+            if not isinstance(id_perro, int) or not self._existe_perro(id_perro):
+                raise ValueError(f"No se encontró '{id_perro}'. Intente nuevamente")
+            return fila_a_dict("perros", self._llamar(self.particion_perro(id_perro), "buscar_perro", id_perro))
+
+    def buscar_usuario(self, dni:str|int):
+        '''Datos de un usuario. ValueError si no está registrado'''
+        dni = Usuario.validar_dni(dni)
+        if dni not in self._usuarios:
+            raise ValueError(f"No se encontró '{dni}'. Intente nuevamente")
+        return fila_a_dict("usuarios", self._llamar(self._usuarios[dni], "buscar_usuario", dni))
+
+    def eliminar_perro(self, id_perro:int):
+        self.eliminar_perros([id_perro])
+
+    def eliminar_usuario(self, dni:str|int):
+        self.eliminar_usuarios([dni])
+
+    def eliminar_perros(self, ids:list[int]):
+        '''Elimina varios perros (ver SistemaAdopcion.eliminar_perros). Cada partición los elimina todos o ninguno'''
+        with self._candados.tomar(*(("perro", id_perro) for id_perro in ids)):
+            grupos:dict[int, list[int]] = {}
+            for id_perro in ids:
+                grupos.setdefault(self.particion_perro(id_perro), []).append(id_perro)
+            self._pedir({numero: ("eliminar_perros", grupo) for numero, grupo in grupos.items()})
+            with self._guardia:
+                self._ubicar_perros(ids, None)
+
+    def eliminar_usuarios(self, dnis:list[str|int]):
+        '''Elimina varios usuarios con todos sus perros (que viven en su misma partición)'''
+        dnis = [Usuario.validar_dni(dni) for dni in dnis]
+        with self._candados.tomar(*(("usuario", dni) for dni in dnis)):
+            grupos:dict[int, list[str]] = {}
+            for dni in dnis:
+                grupos.setdefault(self.particion_usuario(dni), []).append(dni)
+            eliminados = self._pedir({numero: ("eliminar_usuarios", grupo) for numero, grupo in grupos.items()})
+            with self._guardia:
+                for numero, ids in eliminados.items():
+                    self._ubicar_perros(ids, None)
+                for dni in dnis:
+                    self._usuarios.pop(dni, None)
+
+    # Adopciones
+    def reservar(self, id_perro:int, dni:str|int):
+        '''Reserva un perro para un usuario. Si el perro es de otra partición y está disponible, primero lo muda
+        a la del usuario (la mudanza toma las dos particiones: ninguna consulta global lo ve dos veces ni lo pierde)'''
+        dni = Usuario.validar_dni(dni)
+        with self._candados.tomar(("perro", id_perro), ("usuario", dni)):
+            origen, destino = self.particion_perro(id_perro), self.particion_usuario(dni)
+            if origen != destino:
+                if not self._llamar(destino, "puede_reservar", id_perro, dni):
+                    raise ValueError("No puede reservar teniendo una reserva previa")
+                with self._tomar_particiones(origen, destino):
+                    fila = self._enviar({origen: ("extraer_perro", id_perro)})[origen]
+                    try:
+                        self._enviar({destino: ("registrar_perros", [fila])})
+                    except BaseException:
+                        self._enviar({origen: ("registrar_perros", [fila])}) # vuelve a su partición
+                        raise
+                with self._guardia: # (mientras tanto nadie lo busca: el candado del perro sigue tomado)
+                    self._ubicar_perros([id_perro], destino)
+            return self._llamar(destino, "reservar", id_perro, dni)
+
+    def adoptar(self, id_perro:int, dni:str|int):
+        '''Adopta un perro reservado por el usuario (ya vive en su partición)'''
+        return self._entre_duenios("adoptar", id_perro, dni, "No puede adoptar sin una reserva")
+
+    def devolver(self, id_perro:int, dni:str|int):
+        '''Devuelve un perro reservado o adoptado por el usuario. Queda disponible en la partición del usuario'''
+        return self._entre_duenios("devolver", id_perro, dni, "No puede devolver perros ajenos...")
+
+    def _entre_duenios(self, accion:str, id_perro:int, dni:str|int, error:str):
+        dni = Usuario.validar_dni(dni)
+        with self._candados.tomar(("perro", id_perro), ("usuario", dni)):
+            numero = self.particion_usuario(dni)
+            if self.particion_perro(id_perro) != numero: # si fuera suyo, viviría en su partición
+                raise ValueError(error)
+            return self._llamar(numero, accion, id_perro, dni)
+
+    # Consultas globales (todas las particiones a la vez)
+    def obtener_estado_perros(self, estado:str, despues:int|None=None, cantidad:int=POR_PAGINA):
+        '''Página de perros en un estado, de todas las particiones, ordenada por ID (ver modules.paginacion)'''
+        validar_cantidad(cantidad)
+        return self._mezclar(self._a_todas("estado", estado, despues, cantidad), cantidad)
+
+    def contar_estado_perros(self, estado:str):
+        return sum(self._a_todas("contar", estado).values())
+
+    def obtener_sugerencias_perros(self, dni:str|int, despues:int|None=None, cantidad:int=POR_PAGINA, todos_los_refugios:bool=False):
+        '''Página de perros sugeridos para un usuario, ordenada por ID. Con todos_los_refugios=True busca en
+        todas las particiones (el usuario acepta adoptar de cualquier refugio); si no, solo en la suya'''
+        validar_cantidad(cantidad)
+        numero = self.particion_usuario(dni)
+        fila = self._llamar(numero, "buscar_usuario", Usuario.validar_dni(dni))
+        numeros = range(self.particiones) if todos_los_refugios else (numero,)
+        return self._mezclar(self._pedir({numero: ("sugerencias", fila, despues, cantidad) for numero in numeros}), cantidad)
+
+    @staticmethod
+    def _mezclar(paginas:dict[int, tuple], cantidad:int):
+        '''Une las páginas de cada partición (ya ordenadas por ID) en una sola página de `cantidad` perros'''
+        filas = list(merge(*(filas for filas, _ in paginas.values())))[:cantidad + 1]
+        quedan = len(filas) > cantidad or any(siguiente is not None for _, siguiente in paginas.values())
+        filas = filas[:cantidad]
+        return Pagina([fila_a_dict("perros", fila) for fila in filas], filas[-1][0] if quedan and filas else None)
+
+
+if __name__ == "__main__":
+    sistema = SistemaParticionado(2)
+    labrador = Raza("Labrador", "L", "Amigable")
+    sistema.registrar_usuario(UsuarioAdoptante("Tito", "11111111", "tito@mail.com", pref_tamanio="L"), "Refugio Norte")
+    sistema.registrar_usuario(UsuarioAdoptante("Ana", "22222222", "ana@mail.com"), "Refugio Centro")
+    perros = [Perro(nombre, 3, 20, "M", labrador, True, False) for nombre in ("Firulais", "Rocco", "Luna", "Toby")]
+    sistema.registrar_perros(perros, ["Refugio Norte", "Refugio Centro", "Refugio Centro", "Refugio Norte"])
+    print("Particiones de los perros:", {perro.nombre: sistema.particion_perro(perro.id) for perro in perros})
+    print("Sugerencias de Tito (todos los refugios):",
+          [perro["nombre"] for perro in sistema.obtener_sugerencias_perros("11111111", cantidad=10, todos_los_refugios=True)])
+    otra = next(perro for perro in perros if sistema.particion_perro(perro.id) != sistema.particion_usuario("11111111"))
+    print(f"Tito reserva a {otra.nombre} (de otra partición):", sistema.reservar(otra.id, "11111111"))
+    print(f"{otra.nombre} ahora vive en la partición", sistema.particion_perro(otra.id))
+    try:
+        sistema.reservar(otra.id, "22222222")
+    except ValueError as e:
+        print("Ana intenta reservarlo:", e)
+    print("Adoptar:", sistema.adoptar(otra.id, "11111111"))
+    print("Disponibles:", [perro["nombre"] for perro in sistema.obtener_estado_perros("disponible")])
+    print("Adoptados:", [perro["nombre"] for perro in sistema.obtener_estado_perros("adoptado")])
+    sistema.cerrar()
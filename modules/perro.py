@@ -1,4 +1,11 @@
-class Raza:
+if __name__ == "__main__":
+    import sys
+    import os
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modules.observable import Observable
+
+class Raza(Observable):
+    __slots__ = ("nombre", "tamanio", "temperamento") # sin __dict__: menos memoria por instancia
     TAMANIOS = {
         'S':'Pequeño',
         'M':'Mediano',
@@ -7,6 +14,7 @@ class Raza:
     }
 
     def __init__(self, nombre:str, tamanio:str="", temperamento:str=""):
+        super().__init__() # Observable (avisa cambios al sistema)
         self.nombre = self.validar_nombre(nombre)
         self.temperamento = self.validar_temperamento(temperamento)
         self.tamanio = self.validar_tamanio(tamanio)
@@ -44,10 +52,14 @@ class Raza:
 
     # Cambiar atributos
     def cambiar_temperamento(self, temperamento):
+        anterior = self.temperamento
         self.temperamento = self.validar_temperamento(temperamento)
+        self.notificar("temperamento", anterior)
 
     def cambiar_tamanio(self, tamanio):
+        anterior = self.tamanio
         self.tamanio = self.validar_tamanio(tamanio)
+        self.notificar("tamanio", anterior)
 
     def __str__(self):
         tamanio, temperamento = ("Sorpresa!", "Sorpresa!")
@@ -58,7 +70,8 @@ class Raza:
         return f"Raza: {self.nombre}\nTamaño: {tamanio}\nTemperamento: {temperamento}"
 
 
-class Perro:
+class Perro(Observable):
+    __slots__ = ("nombre", "id", "edad", "peso", "sexo", "raza", "vacunado", "discapacitado", "estado", "adoptante")
     SEXOS = {
         'M':'Macho',
         'F':'Hembra'
@@ -69,9 +82,10 @@ class Perro:
     #     'A':'Adulto',
     #     'M':'Adulto Mayor',
     # }
-    # ESTADOS = ("disponible", "reservado", "adoptado")
+    ESTADOS = ("disponible", "reservado", "adoptado")
 
     def __init__(self, nombre:str, edad:int|str, peso:float|str, sexo:str, raza:Raza, vacunado:bool, discapacitado:bool, id:int|None=None):
+        super().__init__() # Observable (avisa cambios al sistema)
         self.nombre = self.validar_nombre(nombre)
         self.id = self.validar_id(id)
         self.edad = self.validar_edad(edad)
@@ -149,25 +163,39 @@ class Perro:
 
     # Cambiar Atributos
     def cambiar_nombre(self, nombre:str):
+        anterior = self.nombre
         self.nombre = self.validar_nombre(nombre)
+        self.notificar("nombre", anterior)
 
     def cambiar_edad(self, edad:int):
+        anterior = self.edad
         self.edad = self.validar_edad(edad)
+        self.notificar("edad", anterior)
 
     def cambiar_peso(self, peso:float):
+        anterior = self.peso
         self.peso = self.validar_peso(peso)
+        self.notificar("peso", anterior)
 
     def cambiar_sexo(self, sexo:str):
+        anterior = self.sexo
         self.sexo = self.validar_sexo(sexo)
+        self.notificar("sexo", anterior)
 
     def cambiar_raza(self, raza:Raza):
+        anterior = self.raza
         self.raza = self.validar_raza(raza)
+        self.notificar("raza", anterior)
 
     def cambiar_vacunado(self, vacunado:bool):
+        anterior = self.vacunado
         self.vacunado = self.validar_vacunado(vacunado)
+        self.notificar("vacunado", anterior)
 
     def cambiar_discapacitado(self, discapacitado:bool):
+        anterior = self.discapacitado
         self.discapacitado = self.validar_discapacitado(discapacitado)
+        self.notificar("discapacitado", anterior)
 
     # verificar estado
     def puede_adoptar(self, dni_usuario:str):
@@ -192,24 +220,32 @@ class Perro:
     def adoptar(self, dni_usuario:str):
         '''Guarda DNI de adoptante y cambia estado a "adoptado"'''
         if self.puede_adoptar(dni_usuario):
+            anterior = self.estado
             self.adoptante = dni_usuario
             self.estado = "adoptado"
+            self.notificar("estado", anterior)
             return True
         return False
 
     def reservar(self, dni_usuario:str):
         '''Guarda DNI de posible adoptante y cambia estado a "reservado"'''
         if self.puede_reservar(dni_usuario):
+            anterior, adoptante_anterior = self.estado, self.adoptante
             self.adoptante = dni_usuario
             self.estado = "reservado"
+            self.notificar("adoptante", adoptante_anterior)
+            self.notificar("estado", anterior)
             return True
         return False
 
     def devolver(self, dni_usuario:str):
         '''Remueve DNI de adoptante y cambia estado a "disponible"'''
         if self.puede_devolver(dni_usuario):
+            anterior, adoptante_anterior = self.estado, self.adoptante
             self.adoptante = None
             self.estado = "disponible"
+            self.notificar("adoptante", adoptante_anterior)
+            self.notificar("estado", anterior)
             return True
         return False
 
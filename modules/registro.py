@@ -0,0 +1,114 @@
+if __name__ == "__main__":
+    import sys
+    import os
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from modules.sistema import SistemaAdopcion
+
+# Un sistema por inquilino (ej: una organización con sus refugios), cada uno con sus datos, su almacenamiento
+# y sus candados. Nada se comparte entre sistemas: se pueden cargar y consultar en paralelo sin esperarse.
+
+
+def validar_nombre(nombre:str):
+    if not isinstance(nombre, str) or not nombre.strip():
+        raise ValueError("El nombre del inquilino debe ser un string no vacío")
+    return nombre.strip()
+
+
+class RegistroSistemas:
+    '''Crea, guarda y cierra un SistemaAdopcion por inquilino.
+    fabrica(nombre) arma el sistema de un inquilino la primera vez que se pide (por defecto, uno nuevo en memoria),
+    ej: lambda nombre: SistemaAdopcion(AlmacenamientoSQLite(f"datos/{nombre}.db")).
+    Usado con `with`, cierra todos los sistemas al salir.'''
+    def __init__(self, fabrica=None, hilos:int|None=None):
+        self._fabrica = fabrica or (lambda nombre: SistemaAdopcion())
+        self._hilos = hilos # hilos de calentar y en_paralelo (None: los que elija ThreadPoolExecutor)
+        self._sistemas:dict[str, SistemaAdopcion] = {}
+        self._armando:dict[str, threading.Lock] = {} # nombre -> candado mientras la fábrica arma su sistema
+        self._guardia = threading.Lock() # solo protege los dos diccionarios (nunca se tiene mientras se arma uno)
+
+    def obtener(self, nombre:str):
+        '''Retorna el sistema del inquilino, armándolo si es la primera vez.
+        Armar uno (ej: abrir su base) no frena a los que piden otros inquilinos'''
+        nombre = validar_nombre(nombre)
+        sistema = self._sistemas.get(nombre)
+        if sistema is not None:
+            return sistema
+        with self._guardia:
+            candado = self._armando.setdefault(nombre, threading.Lock())
+        with candado:
+            sistema = self._sistemas.get(nombre)
+            if sistema is None: # nadie lo armó mientras se esperaba
+                sistema = self._fabrica(nombre)
+                with self._guardia:
+                    self._sistemas[nombre] = sistema
+                    self._armando.pop(nombre, None)
+        return sistema
+
+    def __getitem__(self, nombre:str):
+        return self.obtener(nombre)
+
+    def __contains__(self, nombre:str):
+        return isinstance(nombre, str) and nombre.strip() in self._sistemas
+
+    def __len__(self):
+        return len(self._sistemas)
+
+    def nombres(self):
+        '''Inquilinos con el sistema ya armado (ordenados)'''
+        with self._guardia:
+            return sorted(self._sistemas)
+
+    def cerrar(self, nombre:str):
+        '''Cierra el sistema de un inquilino y lo quita del registro (si se vuelve a pedir, se arma de nuevo)'''
+        nombre = validar_nombre(nombre)
+        with self._guardia:
+            sistema = self._sistemas.pop(nombre, None)
+        if sistema is None:
+            raise ValueError(f"El inquilino '{nombre}' no tiene un sistema abierto")
+        sistema.cerrar()
+
+    def cerrar_todos(self):
+        with self._guardia:
+            sistemas, self._sistemas = list(self._sistemas.values()), {}
+        for sistema in sistemas:
+            sistema.cerrar()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        self.cerrar_todos()
+
+    # Varios inquilinos a la vez
+    def en_paralelo(self, funcion, nombres:list[str]|None=None):
+        '''Corre funcion(sistema) para cada inquilino (por defecto, los ya armados) en un grupo de hilos.
+        Retorna {nombre: resultado}. Si alguna falla, espera a las demás y lanza la excepción de la primera que falló'''
+        nombres = self.nombres() if nombres is None else [validar_nombre(nombre) for nombre in nombres]
+        with ThreadPoolExecutor(self._hilos, thread_name_prefix="registro") as ejecutor:
+            tareas = [ejecutor.submit(lambda nombre: funcion(self.obtener(nombre)), nombre) for nombre in nombres]
+        return {nombre: tarea.result() for nombre, tarea in zip(nombres, tareas)}
+
+    def calentar(self, nombres:list[str], busqueda:bool=False, columnas:bool=False):
+        '''Arma los sistemas de estos inquilinos y trae a memoria sus datos en paralelo (ver SistemaAdopcion.calentar).
+        Conviene con un almacenamiento que suelte el GIL mientras lee (ej: SQLite)'''
+        self.en_paralelo(lambda sistema: sistema.calentar(busqueda, columnas), nombres)
+
+
+if __name__ == "__main__":
+    from modules.perro import Perro, Raza
+    from modules.usuario import UsuarioAdoptante
+
+    with RegistroSistemas() as registro:
+        for nombre, perros in (("Refugio Norte", 3), ("Refugio Centro", 5)):
+            sistema = registro[nombre]
+            raza = sistema.registrar_raza(Raza("Mestizo", "M"))
+            sistema.registrar_usuario(UsuarioAdoptante("Tito", "11111111", "tito@mail.com"))
+            sistema.registrar_perros([Perro(f"Perro {i}", i, 10, "MF"[i % 2], raza, True, False) for i in range(perros)])
+        registro.calentar(["Refugio Norte", "Refugio Centro"], busqueda=True)
+        print("Inquilinos:", registro.nombres())
+        # Los mismos IDs y DNI en cada inquilino, sin mezclarse
+        print("Reservar:", registro.en_paralelo(lambda sistema: sistema.reservar(1, "11111111")))
+        print("Disponibles:", registro.en_paralelo(lambda sistema: sistema.contar_estado_perros("disponible")))
+        print("Compartido:", SistemaAdopcion.unico() is SistemaAdopcion.unico(), SistemaAdopcion() is SistemaAdopcion())
@@ -0,0 +1,221 @@
+if __name__ == "__main__":
+    import sys
+    import os
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import json
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from modules.perro import Perro, Raza
+from modules.usuario import UsuarioAdoptante
+from modules.almacenamiento import COLUMNAS, raza_a_fila, perro_a_fila, usuario_a_fila
+from modules.importacion import validar_bool, validar_id, campo
+from modules.paginacion import POR_PAGINA, validar_cantidad
+
+# Protocolo: JSON por TCP, un objeto por línea en cada sentido
+# pedido:    {"accion": "reservar", "id": 3, "dni": "11111111"}
+# respuesta: {"ok": true, "resultado": ...} o {"ok": false, "error": "motivo"}
+# Acciones: ver ServidorAdopcion.ACCIONES
+
+LIMITE_LINEA = 1 << 16 # bytes máximos de un pedido
+MAXIMO_POR_PAGINA = 100 # perros máximos por respuesta: los listados viajan de a páginas, nunca enteros
+
+def raza_a_dict(raza:Raza):
+    return dict(zip(COLUMNAS["razas"], raza_a_fila(raza)))
+
+def perro_a_dict(perro:Perro):
+    return dict(zip(COLUMNAS["perros"], perro_a_fila(perro)))
+
+def usuario_a_dict(usuario:UsuarioAdoptante):
+    return dict(zip(COLUMNAS["usuarios"], usuario_a_fila(usuario)))
+
+def campo_id(pedido:dict):
+    '''ID obligatoria de un perro, ValueError si falta o está vacía'''
+    id_perro = validar_id(campo(pedido, "id"))
+    if id_perro is None:
+        raise ValueError("Falta la ID del perro")
+    return id_perro
+
+def campos_pagina(pedido:dict):
+    '''Cursor y cantidad de una página: "despues" (ID, opcional) y "cantidad" (opcional, POR_PAGINA si falta).
+    Una cantidad mayor a MAXIMO_POR_PAGINA se recorta, ValueError si no es un entero mayor a 0'''
+    cantidad = pedido.get("cantidad")
+    cantidad = POR_PAGINA if cantidad is None else min(validar_cantidad(cantidad), MAXIMO_POR_PAGINA)
+    return validar_id(pedido.get("despues")), cantidad
+
+def pagina_a_dict(pagina):
+    '''Página de perros y cursor de la siguiente (None si no hay más)'''
+    return {"perros": [perro_a_dict(perro) for perro in pagina], "siguiente": pagina.siguiente}
+
+def codificar(respuesta:dict):
+    return json.dumps(respuesta, ensure_ascii=False, separators=(",", ":")).encode() + b"\n"
+
+
+class ServidorAdopcion:
+    '''Atiende a muchas terminales a la vez desde un solo proceso (asyncio.start_server).
+    El bucle de eventos solo lee y escribe en los sockets: cada pedido se resuelve en un hilo del ejecutor,
+    porque el sistema puede tener que leer o escribir en el almacenamiento. Las operaciones del sistema
+    ya son seguras entre hilos (candados por perro y por usuario).'''
+    ACCIONES = ("ping", "buscar_perro", "buscar_usuario", "buscar_raza", "perros_estado", "sugerencias",
+                "registrar_raza", "registrar_usuario", "registrar_perro", "reservar", "adoptar", "devolver")
+
+    def __init__(self, sistema, hilos:int=8):
+        self.sistema = sistema
+        self._ejecutor = ThreadPoolExecutor(hilos, thread_name_prefix="servidor")
+        self._servidor:asyncio.Server|None = None
+
+    async def iniciar(self, host:str="127.0.0.1", puerto:int=8765):
+        '''Empieza a escuchar y retorna el puerto (puerto=0: elige uno libre)'''
+        self._servidor = await asyncio.start_server(self._atender, host, puerto, limit=LIMITE_LINEA)
+        return self._servidor.sockets[0].getsockname()[1]
+
+    async def servir(self, host:str="127.0.0.1", puerto:int=8765):
+        '''Escucha hasta que se cancele la tarea (Ctrl+C con asyncio.run)'''
+        await self.iniciar(host, puerto)
+        try:
+            await self._servidor.serve_forever()
+        finally:
+            await self.cerrar()
+
+    async def cerrar(self):
+        '''Deja de aceptar conexiones y espera a que terminen los pedidos en curso'''
+        if self._servidor is not None:
+            self._servidor.close()
+            await self._servidor.wait_closed()
+            self._servidor = None
+        self._ejecutor.shutdown(wait=True)
+
+    async def _atender(self, lector:asyncio.StreamReader, escritor:asyncio.StreamWriter):
+        '''Una conexión: lee pedidos línea por línea y responde en el mismo orden'''
+        bucle = asyncio.get_running_loop()
+        try:
+            while True:
+                try:
+                    linea = await lector.readline()
+                except ValueError: # línea más larga que LIMITE_LINEA: no se puede seguir leyendo
+                    escritor.write(codificar({"ok": False, "error": "Pedido demasiado largo"}))
+                    break
+                if not linea:
+                    break
+                if not linea.strip():
+                    continue
+                escritor.write(await bucle.run_in_executor(self._ejecutor, self.responder, linea))
+                await escritor.drain()
+        except ConnectionError:
+            pass
+        finally:
+            escritor.close()
+
+    def responder(self, linea:bytes):
+        '''Resuelve un pedido (en un hilo del ejecutor) y retorna la respuesta ya codificada'''
+        try:
+            pedido = json.loads(linea)
+            if not isinstance(pedido, dict):
+                raise ValueError("El pedido debe ser un objeto JSON")
+            accion = pedido.get("accion")
+            if accion not in self.ACCIONES:
+                raise ValueError(f"Acción desconocida: '{accion}'. Opciones: {list(self.ACCIONES)}")
+            return codificar({"ok": True, "resultado": getattr(self, "_" + accion)(pedido)})
+        except (TypeError, ValueError) as e:
+            return codificar({"ok": False, "error": str(e)})
+        except Exception as e: # un error inesperado no debe tirar la conexión
+            return codificar({"ok": False, "error": f"Error interno: {type(e).__name__}"})
+
+    # Acciones (reciben el pedido y retornan algo serializable como JSON)
+    def _ping(self, pedido:dict):
+        return "pong"
+
+    def _buscar_perro(self, pedido:dict):
+        return perro_a_dict(self.sistema.buscar_perro(campo_id(pedido)))
+
+    def _buscar_usuario(self, pedido:dict):
+        return usuario_a_dict(self.sistema.buscar_usuario(campo(pedido, "dni")))
+
+    def _buscar_raza(self, pedido:dict):
+        return raza_a_dict(self.sistema.buscar_raza(campo(pedido, "nombre")))
+
+    def _perros_estado(self, pedido:dict):
+        return pagina_a_dict(self.sistema.obtener_estado_perros(campo(pedido, "estado"), *campos_pagina(pedido)))
+
+    def _sugerencias(self, pedido:dict):
+        return pagina_a_dict(self.sistema.obtener_sugerencias_perros(campo(pedido, "dni"), *campos_pagina(pedido)))
+
+    def _registrar_raza(self, pedido:dict):
+        raza = Raza(nombre=campo(pedido, "nombre"), tamanio=pedido.get("tamanio", ""),
+                    temperamento=pedido.get("temperamento", ""))
+        return raza_a_dict(self.sistema.registrar_raza(raza))
+
+    def _registrar_usuario(self, pedido:dict):
+        usuario = UsuarioAdoptante(nombre=campo(pedido, "nombre"), dni=campo(pedido, "dni"), email=campo(pedido, "email"),
+                                   pref_raza=pedido.get("pref_raza", ""), pref_edad=pedido.get("pref_edad", ""),
+                                   pref_tamanio=pedido.get("pref_tamanio", ""))
+        return usuario_a_dict(self.sistema.registrar_usuario(usuario))
+
+    def _registrar_perro(self, pedido:dict):
+        perro = Perro(nombre=pedido.get("nombre", ""), edad=campo(pedido, "edad"), peso=campo(pedido, "peso"),
+                      sexo=campo(pedido, "sexo"), raza=self.sistema.buscar_raza(campo(pedido, "raza")),
+                      vacunado=validar_bool(pedido.get("vacunado", False)),
+                      discapacitado=validar_bool(pedido.get("discapacitado", False)))
+        return perro_a_dict(self.sistema.registrar_perro(perro))
+
+    def _reservar(self, pedido:dict):
+        return self.sistema.reservar(campo_id(pedido), campo(pedido, "dni"))
+
+    def _adoptar(self, pedido:dict):
+        return self.sistema.adoptar(campo_id(pedido), campo(pedido, "dni"))
+
+    def _devolver(self, pedido:dict):
+        return self.sistema.devolver(campo_id(pedido), campo(pedido, "dni"))
+
+
+class ClienteAdopcion:
+    '''Cliente asyncio del servidor: una conexión, un pedido a la vez'''
+    def __init__(self, lector:asyncio.StreamReader, escritor:asyncio.StreamWriter):
+        self._lector = lector
+        self._escritor = escritor
+
+    @classmethod
+    async def conectar(cls, host:str="127.0.0.1", puerto:int=8765):
+        return cls(*await asyncio.open_connection(host, puerto, limit=1 << 24)) # holgura para una página de perros con nombres largos
+
+    async def pedir(self, accion:str, **datos):
+        '''Envía un pedido y retorna el resultado. ValueError con el motivo si el servidor lo rechaza'''
+        self._escritor.write(codificar({"accion": accion, **datos}))
+        await self._escritor.drain()
+        linea = await self._lector.readline()
+        if not linea:
+            raise ConnectionError("El servidor cerró la conexión")
+        respuesta = json.loads(linea)
+        if not respuesta["ok"]:
+            raise ValueError(respuesta["error"])
+        return respuesta["resultado"]
+
+    async def cerrar(self):
+        self._escritor.close()
+        await self._escritor.wait_closed()
+
+
+if __name__ == "__main__":
+    from modules.sistema import SistemaAdopcion
+
+    async def demo():
+        sistema = SistemaAdopcion()
+        servidor = ServidorAdopcion(sistema)
+        puerto = await servidor.iniciar(puerto=0)
+        cliente = await ClienteAdopcion.conectar(puerto=puerto)
+        print(await cliente.pedir("registrar_raza", nombre="Labrador", tamanio="L", temperamento="Amigable"))
+        print(await cliente.pedir("registrar_usuario", nombre="Tito", dni="11111111", email="tito@mail.com", pref_tamanio="L"))
+        perro = await cliente.pedir("registrar_perro", nombre="Firulais", edad=3, peso=20, sexo="M", raza="labrador", vacunado="si")
+        print(perro)
+        sugerencias = await cliente.pedir("sugerencias", dni="11111111", cantidad=10)
+        print("Sugerencias:", [p["nombre"] for p in sugerencias["perros"]], "siguiente:", sugerencias["siguiente"])
+        print("Reservar:", await cliente.pedir("reservar", id=perro["id"], dni="11111111"))
+        try:
+            await cliente.pedir("reservar", id=perro["id"], dni="11111111")
+        except ValueError as e:
+            print("Reservar otra vez:", e)
+        print("Adoptar:", await cliente.pedir("adoptar", id=perro["id"], dni="11111111"))
+        print(await cliente.pedir("buscar_usuario", dni="11111111"))
+        await cliente.cerrar()
+        await servidor.cerrar()
+
+    asyncio.run(demo())
@@ -2,40 +2,406 @@ if __name__ == "__main__":
     import sys
     import os
     sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import threading
+from contextlib import contextmanager
+from typing import TYPE_CHECKING
 from modules.perro import Perro, Raza
-from modules.usuario import UsuarioAdoptante
+from modules.usuario import Usuario, UsuarioAdoptante, Preferencias
+from modules.almacenamiento import Almacenamiento, fila_a_perro, fila_a_raza, fila_a_usuario
+from modules.almacenamiento import raza_a_fila, perro_a_fila, usuario_a_fila
+from modules.concurrencia import Candados, ConflictoVersion
+from modules.paginacion import Pagina, POR_PAGINA, claves_pagina, claves_pagina_sin_orden, validar_cantidad
+# busqueda, cache, columnar, exportacion y metricas se importan recién cuando se usan (arranque más rápido)
+if TYPE_CHECKING: # solo para las anotaciones
+    from modules.busqueda import IndiceTexto
+    from modules.cache import CacheResultados
+    from modules.columnar import ColumnasPerros
+    from modules.metricas import Metricas
 
 class SistemaAdopcion:
-    # Singletone
+    # Cada SistemaAdopcion() es un sistema nuevo e independiente (para varios a la vez, ver modules.registro).
+    # Compatibilidad: SistemaAdopcion.unico() retorna siempre la misma instancia, como el singleton de antes
     instance = None
-    def __new__(cls):
-        if cls.instance is None:
-            cls.instance = object.__new__(cls)
-            cls.instance.__init__()
-        return cls.instance
-
-    def __init__(self):
-        self.perros = []
-        self.razas = []
-        self.usuarios = []
-        self.id_proximo_perro = 1
+    _candado_instance = threading.Lock()
+
+    @classmethod
+    def unico(cls, *args, **kwargs):
+        '''Retorna el sistema compartido del proceso. La primera vez lo arma con estos argumentos;
+        después los ignora y no borra los datos (para empezar de nuevo: SistemaAdopcion.instance = None)'''
+        with cls._candado_instance:
+            if cls.instance is None:
+                cls.instance = cls(*args, **kwargs)
+            return cls.instance
+
+    def __init__(self, almacenamiento:Almacenamiento|None=None, columnas:bool=False):
+        # Almacenamiento: por defecto solo en memoria (no persiste nada)
+        self.almacenamiento = almacenamiento or Almacenamiento()
+        self._cargado = not self.almacenamiento.persistente # True cuando todo lo guardado ya está en memoria
+        # Índices primarios (clave -> objeto)
+        self._usuarios:dict[str, UsuarioAdoptante] = {} # DNI -> usuario
+        self._perros:dict[int, Perro] = {}              # ID -> perro
+        self._razas:dict[str, Raza] = {}                # nombre normalizado -> raza
+        # Índices secundarios
+        self._perros_por_estado:dict[str, dict[int, Perro]] = {estado: {} for estado in Perro.ESTADOS} # estado -> {ID: perro}
+        self._perros_por_adoptante:dict[str, dict[int, Perro]] = {} # DNI -> {ID: perro} reservados o adoptados por ese usuario
+        # Facetas de perros disponibles (valor -> IDs), para las sugerencias
+        self._facetas_raza:dict[str, set[int]] = {}    # nombre de raza -> IDs
+        self._facetas_edad:dict[str, set[int]] = {}    # rango de edad (C/J/A/M) -> IDs
+        self._facetas_tamanio:dict[str, set[int]] = {} # tamaño de raza (S/M/L/X) -> IDs
+        # Claves ordenadas de cada índice, para paginar ("usuarios", "razas", "perros" o un estado).
+        # Se ordenan al pedir una página y se descartan cuando el índice cambia
+        self._ordenados:dict[str, list] = {}
+        # Eliminados mientras no está todo cargado: la carga a pedido no los vuelve a traer
+        # (pudo leer la fila justo antes de que se borrara del almacenamiento)
+        self._perros_eliminados:set[int] = set()
+        self._usuarios_eliminados:set[str] = set()
+        self.id_proximo_perro = self.almacenamiento.proximo_id_perro()
+        # Concurrencia: un candado por perro y por usuario para las operaciones (reservar, adoptar, ...)
+        # y uno solo, de corta duración, para los índices compartidos. Orden: perros, usuarios, almacenamiento, índices
+        self._candados = Candados()
+        self._candado_indices = threading.RLock()
+        # Métricas (opcional): ver activar_metricas
+        self.metricas:Metricas|None = None
+        # Índices de búsqueda por nombre (opcional; se arman la primera vez que se busca): "perros", "usuarios", "razas"
+        self._busqueda:dict[str, IndiceTexto]|None = None
+        # Almacén por columnas (opcional), para filtrar sin armar objetos Perro
+        self._columnas:ColumnasPerros|None = None
+        # Cache de resultados (opcional): ver activar_cache
+        self._cache:CacheResultados|None = None
+        if columnas:
+            self.activar_columnas()
+
+    def cerrar(self):
+        '''Cierra el almacenamiento'''
+        self.almacenamiento.cerrar()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        self.cerrar()
+
+    def calentar(self, busqueda:bool=False, columnas:bool=False):
+        '''Trae a memoria todo lo guardado (y, si se pide, arma los índices de búsqueda y el almacén por columnas),
+        así las primeras consultas no pagan la carga. Retorna el sistema'''
+        self._cargar_todo()
+        if busqueda:
+            self.activar_busqueda()
+        if columnas:
+            self.activar_columnas()
+        return self
+
+    # Vistas de solo lectura
+    @property
+    def usuarios(self):
+        '''Usuarios registrados (vista de solo lectura)'''
+        self._cargar_todo()
+        return self._usuarios.values()
+
+    @property
+    def perros(self):
+        '''Perros registrados (vista de solo lectura)'''
+        self._cargar_todo()
+        return self._perros.values()
+
+    @property
+    def razas(self):
+        '''Razas registradas (vista de solo lectura)'''
+        self._cargar_todo()
+        return self._razas.values()
+
+    # Cargar desde el almacenamiento (a pedido)
+    def _cargar_usuario(self, dni:str):
+        '''Trae un usuario del almacenamiento si todavía no está en memoria'''
+        if self._cargado:
+            return None
+        fila = self.almacenamiento.cargar_usuario(dni)
+        if fila is None:
+            return None
+        usuario = fila_a_usuario(fila)
+        with self._candado_indices: # otro hilo pudo cargarlo, eliminarlo o cargar todo mientras tanto
+            if dni in self._usuarios or dni in self._usuarios_eliminados or self._cargado:
+                return self._usuarios.get(dni)
+            self._indexar_usuario(usuario)
+        return usuario
+
+    def _cargar_perro(self, id_perro:int):
+        '''Trae un perro (y su raza) del almacenamiento si todavía no está en memoria'''
+        if self._cargado:
+            return None
+        fila = self.almacenamiento.cargar_perro(id_perro)
+        if fila is None:
+            return None
+        perro = fila_a_perro(fila, self._raza_de_fila(fila[5]))
+        with self._candado_indices: # otro hilo pudo cargarlo, eliminarlo o cargar todo mientras tanto
+            if id_perro in self._perros or id_perro in self._perros_eliminados or self._cargado:
+                return self._perros.get(id_perro)
+            self._indexar_perro(perro)
+        return perro
+
+    def _cargar_raza(self, nombre:str):
+        '''Trae una raza del almacenamiento si todavía no está en memoria'''
+        if self._cargado:
+            return None
+        fila = self.almacenamiento.cargar_raza(nombre)
+        if fila is None:
+            return None
+        raza = fila_a_raza(fila)
+        with self._candado_indices: # otro hilo pudo cargarlo mientras tanto
+            if nombre in self._razas:
+                return self._razas[nombre]
+            self._indexar_raza(raza)
+        return raza
+
+    def _perro_por_id(self, id_perro:int):
+        '''Retorna el perro de un ID que se sabe registrado, cargándolo si hace falta'''
+        return self._perros.get(id_perro) or self._cargar_perro(id_perro)
+
+    def _raza_de_fila(self, nombre:str):
+        '''Retorna la raza de un perro guardado (si nunca se registró, la arma solo con el nombre)'''
+        return self._razas.get(nombre) or self._cargar_raza(nombre) or Raza(nombre)
+
+    def _cargar_todo(self):
+        '''Trae a memoria todo lo guardado. Solo lo usan las consultas que recorren toda la población'''
+        if self._cargado:
+            return
+        # El almacenamiento antes que los índices, en el mismo orden que las escrituras (que indexan dentro de su transacción)
+        with self.almacenamiento.transaccion(), self._candado_indices:
+            if self._cargado:
+                return
+            for fila in self.almacenamiento.cargar_razas():
+                if fila[0] not in self._razas:
+                    self._indexar_raza(fila_a_raza(fila))
+            for fila in self.almacenamiento.cargar_usuarios():
+                if fila[0] not in self._usuarios and fila[0] not in self._usuarios_eliminados:
+                    self._indexar_usuario(fila_a_usuario(fila))
+            for fila in self.almacenamiento.cargar_perros():
+                if fila[0] not in self._perros and fila[0] not in self._perros_eliminados:
+                    self._indexar_perro(fila_a_perro(fila, self._raza_de_fila(fila[5])))
+            self._cargado = True
+            self._perros_eliminados.clear()
+            self._usuarios_eliminados.clear()
+
+    # Mantener índices
+    def _indexar_usuario(self, usuario:UsuarioAdoptante):
+        '''Agrega un usuario al índice y empieza a observar sus cambios'''
+        with self._candado_indices:
+            self._usuarios[usuario.dni] = usuario
+            self._desordenar("usuarios")
+            if self._busqueda is not None:
+                self._busqueda["usuarios"].agregar(usuario.dni, self._texto_usuario(usuario))
+        usuario.agregar_observador(self._al_cambiar_usuario)
+
+    def _desindexar_usuario(self, usuario:UsuarioAdoptante):
+        '''Quita un usuario del índice y deja de observarlo'''
+        usuario.quitar_observador(self._al_cambiar_usuario)
+        with self._candado_indices:
+            del self._usuarios[usuario.dni]
+            if not self._cargado:
+                self._usuarios_eliminados.add(usuario.dni)
+            self._desordenar("usuarios")
+            if self._busqueda is not None:
+                self._busqueda["usuarios"].quitar(usuario.dni, self._texto_usuario(usuario))
+        self._candados.descartar(("usuario", usuario.dni))
+
+    def _indexar_raza(self, raza:Raza):
+        '''Agrega una raza al índice y empieza a observar sus cambios'''
+        with self._candado_indices:
+            self._razas[raza.nombre] = raza
+            self._desordenar("razas")
+            if self._busqueda is not None:
+                self._busqueda["razas"].agregar(raza.nombre, raza.nombre)
+        raza.agregar_observador(self._al_cambiar_raza)
+
+    def _indexar_perro(self, perro:Perro):
+        '''Agrega un perro a los índices y empieza a observar sus cambios'''
+        with self._candado_indices:
+            self._perros[perro.id] = perro
+            self._perros_por_estado[perro.estado][perro.id] = perro
+            self._desordenar("perros", perro.estado)
+            if self._busqueda is not None:
+                self._busqueda["perros"].agregar(perro.id, perro.nombre)
+            if perro.adoptante:
+                self._perros_por_adoptante.setdefault(perro.adoptante, {})[perro.id] = perro
+            if self._columnas is not None and perro.id not in self._columnas:
+                self._columnas.agregar_perro(perro)
+            if perro.estado == "disponible":
+                self._agregar_facetas(perro.id, perro.raza, perro.edad)
+        perro.agregar_observador(self._al_cambiar_perro)
+        perro.raza.agregar_observador(self._al_cambiar_raza)
+
+    def _desindexar_perro(self, perro:Perro):
+        '''Quita un perro de los índices y deja de observarlo'''
+        perro.quitar_observador(self._al_cambiar_perro)
+        with self._candado_indices:
+            if perro.estado == "disponible":
+                self._quitar_facetas(perro.id, perro.raza, perro.edad)
+            self._perros_por_estado[perro.estado].pop(perro.id, None)
+            self._quitar_de_adoptante(perro.adoptante, perro.id)
+            if self._columnas is not None:
+                self._columnas.quitar(perro.id)
+            del self._perros[perro.id]
+            if not self._cargado:
+                self._perros_eliminados.add(perro.id)
+            self._desordenar("perros", perro.estado)
+            self._invalidar_perro(perro)
+            if self._busqueda is not None:
+                self._busqueda["perros"].quitar(perro.id, perro.nombre)
+        self._candados.descartar(("perro", perro.id))
+
+    def _quitar_de_adoptante(self, dni:str|None, id_perro:int):
+        '''Quita un perro del índice de su adoptante (y al adoptante, si no le quedan perros)'''
+        perros = self._perros_por_adoptante.get(dni)
+        if perros is not None:
+            perros.pop(id_perro, None)
+            if not perros:
+                del self._perros_por_adoptante[dni]
+
+    def _desordenar(self, *indices:str):
+        '''Descarta las claves ordenadas de los índices que cambiaron (se vuelven a ordenar en la próxima página)'''
+        for indice in indices:
+            self._ordenados.pop(indice, None)
+
+    def _invalidar_cache(self, *dependencias:tuple):
+        '''Descarta del cache los resultados que dependen de alguna de estas dependencias (ver activar_cache)'''
+        if self._cache is not None:
+            self._cache.invalidar(*dependencias)
+
+    def _invalidar_perro(self, perro:Perro):
+        '''Descarta los resultados en los que aparece (o aparecería) un perro que se registra o se elimina'''
+        dependencias = [("estado", perro.estado)]
+        if perro.estado == "disponible":
+            dependencias += self._dependencias_sugerencias(perro.raza.nombre, perro.edad, perro.raza.tamanio)
+        self._invalidar_cache(*dependencias)
+
+    @staticmethod
+    def _dependencias_sugerencias(raza:str, edad:int, tamanio:str):
+        '''Huellas de las preferencias (ver Preferencias.huella) que aceptan a un perro disponible con estos datos'''
+        return [("sugerencias", nombre, rango, talla) for nombre in (raza, "")
+                for rango in (Preferencias.rango_edad(edad), "") for talla in (tamanio, "")]
+
+    def _agregar_facetas(self, id_perro:int, raza:Raza, edad:int):
+        '''Agrega un perro disponible a las facetas de raza, rango de edad y tamaño'''
+        self._facetas_raza.setdefault(raza.nombre, set()).add(id_perro)
+        self._facetas_edad.setdefault(Preferencias.rango_edad(edad), set()).add(id_perro)
+        self._facetas_tamanio.setdefault(raza.tamanio, set()).add(id_perro)
+
+    def _quitar_facetas(self, id_perro:int, raza:Raza, edad:int):
+        '''Quita un perro de las facetas (con los valores que tenía al agregarse)'''
+        facetas = (
+            (self._facetas_raza, raza.nombre),
+            (self._facetas_edad, Preferencias.rango_edad(edad)),
+            (self._facetas_tamanio, raza.tamanio)
+        )
+        for faceta, valor in facetas:
+            ids = faceta.get(valor)
+            if ids is not None:
+                ids.discard(id_perro)
+                if not ids:
+                    del faceta[valor]
+
+    def _al_cambiar_perro(self, perro:Perro, atributo:str, anterior):
+        '''Recibe los avisos de cambio de un perro, actualiza los índices secundarios y lo guarda'''
+        # Los índices se sueltan antes de guardar (nunca se espera al almacenamiento con los índices tomados)
+        if self._indexar_cambio_perro(perro, atributo, anterior) and atributo != "adoptante": # se guarda con el aviso de "estado"
+            self._guardar_registrado(perro, self._perros, perro.id, self.almacenamiento.guardar_perro)
+
+    def _indexar_cambio_perro(self, perro:Perro, atributo:str, anterior):
+        '''Actualiza los índices secundarios por un cambio del perro. False si ya no está registrado'''
+        with self._candado_indices:
+            if self._perros.get(perro.id) is not perro: # otro hilo lo eliminó mientras cambiaba: no se vuelve a indexar
+                return False
+            if atributo == "adoptante":
+                self._quitar_de_adoptante(anterior, perro.id)
+                if perro.adoptante:
+                    self._perros_por_adoptante.setdefault(perro.adoptante, {})[perro.id] = perro
+                return True
+            if atributo == "estado":
+                self._perros_por_estado[anterior].pop(perro.id, None)
+                self._perros_por_estado[perro.estado][perro.id] = perro
+                self._desordenar(anterior, perro.estado)
+                if anterior == "disponible":
+                    self._quitar_facetas(perro.id, perro.raza, perro.edad)
+                elif perro.estado == "disponible":
+                    self._agregar_facetas(perro.id, perro.raza, perro.edad)
+                dependencias = [("estado", anterior), ("estado", perro.estado)]
+                if "disponible" in (anterior, perro.estado):
+                    dependencias += self._dependencias_sugerencias(perro.raza.nombre, perro.edad, perro.raza.tamanio)
+                self._invalidar_cache(*dependencias)
+            elif atributo == "edad" and perro.estado == "disponible":
+                self._quitar_facetas(perro.id, perro.raza, anterior)
+                self._agregar_facetas(perro.id, perro.raza, perro.edad)
+                if Preferencias.rango_edad(anterior) != Preferencias.rango_edad(perro.edad):
+                    self._invalidar_cache(*self._dependencias_sugerencias(perro.raza.nombre, anterior, perro.raza.tamanio),
+                                          *self._dependencias_sugerencias(perro.raza.nombre, perro.edad, perro.raza.tamanio))
+            elif atributo == "nombre" and self._busqueda is not None:
+                self._busqueda["perros"].cambiar(perro.id, anterior, perro.nombre)
+            elif atributo == "raza":
+                perro.raza.agregar_observador(self._al_cambiar_raza)
+                if perro.estado == "disponible":
+                    self._quitar_facetas(perro.id, anterior, perro.edad)
+                    self._agregar_facetas(perro.id, perro.raza, perro.edad)
+                    self._invalidar_cache(*self._dependencias_sugerencias(anterior.nombre, perro.edad, anterior.tamanio),
+                                          *self._dependencias_sugerencias(perro.raza.nombre, perro.edad, perro.raza.tamanio))
+            if self._columnas is not None and atributo not in ("nombre", "id"):
+                self._columnas.actualizar(perro)
+            return True
+
+    def _al_cambiar_raza(self, raza:Raza, atributo:str, anterior):
+        '''Mueve a los perros disponibles de la raza a la faceta de su nuevo tamaño'''
+        if atributo == "tamanio" and anterior != raza.tamanio:
+            with self._candado_indices:
+                ids_raza = self._facetas_raza.get(raza.nombre, ())
+                ids_anterior = self._facetas_tamanio.get(anterior, set())
+                ids_nuevo = self._facetas_tamanio.setdefault(raza.tamanio, set())
+                for id_perro in ids_raza:
+                    ids_anterior.discard(id_perro)
+                    ids_nuevo.add(id_perro)
+                if not ids_anterior:
+                    self._facetas_tamanio.pop(anterior, None)
+                if not ids_nuevo:
+                    del self._facetas_tamanio[raza.tamanio]
+                if self._columnas is not None:
+                    self._columnas.cambiar_tamanio_raza(raza.nombre, raza.tamanio)
+                # Cambian las sugerencias (de cualquier edad) que piden esta raza o alguno de los dos tamaños
+                self._invalidar_cache(*(("sugerencias", nombre, edad, tamanio) for nombre in (raza.nombre, "")
+                                        for edad in (*Preferencias.EDADES, "") for tamanio in (anterior, raza.tamanio, "")))
+        self.almacenamiento.guardar_raza(raza)
+
+    def _al_cambiar_usuario(self, usuario:UsuarioAdoptante, atributo:str, anterior):
+        '''Recibe los avisos de cambio de un usuario (y sus preferencias) y los guarda'''
+        if atributo in ("nombre", "email") and self._busqueda is not None:
+            with self._candado_indices:
+                if self._usuarios.get(usuario.dni) is not usuario: # otro hilo lo eliminó mientras cambiaba
+                    return
+                textos = {"nombre": usuario.nombre, "email": usuario.email, atributo: anterior}
+                self._busqueda["usuarios"].cambiar(usuario.dni, f"{textos['nombre']} {textos['email']}", self._texto_usuario(usuario))
+        self._guardar_registrado(usuario, self._usuarios, usuario.dni,
+                                 lambda usuario: self.almacenamiento.guardar_usuario(usuario, historial=atributo == "historial_adopciones"))
+
+    def _guardar_registrado(self, objeto, indice:dict, clave, guardar):
+        '''Guarda el objeto solo si sigue registrado. Las bajas toman la transacción antes de desindexar,
+        así un cambio sin candado (ej: perro.cambiar_edad) que llega junto a una baja no vuelve a guardar la fila borrada'''
+        with self.almacenamiento.transaccion():
+            if indice.get(clave) is objeto:
+                guardar(objeto)
 
     # validar datos en sistema
     def hay_usuarios(self):
         '''Verifica que haya usuarios en el sistema, ValueError si no hay'''
-        if self.usuarios:
+        if self._usuarios or self.almacenamiento.hay("usuarios"):
             return True
         raise ValueError("El sistema no tiene usuarios registrados")
 
     def hay_perros(self):
         '''Verifica que haya perros en el sistema, ValueError si no hay'''
-        if self.perros:
+        if self._perros or self.almacenamiento.hay("perros"):
             return True
         raise ValueError("El sistema no tiene perros registrados")
 
     def hay_razas(self):
         '''Verifica que haya razas en el sistema, ValueError si no hay'''
-        if self.razas:
+        if self._razas or self.almacenamiento.hay("razas"):
             return True
         raise ValueError("El sistema no tiene razas registradas")
 
@@ -51,9 +417,9 @@ class SistemaAdopcion:
         if not isinstance(usuario_buscado, str):
             raise TypeError("DNI inválido: debe ser un string, int u objeto del tipo 'UsuarioAdoptado'")
         usuario_buscado = usuario_buscado.strip().lower()
-        for usuario in self.usuarios:
-            if usuario.dni == usuario_buscado:
-                return usuario
+        usuario = self._usuarios.get(usuario_buscado) or self._cargar_usuario(usuario_buscado)
+        if usuario:
+            return usuario
         if error:
             raise ValueError(f"No se encontró '{usuario_buscado}'. Intente nuevamente")
         return None
@@ -73,9 +439,9 @@ class SistemaAdopcion:
                 raise TypeError("ID debe ser un número entero")
         if not isinstance(perro_buscado, int):
             raise TypeError("ID inválido: debe ser un string, int u objeto del tipo 'Perro'")
-        for perro in self.perros:
-            if perro.id == perro_buscado:
-                return perro
+        perro = self._perros.get(perro_buscado) or self._cargar_perro(perro_buscado)
+        if perro:
+            return perro
         if error:
             raise ValueError(f"No se encontró '{perro_buscado}'. Intente nuevamente")
         return None
@@ -87,9 +453,9 @@ class SistemaAdopcion:
         if not isinstance(raza_buscada, str):
             raise TypeError("Raza inválida: debe ser un string u objeto del tipo 'Raza'")
         raza_buscada = raza_buscada.strip().title()
-        for raza in self.razas:
-            if raza.nombre == raza_buscada:
-                return raza
+        raza = self._razas.get(raza_buscada) or self._cargar_raza(raza_buscada)
+        if raza:
+            return raza
         if error:
             raise ValueError(f"No se encontró '{raza_buscada}'. Intente nuevamente")
         return None
@@ -100,10 +466,15 @@ class SistemaAdopcion:
         # Valida usuario
         if not isinstance(usuario_nuevo, UsuarioAdoptante):
             raise TypeError("Debe ingresar un objeto de la clase 'UsuarioAdoptante'")
-        if self.usuarios and self.buscar_usuario(usuario_nuevo, False):
-            raise ValueError(f"Ya existe un usuario con DNI {usuario_nuevo.dni}")
-        # Registra usuario
-        self.usuarios.append(usuario_nuevo)
+        # Buscar y agregar sin que otro hilo registre el mismo DNI en el medio. La búsqueda puede leer el
+        # almacenamiento: su transacción se toma antes que los índices (ver _cargar_todo)
+        with self.almacenamiento.transaccion():
+            with self._candado_indices:
+                if self.buscar_usuario(usuario_nuevo, False):
+                    raise ValueError(f"Ya existe un usuario con DNI {usuario_nuevo.dni}")
+                # Registra usuario
+                self._indexar_usuario(usuario_nuevo)
+            self.almacenamiento.guardar_usuario(usuario_nuevo)
         return usuario_nuevo
 
     def registrar_perro(self, perro_nuevo:Perro):
@@ -111,14 +482,20 @@ class SistemaAdopcion:
         # Valida perro
         if not isinstance(perro_nuevo, Perro):
             raise TypeError("Debe ingresar un objeto de la clase 'Perro'")
-        if self.perros and self.buscar_perro(perro_nuevo, False):
-            raise ValueError(f"Ya existe un perro con ID {perro_nuevo.id}")
-        # Asigna ID
-        if not perro_nuevo.id:
-            perro_nuevo.id = self.id_proximo_perro
-            self.id_proximo_perro += 1
-        # Registra perro
-        self.perros.append(perro_nuevo)
+        with self.almacenamiento.transaccion(): # (antes que los índices, ver registrar_usuario)
+            with self._candado_indices:
+                if self.buscar_perro(perro_nuevo, False):
+                    raise ValueError(f"Ya existe un perro con ID {perro_nuevo.id}")
+                # Asigna ID (saltea los que se hayan cargado a mano)
+                if not perro_nuevo.id:
+                    while self.buscar_perro(self.id_proximo_perro, False):
+                        self.id_proximo_perro += 1
+                    perro_nuevo.id = self.id_proximo_perro
+                    self.id_proximo_perro += 1
+                # Registra perro
+                self._indexar_perro(perro_nuevo)
+                self._invalidar_perro(perro_nuevo)
+            self.almacenamiento.guardar_perro(perro_nuevo)
         return perro_nuevo
 
     def registrar_raza(self, raza_nueva:Raza):
@@ -126,44 +503,212 @@ class SistemaAdopcion:
         # Valida raza
         if not isinstance(raza_nueva, Raza):
             raise TypeError("Debe ingresar un objeto de la clase 'Raza'")
-        if self.razas and self.buscar_raza(raza_nueva, False):
-            raise ValueError(f"Ya existe la raza {raza_nueva.nombre}")
-        # Registrar raza
-        self.razas.append(raza_nueva)
+        with self.almacenamiento.transaccion(): # (antes que los índices, ver registrar_usuario)
+            with self._candado_indices:
+                if self.buscar_raza(raza_nueva, False):
+                    raise ValueError(f"Ya existe la raza {raza_nueva.nombre}")
+                # Registrar raza
+                self._indexar_raza(raza_nueva)
+            self.almacenamiento.guardar_raza(raza_nueva)
         return raza_nueva
 
+    # Registrar por lotes (importaciones masivas)
+    def registrar_usuarios(self, usuarios_nuevos:list[UsuarioAdoptante]):
+        '''Agrega varios usuarios en una sola transacción. En lugar de buscar uno por uno,
+        consulta los DNI repetidos de todo el lote de una vez. Retorna los usuarios no registrados por repetidos'''
+        for usuario in usuarios_nuevos:
+            if not isinstance(usuario, UsuarioAdoptante):
+                raise TypeError("Debe ingresar objetos de la clase 'UsuarioAdoptante'")
+        with self.almacenamiento.transaccion():
+            with self._candado_indices:
+                nuevos, repetidos = self._separar_repetidos(usuarios_nuevos, "dni", self._usuarios, "usuarios")
+                for usuario in nuevos:
+                    self._indexar_usuario(usuario)
+            self.almacenamiento.guardar_usuarios(nuevos)
+        return repetidos
+
+    def registrar_perros(self, perros_nuevos:list[Perro]):
+        '''Agrega varios perros en una sola transacción y les asigna ID a los que no tienen.
+        Retorna los perros no registrados por tener un ID repetido'''
+        for perro in perros_nuevos:
+            if not isinstance(perro, Perro):
+                raise TypeError("Debe ingresar objetos de la clase 'Perro'")
+        with self.almacenamiento.transaccion():
+            with self._candado_indices:
+                con_id = [perro for perro in perros_nuevos if perro.id]
+                _, repetidos = self._separar_repetidos(con_id, "id", self._perros, "perros")
+                descartados = set(map(id, repetidos))
+                nuevos = [perro for perro in perros_nuevos if id(perro) not in descartados]
+                ocupados = {perro.id for perro in nuevos if perro.id}
+                for perro in nuevos:
+                    if not perro.id:
+                        # (el almacenamiento no tiene IDs desde id_proximo_perro: alcanza con mirar en memoria)
+                        while self.id_proximo_perro in ocupados or self.id_proximo_perro in self._perros:
+                            self.id_proximo_perro += 1
+                        perro.id = self.id_proximo_perro
+                        self.id_proximo_perro += 1
+                    self._indexar_perro(perro)
+                    self._invalidar_perro(perro)
+            self.almacenamiento.guardar_perros(nuevos)
+        return repetidos
+
+    def registrar_razas(self, razas_nuevas:list[Raza]):
+        '''Agrega varias razas en una sola transacción. Retorna las razas no registradas por repetidas'''
+        for raza in razas_nuevas:
+            if not isinstance(raza, Raza):
+                raise TypeError("Debe ingresar objetos de la clase 'Raza'")
+        with self.almacenamiento.transaccion():
+            with self._candado_indices:
+                nuevas, repetidas = self._separar_repetidos(razas_nuevas, "nombre", self._razas, "razas")
+                for raza in nuevas:
+                    self._indexar_raza(raza)
+            self.almacenamiento.guardar_razas(nuevas)
+        return repetidas
+
+    def _separar_repetidos(self, objetos:list, clave:str, indice:dict, tabla:str):
+        '''Separa los objetos cuya clave ya está registrada (en memoria, en el almacenamiento o antes en el mismo lote)'''
+        guardados = set() if self._cargado else self.almacenamiento.existentes(tabla, [getattr(obj, clave) for obj in objetos])
+        vistos = set()
+        nuevos, repetidos = [], []
+        for obj in objetos:
+            valor = getattr(obj, clave)
+            if valor in indice or valor in guardados or valor in vistos:
+                repetidos.append(obj)
+            else:
+                vistos.add(valor)
+                nuevos.append(obj)
+        return nuevos, repetidos
+
+    # Candados
+    @contextmanager
+    def _tomar(self, perros:list[Perro]=(), usuarios:list[UsuarioAdoptante]=(), razas:list[Raza]=()):
+        '''Toma los candados de los perros, razas y usuarios (en orden fijo) y verifica que sigan registrados.
+        Mientras dure, ningún otro hilo puede operar sobre ellos: el chequeo puede_* y el cambio son atómicos'''
+        claves = [("perro", perro.id) for perro in perros] + [("usuario", usuario.dni) for usuario in usuarios]
+        claves += [("raza", raza.nombre) for raza in razas]
+        with self._candados.tomar(*claves):
+            for perro in perros:
+                if self._perros.get(perro.id) is not perro:
+                    raise ValueError("No se encontró al perro en el sistema")
+            for raza in razas:
+                if self._razas.get(raza.nombre) is not raza:
+                    raise ValueError("No se encontró la raza en el sistema")
+            for usuario in usuarios:
+                if self._usuarios.get(usuario.dni) is not usuario:
+                    raise ValueError("No se encontró al usuario en el sistema")
+            yield
+
+    @contextmanager
+    def _transicion(self, perro:Perro, usuario:UsuarioAdoptante):
+        '''Transacción del almacenamiento para cambiar al perro y al usuario juntos (con sus candados tomados).
+        Si falla (ej: disco lleno), el almacenamiento descarta las filas y la memoria vuelve a como estaba:
+        estado, adoptante, reserva, historial, versiones e índices'''
+        estado, adoptante, version_perro = perro.estado, perro.adoptante, perro.version
+        reserva, historial, version_usuario = usuario.reserva, list(usuario.historial_adopciones), usuario.version
+        try:
+            with self.almacenamiento.transaccion():
+                yield
+        except BaseException:
+            estado_nuevo, adoptante_nuevo = perro.estado, perro.adoptante
+            perro.estado, perro.adoptante, perro.version = estado, adoptante, version_perro
+            usuario.reserva, usuario.version = reserva, version_usuario
+            usuario.historial_adopciones.clear()
+            usuario.historial_adopciones.extend(historial)
+            if adoptante_nuevo != adoptante:
+                self._indexar_cambio_perro(perro, "adoptante", adoptante_nuevo)
+            if estado_nuevo != estado:
+                self._indexar_cambio_perro(perro, "estado", estado_nuevo)
+            raise
+
     # Eliminar del sistema
     def eliminar_usuario(self, dni_usuario:str|int|UsuarioAdoptante):
         '''Elimina a un usuario y a sus perros del sistema'''
-        if self.hay_usuarios():
-            usuario:UsuarioAdoptante = self.buscar_usuario(dni_usuario, False)
-            if not usuario:
-                raise ValueError("No se encontró al usuario en el sistema")
-            # Elimina sus perros
-            perros_adoptados = usuario.historial_adopciones
-            for perro in perros_adoptados:
-                self.eliminar_perro(perro)
-            # Cancela reserva
-            if usuario.reserva:
-                perro = self.buscar_perro(usuario.reserva)
-                self.devolver(usuario.reserva, usuario)
-            # Elimina usuario
-            self.usuarios.remove(usuario)
+        self.eliminar_usuarios([dni_usuario])
 
     def eliminar_perro(self, id_perro:int|Perro):
         '''Elimina a un perro del sistema y lo borra del historial de su dueño'''
+        self.eliminar_perros([id_perro])
+
+    def eliminar_usuarios(self, dnis_usuarios:list[str|int|UsuarioAdoptante]):
+        '''Elimina a varios usuarios y a todos sus perros (adoptados o reservados) en una sola transacción:
+        se eliminan todos o ninguno. ValueError, sin eliminar nada, si alguno no está registrado'''
+        if self.hay_usuarios():
+            usuarios = self._buscar_todos(dnis_usuarios, self.buscar_usuario, "dni", "No se encontró al usuario en el sistema")
+            while True:
+                # Toma a los usuarios y a todos sus perros; si mientras tanto cambiaron, vuelve a intentar
+                ids = self._ids_de_usuarios(usuarios)
+                perros = [perro for perro in map(self._perro_por_id, ids) if perro]
+                duenios = self._duenios(perros, usuarios)
+                with self._tomar(perros, usuarios + duenios):
+                    if self._ids_de_usuarios(usuarios) != ids or self._duenios(perros, usuarios) != duenios:
+                        continue
+                    self._eliminar(perros, usuarios, duenios)
+                    return
+
+    def eliminar_perros(self, ids_perros:list[int|Perro]):
+        '''Elimina a varios perros en una sola transacción y los borra de la reserva o del historial de sus dueños:
+        se eliminan todos o ninguno. ValueError, sin eliminar nada, si alguno no está registrado'''
         if self.hay_perros():
-            perro:Perro = self.buscar_perro(id_perro, False)
-            if not perro:
-                raise ValueError("No se encontró al perro en el sistema")
-            # Remueve al perro del dueño o reserva
-            if perro.adoptante:
-                self.devolver(perro, perro.adoptante)
-            # Elimina perro
-            self.perros.remove(perro)
+            perros = self._buscar_todos(ids_perros, self.buscar_perro, "id", "No se encontró al perro en el sistema")
+            while True:
+                # Toma a los perros y a sus dueños; si mientras tanto alguno cambió de dueño, vuelve a intentar
+                duenios = self._duenios(perros)
+                with self._tomar(perros, duenios):
+                    if self._duenios(perros) != duenios:
+                        continue
+                    self._eliminar(perros, [], duenios)
+                    return
+
+    @staticmethod
+    def _buscar_todos(claves:list, buscar, atributo:str, error:str):
+        '''Busca cada clave (sin repetir objetos). ValueError si alguna no está registrada'''
+        encontrados = {}
+        for clave in claves:
+            objeto = buscar(clave, False)
+            if not objeto:
+                raise ValueError(error)
+            encontrados[getattr(objeto, atributo)] = objeto
+        return list(encontrados.values())
+
+    def _ids_de_usuarios(self, usuarios:list[UsuarioAdoptante]):
+        '''IDs de los perros de los usuarios: historial, reserva y los que figuran a su nombre en memoria'''
+        ids = {}
+        with self._candado_indices:
+            for usuario in usuarios:
+                ids.update(dict.fromkeys(usuario.historial_adopciones))
+                if usuario.reserva:
+                    ids[usuario.reserva] = None
+                ids.update(dict.fromkeys(self._perros_por_adoptante.get(usuario.dni, ())))
+        return list(ids)
+
+    def _duenios(self, perros:list[Perro], eliminados:list[UsuarioAdoptante]=()):
+        '''Usuarios registrados que tienen reservado o adoptado alguno de los perros (sin contar a los eliminados)'''
+        dnis = {perro.adoptante for perro in perros if perro.adoptante} - {usuario.dni for usuario in eliminados}
+        return [usuario for usuario in (self.buscar_usuario(dni, False) for dni in sorted(dnis)) if usuario]
+
+    def _eliminar(self, perros:list[Perro], usuarios:list[UsuarioAdoptante], duenios:list[UsuarioAdoptante]):
+        '''Elimina perros y usuarios (con sus candados tomados) en una sola pasada y una sola transacción.
+        Cada dueño que sigue registrado se actualiza y se guarda una sola vez, sin importar cuántos perros pierda'''
+        with self.almacenamiento.transaccion():
+            # Primero el almacenamiento: si falla, la memoria queda como estaba
+            self.almacenamiento.eliminar_perros([perro.id for perro in perros])
+            self.almacenamiento.eliminar_usuarios([usuario.dni for usuario in usuarios])
+            # Los usuarios eliminados dejan de observarse antes de tocar sus adopciones (nada vuelve a guardarlos)
+            for usuario in usuarios:
+                self._desindexar_usuario(usuario)
+            por_dni = {usuario.dni: usuario for usuario in usuarios + duenios}
+            devueltos:dict[str, list[int]] = {}
+            for perro in perros:
+                self._desindexar_perro(perro) # también deja de observarlo: devolver no lo guarda
+                if perro.adoptante:
+                    devueltos.setdefault(perro.adoptante, []).append(perro.id)
+                    perro.devolver(perro.adoptante)
+            for dni, ids in devueltos.items():
+                if dni in por_dni:
+                    por_dni[dni].devolver_varios(ids)
 
-    # Adopciones
-    def adoptar(self, id_perro:int|Perro, dni_usuario:str|int|UsuarioAdoptante):
+    # Adopciones (con version_perro/version_usuario: solo si no cambiaron desde que se leyeron)
+    def adoptar(self, id_perro:int|Perro, dni_usuario:str|int|UsuarioAdoptante, version_perro:int|None=None, version_usuario:int|None=None):
         if self.hay_perros() and self.hay_usuarios():
             perro = self.buscar_perro(id_perro, False)
             usuario = self.buscar_usuario(dni_usuario, False)
@@ -171,13 +716,17 @@ class SistemaAdopcion:
                 raise ValueError("No se encontró al perro en el sistema")
             if not usuario:
                 raise ValueError("No se encontró al usuario en el sistema")
-            if not usuario.puede_adoptar(perro.id) or not perro.puede_adoptar(usuario.dni):
-                raise ValueError("No puede adoptar sin una reserva")
-            usuario.adoptar(perro.id)
-            perro.adoptar(usuario.dni)
+            with self._tomar([perro], [usuario]): # chequeo y cambio atómicos
+                self._verificar_version(perro, version_perro)
+                self._verificar_version(usuario, version_usuario)
+                if not usuario.puede_adoptar(perro.id) or not perro.puede_adoptar(usuario.dni):
+                    raise ValueError("No puede adoptar sin una reserva")
+                with self._transicion(perro, usuario): # se guardan juntos; si falla, no cambia nada
+                    usuario.adoptar(perro.id)
+                    perro.adoptar(usuario.dni)
             return True
 
-    def reservar(self, id_perro:int|Perro, dni_usuario:str|int|UsuarioAdoptante):
+    def reservar(self, id_perro:int|Perro, dni_usuario:str|int|UsuarioAdoptante, version_perro:int|None=None, version_usuario:int|None=None):
         if self.hay_perros() and self.hay_usuarios():
             perro = self.buscar_perro(id_perro, False)
             usuario = self.buscar_usuario(dni_usuario, False)
@@ -185,13 +734,17 @@ class SistemaAdopcion:
                 raise ValueError("No se encontró al perro en el sistema")
             if not usuario:
                 raise ValueError("No se encontró al usuario en el sistema")
-            if not usuario.puede_reservar(perro.id) or not perro.puede_reservar(usuario.dni):
-                raise ValueError("No puede reservar teniendo una reserva previa")
-            usuario.reservar(perro.id)
-            perro.reservar(usuario.dni)
+            with self._tomar([perro], [usuario]): # chequeo y cambio atómicos
+                self._verificar_version(perro, version_perro)
+                self._verificar_version(usuario, version_usuario)
+                if not usuario.puede_reservar(perro.id) or not perro.puede_reservar(usuario.dni):
+                    raise ValueError("No puede reservar teniendo una reserva previa")
+                with self._transicion(perro, usuario): # se guardan juntos; si falla, no cambia nada
+                    usuario.reservar(perro.id)
+                    perro.reservar(usuario.dni)
             return True
 
-    def devolver(self, id_perro:int|Perro, dni_usuario:str|int|UsuarioAdoptante):
+    def devolver(self, id_perro:int|Perro, dni_usuario:str|int|UsuarioAdoptante, version_perro:int|None=None, version_usuario:int|None=None):
         if self.hay_perros() and self.hay_usuarios():
             perro = self.buscar_perro(id_perro, False)
             usuario = self.buscar_usuario(dni_usuario, False)
@@ -199,53 +752,419 @@ class SistemaAdopcion:
                 raise ValueError("No se encontró al perro en el sistema")
             if not usuario:
                 raise ValueError("No se encontró al usuario en el sistema")
-            if not usuario.puede_devolver(perro.id) or not perro.puede_devolver(usuario.dni):
-                raise ValueError("No puede devolver perros ajenos...")
-            usuario.devolver(perro.id)
-            perro.devolver(usuario.dni)
+            with self._tomar([perro], [usuario]): # chequeo y cambio atómicos
+                self._verificar_version(perro, version_perro)
+                self._verificar_version(usuario, version_usuario)
+                if not usuario.puede_devolver(perro.id) or not perro.puede_devolver(usuario.dni):
+                    raise ValueError("No puede devolver perros ajenos...")
+                with self._transicion(perro, usuario): # se guardan juntos; si falla, no cambia nada
+                    usuario.devolver(perro.id)
+                    perro.devolver(usuario.dni)
             return True
 
+    # Edición optimista: los cambios se aplican solo si el objeto sigue en la versión que se leyó.
+    # El candado se toma únicamente para comparar y aplicar, nunca mientras alguien completa un formulario
+    def editar_perro(self, perro:int|Perro, version:int|None, **cambios):
+        '''Cambia varios datos del perro a la vez (nombre, edad, peso, sexo, raza, vacunado, discapacitado).
+        Todo o nada: ConflictoVersion si otro lo modificó desde `version`, ValueError/TypeError si algún dato es inválido.
+        Retorna la versión nueva'''
+        perro = self.buscar_perro(perro)
+        if isinstance(cambios.get("raza"), str):
+            cambios["raza"] = self.buscar_raza(cambios["raza"])
+        metodos = {atributo: (getattr(Perro, f"validar_{atributo}"), getattr(perro, f"cambiar_{atributo}"))
+                   for atributo in ("nombre", "edad", "peso", "sexo", "raza", "vacunado", "discapacitado")}
+        return self._editar(perro, version, cambios, metodos, perros=[perro])
+
+    def editar_raza(self, raza:str|Raza, version:int|None, **cambios):
+        '''Cambia tamaño y/o temperamento de la raza si sigue en `version` (ver editar_perro). Retorna la versión nueva'''
+        raza = self.buscar_raza(raza)
+        metodos = {atributo: (getattr(Raza, f"validar_{atributo}"), getattr(raza, f"cambiar_{atributo}"))
+                   for atributo in ("tamanio", "temperamento")}
+        return self._editar(raza, version, cambios, metodos, razas=[raza])
+
+    def editar_usuario(self, usuario:str|int|UsuarioAdoptante, version:int|None, **cambios):
+        '''Cambia nombre, email y/o preferencias (pref_raza, pref_edad, pref_tamanio) del usuario si sigue en `version`
+        (ver editar_perro). Retorna la versión nueva'''
+        usuario = self.buscar_usuario(usuario)
+        metodos = {atributo: (getattr(UsuarioAdoptante, f"validar_{atributo}"), getattr(usuario, f"cambiar_{atributo}"))
+                   for atributo in ("nombre", "email")}
+        metodos.update({f"pref_{atributo}": (getattr(Preferencias, f"validar_{atributo}"), getattr(usuario.preferencias, f"cambiar_{atributo}"))
+                        for atributo in ("raza", "edad", "tamanio")})
+        return self._editar(usuario, version, cambios, metodos, usuarios=[usuario])
+
+    def _editar(self, objeto, version:int|None, cambios:dict, metodos:dict, **candados):
+        '''Compara la versión y aplica los cambios con los métodos {atributo: (validar, cambiar)}'''
+        desconocidos = [atributo for atributo in cambios if atributo not in metodos]
+        if desconocidos:
+            raise ValueError(f"No se puede editar {desconocidos}. Opciones: {list(metodos)}")
+        with self._tomar(**candados):
+            self._verificar_version(objeto, version)
+            for atributo, valor in cambios.items(): # valida todo antes de cambiar algo
+                metodos[atributo][0](valor)
+            with self.almacenamiento.transaccion(): # los cambios se guardan juntos
+                for atributo, valor in cambios.items():
+                    metodos[atributo][1](valor)
+            return objeto.version
+
+    @staticmethod
+    def _verificar_version(objeto, version:int|None):
+        '''ConflictoVersion si el objeto cambió desde que se leyó su versión (None: no verifica)'''
+        if version is not None and objeto.version != version:
+            raise ConflictoVersion(f"Otra operación modificó a '{objeto.nombre}' mientras tanto "
+                                   f"(versión {version}, ahora {objeto.version}). No se guardaron los cambios")
+
     # Filtrar perros
-    def obtener_sugerencias_perros(self, usuario:str|int|UsuarioAdoptante):
-        '''Retorna lista de perros en base a las preferencias de un usuario'''
+    def obtener_sugerencias_perros(self, usuario:str|int|UsuarioAdoptante, despues:int|None=None, cantidad:int|None=None):
+        '''Retorna lista de perros en base a las preferencias de un usuario, ordenados por ID.
+        Con cantidad, retorna solo una página (ver obtener_perros): arma únicamente los perros de esa página.
+        Con el cache activo, los usuarios con las mismas preferencias e historial comparten el resultado'''
         if self.hay_perros() and self.hay_usuarios():
             # Valida usuario
             usuario = self.buscar_usuario(usuario, False)
             if not usuario:
                 raise ValueError(f"No se encontró al usuario en el sistema")
-            # Filtra perros
-            perros_filtrados = []
-            for perro in self.perros:
-                if not usuario.preferencias.raza or usuario.preferencias.raza == perro.raza.nombre:
-                    if not usuario.preferencias.edad or usuario.preferencias.edad == usuario.preferencias.validar_edad(perro.edad):
-                        if not usuario.preferencias.tamanio or usuario.preferencias.tamanio == perro.raza.tamanio:
-                            if perro.id not in usuario.historial_adopciones and perro.estado == "disponible":
-                                perros_filtrados.append(perro)
-            return perros_filtrados
+            if self._cache is None:
+                return self.obtener_sugerencias_preferencias(usuario.preferencias, usuario.historial_adopciones, despues, cantidad)
+            huella, historial = usuario.preferencias.huella(), tuple(usuario.historial_adopciones)
+            return self._consultar(("sugerencias", huella, historial, despues, cantidad), (("sugerencias", *huella),),
+                                   lambda: self.obtener_sugerencias_preferencias(usuario.preferencias, historial, despues, cantidad))
+
+    def obtener_sugerencias_preferencias(self, preferencias:Preferencias, excluir=(), despues:int|None=None, cantidad:int|None=None):
+        '''Retorna lista de perros disponibles que cumplen con las preferencias, ordenados por ID, salvo los de `excluir`
+        (IDs; ej: el historial de un usuario). Sirve también para usuarios de otro sistema (ver modules.particiones).
+        Con cantidad, retorna solo una página (ver obtener_perros). Sin perros, una lista vacía'''
+        # Filtra perros (intersección de facetas o máscaras por columnas, sin recorrer a todos los perros)
+        ids = self._ids_por_preferencias(preferencias)
+        if cantidad is None:
+            with self._candado_indices: # los IDs pueden ser una vista del índice de disponibles
+                ids = [id_perro for id_perro in sorted(ids) if id_perro not in excluir]
+            return [perro for perro in map(self._perro_por_id, ids) if perro] # (sin los que se eliminaron mientras tanto)
+        with self._candado_indices: # los IDs pueden ser una vista del índice de disponibles
+            if self._columnas is not None: # IDs ya ordenados
+                ids, siguiente = claves_pagina(ids, despues, cantidad, excluir)
+            elif not (preferencias.raza or preferencias.edad or preferencias.tamanio): # acepta cualquier disponible: usa sus IDs ordenados
+                ids, siguiente = claves_pagina(self._claves_ordenadas("disponible"), despues, cantidad, excluir)
+            else: # intersección de facetas (sin orden)
+                ids, siguiente = claves_pagina_sin_orden((id_perro for id_perro in ids if id_perro not in excluir), despues, cantidad)
+        return Pagina(filter(None, map(self._perro_por_id, ids)), siguiente)
+
+    def obtener_sugerencias_todos(self):
+        '''Generador de (usuario, lista de perros sugeridos) para todos los usuarios.
+        Agrupa a los usuarios por preferencias iguales y calcula los candidatos una vez por grupo'''
+        if self.hay_perros() and self.hay_usuarios():
+            self._cargar_todo() # recorre a todos los usuarios
+            # Agrupa usuarios por (raza, edad, tamaño)
+            grupos:dict[tuple, list[UsuarioAdoptante]] = {}
+            for usuario in self._usuarios.values():
+                grupos.setdefault(usuario.preferencias.huella(), []).append(usuario)
+            # Candidatos por grupo, menos el historial de cada usuario
+            for usuarios in grupos.values():
+                ids = self._ids_por_preferencias(usuarios[0].preferencias)
+                with self._candado_indices: # (puede ser una vista del índice de disponibles)
+                    ids = sorted(ids)
+                candidatos = [perro for perro in map(self._perro_por_id, ids) if perro] # (sin los eliminados mientras tanto)
+                for usuario in usuarios:
+                    if usuario.historial_adopciones:
+                        historial = usuario.historial_adopciones
+                        yield usuario, [perro for perro in candidatos if perro.id not in historial]
+                    else:
+                        yield usuario, list(candidatos)
+
+    def _ids_por_preferencias(self, preferencias:Preferencias):
+        '''Retorna los IDs de perros disponibles que cumplen con las preferencias'''
+        if self._columnas is not None:
+            with self._candado_indices:
+                return self._columnas.filtrar(estado="disponible", raza=preferencias.raza or None,
+                                              rango_edad=preferencias.edad or None, tamanio=preferencias.tamanio or None)
+        self._cargar_todo()
+        filtros = []
+        for faceta, valor in ((self._facetas_raza, preferencias.raza), (self._facetas_edad, preferencias.edad), (self._facetas_tamanio, preferencias.tamanio)):
+            if valor: # Preferencia vacía: acepta cualquier valor
+                filtros.append(faceta.get(valor, set()))
+        if not filtros:
+            return self._perros_por_estado["disponible"].keys() # (una vista: se recorre con el candado de los índices)
+        filtros.sort(key=len) # Empieza por la faceta más chica
+        with self._candado_indices: # (las facetas cambian mientras se intersecan)
+            return filtros[0].intersection(*filtros[1:])
 
     def obtener_historial_perros(self, usuario:str|int|UsuarioAdoptante):
-        '''Retorna lista de perros adoptados por un usuario'''
+        '''Retorna lista de perros adoptados por un usuario, en el orden en que los adoptó.
+        Busca solo los perros de su historial (no recorre a todos los perros)'''
         if self.hay_perros() and self.hay_usuarios():
             # Valida usuario
             usuario = self.buscar_usuario(usuario, False)
             if not usuario:
                 raise ValueError(f"No se encontró al usuario en el sistema")
-            # Filtra perros
-            perros_filtrados = []
-            for perro in self.perros:
-                if perro.id in usuario.historial_adopciones:
-                    perros_filtrados.append(perro)
-            return perros_filtrados
-
-    def obtener_estado_perros(self, estado:str):
-        '''Retorna lista de perros adoptados, reservados o disponibles'''
-        if self.hay_perros():
-            if estado in ("disponible", "reservado", "adoptado"):
-                perros_filtrados = []
-                for perro in self.perros:
-                    if perro.estado == estado:
-                        perros_filtrados.append(perro)
-                return perros_filtrados
-            raise ValueError(f"El estado '{estado}' no está registrado. Opciones: ['disponible', 'reservado', 'adoptado']")
+            return [perro for perro in map(self._perro_por_id, list(usuario.historial_adopciones)) if perro]
+
+    def obtener_reporte_usuarios(self, cantidad:int|None=None, procesos:int|None=None):
+        '''Generador de (usuario, sugerencias, historial) para todos los usuarios, ordenados por DNI: lo mismo que
+        obtener_sugerencias_perros(usuario, None, cantidad) y obtener_historial_perros(usuario), pero las sugerencias
+        se calculan en `procesos` procesos (por defecto, uno por núcleo) sobre una instantánea en memoria compartida
+        (ver modules.paralelo). Reflejan a los perros disponibles en el momento en que empieza el reporte'''
+        from modules.paralelo import ConsultasParalelas
+        if cantidad is not None:
+            validar_cantidad(cantidad)
+        self.hay_perros()
+        self.hay_usuarios()
+        self._cargar_todo()
+        with self._candado_indices:
+            usuarios = [self._usuarios[dni] for dni in sorted(self._usuarios)]
+            disponibles = sorted(self._perros_por_estado["disponible"].items())
+        perros = ((id_perro, (perro.raza.nombre, Preferencias.rango_edad(perro.edad), perro.raza.tamanio))
+                  for id_perro, perro in disponibles)
+        preferencias = ((usuario.preferencias.huella(), usuario.historial_adopciones) for usuario in usuarios)
+        obtener = self._perros.get # (None: eliminado después de la instantánea)
+        with ConsultasParalelas(perros, preferencias, procesos) as consultas:
+            for numero, sugerencias, siguiente in consultas.sugerencias(cantidad, lambda ids: list(map(obtener, ids))):
+                usuario = usuarios[numero]
+                if cantidad is not None:
+                    sugerencias = Pagina(sugerencias, siguiente)
+                yield usuario, sugerencias, [perro for perro in map(obtener, list(usuario.historial_adopciones)) if perro]
+
+    def obtener_perros_adoptante(self, usuario:str|int|UsuarioAdoptante):
+        '''Retorna lista de perros cuyo adoptante es el usuario (reservados o adoptados), según el índice inverso
+        DNI -> perros. Incluye perros que quedaron a su nombre aunque no figuren en su reserva ni en su historial'''
+        if isinstance(usuario, UsuarioAdoptante):
+            usuario = usuario.dni
+        dni = Usuario.validar_dni(usuario)
+        self._cargar_todo() # el índice solo conoce a los perros en memoria
+        with self._candado_indices:
+            return list(self._perros_por_adoptante.get(dni, {}).values())
+
+    def obtener_estado_perros(self, estado:str, despues:int|None=None, cantidad:int|None=None):
+        '''Retorna lista de perros adoptados, reservados o disponibles.
+        Con cantidad, retorna solo una página ordenada por ID (ver obtener_perros; sin perros, una página vacía)'''
+        if cantidad is None:
+            self.hay_perros()
+        self._validar_estado(estado) # los chequeos van antes del cache: con o sin él, los mismos errores
+        if self._cache is not None:
+            return self._consultar(("estado", estado, despues, cantidad), (("estado", estado),),
+                                   lambda: self._estado_perros(estado, despues, cantidad))
+        return self._estado_perros(estado, despues, cantidad)
+
+    def _estado_perros(self, estado:str, despues:int|None, cantidad:int|None):
+        if cantidad is not None:
+            return self._pagina(estado, despues, cantidad)
+        if self._columnas is not None:
+            with self._candado_indices:
+                ids = self._columnas.filtrar(estado=estado)
+            return [perro for perro in map(self._perro_por_id, ids) if perro] # (sin los que se eliminaron mientras tanto)
+        self._cargar_todo()
+        return list(self._perros_por_estado[estado].values())
+
+    def contar_estado_perros(self, estado:str):
+        '''Retorna la cantidad de perros adoptados, reservados o disponibles'''
+        self._validar_estado(estado)
+        if self._columnas is not None:
+            with self._candado_indices:
+                return self._columnas.contar(estado=estado)
+        self._cargar_todo()
+        return len(self._perros_por_estado[estado])
+
+    @staticmethod
+    def _validar_estado(estado:str):
+        '''ValueError si el estado no existe'''
+        if estado not in Perro.ESTADOS:
+            raise ValueError(f"El estado '{estado}' no está registrado. Opciones: {list(Perro.ESTADOS)}")
+
+    # Paginación por cursor: cada página trae el cursor de la siguiente (la clave de su último elemento),
+    # así se puede seguir aunque entre una página y otra se agreguen o quiten elementos
+    def obtener_perros(self, despues:int|None=None, cantidad:int=POR_PAGINA):
+        '''Retorna una página (Pagina) de hasta `cantidad` perros ordenados por ID, empezando después del ID `despues`.
+        Para la página siguiente: obtener_perros(pagina.siguiente, cantidad); siguiente es None en la última'''
+        return self._pagina("perros", despues, cantidad)
+
+    def obtener_usuarios(self, despues:str|None=None, cantidad:int=POR_PAGINA):
+        '''Retorna una página de usuarios ordenados por DNI, empezando después del DNI `despues`'''
+        return self._pagina("usuarios", despues, cantidad)
+
+    def obtener_razas(self, despues:str|None=None, cantidad:int=POR_PAGINA):
+        '''Retorna una página de razas ordenadas por nombre, empezando después del nombre `despues`'''
+        return self._pagina("razas", despues, cantidad)
+
+    def _pagina(self, indice:str, despues, cantidad:int):
+        '''Página de un índice: busca el cursor en sus claves ordenadas y arma solo los objetos de la página'''
+        claves, siguiente = claves_pagina(self._claves_ordenadas(indice), despues, cantidad)
+        if indice == "usuarios":
+            objetos = map(self._usuarios.get, claves)
+        elif indice == "razas":
+            objetos = map(self._razas.get, claves)
+        else:
+            objetos = map(self._perro_por_id, claves)
+        return Pagina(filter(None, objetos), siguiente) # (sin los que se eliminaron mientras tanto)
+
+    def _claves_ordenadas(self, indice:str):
+        '''Claves ordenadas de un índice ("usuarios", "razas", "perros" o un estado). Se ordenan la primera vez
+        y se reutilizan en las páginas siguientes hasta que el índice cambie'''
+        if self._columnas is None or indice in ("usuarios", "razas"):
+            self._cargar_todo() # (el almacén por columnas ya tiene a todos los perros)
+        with self._candado_indices:
+            claves = self._ordenados.get(indice)
+            if claves is None:
+                if indice == "usuarios":
+                    claves = sorted(self._usuarios)
+                elif indice == "razas":
+                    claves = sorted(self._razas)
+                elif self._columnas is not None:
+                    claves = self._columnas.filtrar() if indice == "perros" else self._columnas.filtrar(estado=indice)
+                else:
+                    claves = sorted(self._perros if indice == "perros" else self._perros_por_estado[indice])
+                self._ordenados[indice] = claves
+            return claves
+
+    # Búsqueda por nombre
+    def activar_busqueda(self):
+        '''Arma los índices de búsqueda por nombre de perros, usuarios (nombre y email) y razas.
+        Después se mantienen al día solos (altas, bajas, cambiar_nombre y cambiar_email)'''
+        self._cargar_todo()
+        with self._candado_indices:
+            if self._busqueda is not None:
+                return
+            from modules.busqueda import IndiceTexto
+            busqueda = {
+                "perros": IndiceTexto(lambda id_perro: self._perros[id_perro].nombre),
+                "usuarios": IndiceTexto(lambda dni: self._texto_usuario(self._usuarios[dni])),
+                "razas": IndiceTexto(lambda nombre: nombre),
+            }
+            for id_perro, perro in self._perros.items():
+                busqueda["perros"].agregar(id_perro, perro.nombre)
+            for dni, usuario in self._usuarios.items():
+                busqueda["usuarios"].agregar(dni, self._texto_usuario(usuario))
+            for nombre in self._razas:
+                busqueda["razas"].agregar(nombre, nombre)
+            self._busqueda = busqueda
+
+    @staticmethod
+    def _texto_usuario(usuario:UsuarioAdoptante):
+        return f"{usuario.nombre} {usuario.email}"
+
+    def completar_nombres(self, tipo:str, prefijo:str, limite:int=10):
+        '''Autocompletar: retorna hasta `limite` perros, usuarios o razas (tipo: "perros", "usuarios" o "razas")
+        que tienen, para cada palabra del prefijo, una palabra que empieza con ella. No distingue mayúsculas ni tildes
+        (ej: completar_nombres("razas", "gran d") encuentra a "Gran Danés")'''
+        return self._buscar_texto(tipo, "completar", prefijo, limite=limite)
+
+    def buscar_nombres(self, tipo:str, texto:str, errores:int=2, limite:int=10):
+        '''Búsqueda con errores de tipeo: retorna hasta `limite` perros, usuarios o razas con palabras iguales o parecidas
+        a las del texto, primero los más parecidos. Se admiten hasta `errores` letras de diferencia por palabra
+        (uno solo en palabras de hasta 5 letras; ninguno en las de hasta 2 y en los números)'''
+        return self._buscar_texto(tipo, "buscar", texto, errores=errores, limite=limite)
+
+    def _buscar_texto(self, tipo:str, consulta:str, texto:str, **opciones):
+        if tipo not in ("perros", "usuarios", "razas"):
+            raise ValueError(f"No se puede buscar '{tipo}'. Opciones: ['perros', 'usuarios', 'razas']")
+        if not isinstance(texto, str):
+            raise TypeError("El texto a buscar debe ser de tipo string")
+        self.activar_busqueda()
+        indice = {"perros": self._perros, "usuarios": self._usuarios, "razas": self._razas}[tipo]
+        with self._candado_indices:
+            claves = getattr(self._busqueda[tipo], consulta)(texto, **opciones)
+            return [indice[clave] for clave in claves]
+
+    # Almacén por columnas
+    def activar_columnas(self):
+        '''Arma el almacén por columnas con todos los perros. Si hay almacenamiento, lo arma con las filas
+        guardadas, sin crear objetos Perro (se crean después, solo para los resultados)'''
+        with self.almacenamiento.transaccion(), self._candado_indices: # (en ese orden, ver _cargar_todo)
+            if self._columnas is not None:
+                return
+            from modules.columnar import ColumnasPerros
+            columnas = ColumnasPerros()
+            if self._cargado:
+                for perro in self._perros.values():
+                    columnas.agregar_perro(perro)
+            else:
+                for fila in self.almacenamiento.cargar_perros():
+                    columnas.agregar_fila(fila, self._raza_de_fila(fila[5]).tamanio)
+            self._columnas = columnas
+            self._ordenados.clear()
+
+    def filtrar_perros(self, **criterios):
+        '''Retorna lista de perros (ordenados por ID) que cumplen todos los criterios, usando el almacén por columnas.
+        Criterios: estado, sexo, vacunado, discapacitado, rango_edad, tamanio, raza, edad_min, edad_max, peso_min, peso_max'''
+        self.activar_columnas()
+        if isinstance(criterios.get("raza"), Raza):
+            criterios["raza"] = criterios["raza"].nombre
+        elif isinstance(criterios.get("raza"), str):
+            criterios["raza"] = criterios["raza"].strip().title()
+        with self._candado_indices:
+            ids = self._columnas.filtrar(**criterios)
+        return [perro for perro in map(self._perro_por_id, ids) if perro] # (sin los que se eliminaron mientras tanto)
+
+    # Cache de resultados
+    def activar_cache(self, capacidad:int=1024, ttl:float|None=None):
+        '''Guarda los resultados de obtener_estado_perros y obtener_sugerencias_perros (hasta `capacidad`, descartando
+        los usados hace más tiempo; con ttl, vencen a los ttl segundos). Cada resultado se descarta solo cuando cambia
+        algo que lo afecta: un perro que entra o sale de ese estado, o un perro disponible con la raza, edad o tamaño
+        que piden esas preferencias. Retorna el cache (ver CacheResultados.estadisticas)'''
+        from modules.cache import CacheResultados
+        with self._candado_indices:
+            if self._cache is None:
+                self._cache = CacheResultados(capacidad, ttl)
+            return self._cache
+
+    def desactivar_cache(self):
+        '''Deja de guardar resultados. Retorna el cache (con sus contadores)'''
+        with self._candado_indices:
+            cache, self._cache = self._cache, None
+        return cache
+
+    def _consultar(self, clave:tuple, dependencias:tuple, calcular):
+        '''Resultado de la consulta desde el cache (o calculado y guardado). Retorna una copia: quien lo recibe puede modificarlo'''
+        cache = self._cache
+        if cache is None: # (se desactivó mientras tanto)
+            return calcular()
+        resultado = cache.obtener(clave, calcular, dependencias)
+        if isinstance(resultado, Pagina):
+            return Pagina(resultado, resultado.siguiente)
+        return resultado if resultado is None else list(resultado)
+
+    # Métricas
+    def activar_metricas(self, metricas:"Metricas|None"=None):
+        '''Empieza a medir cada método público: llamadas, duración, tamaño del resultado y errores por tipo.
+        Retorna las métricas (ver Metricas.instantanea y Metricas.escribir_prometheus)'''
+        from modules.metricas import Metricas, instrumentar, metodos_publicos
+        if self.metricas is None:
+            self.metricas = metricas or Metricas()
+            instrumentar(self, self.metricas, metodos_publicos(self, ("activar_metricas", "desactivar_metricas")))
+        return self.metricas
+
+    def desactivar_metricas(self):
+        '''Deja de medir (los métodos vuelven a no tener ningún costo extra). Retorna las métricas juntadas'''
+        from modules.metricas import desinstrumentar, metodos_publicos
+        desinstrumentar(self, metodos_publicos(self))
+        metricas, self.metricas = self.metricas, None
+        return metricas
+
+    # Exportar
+    def filas_razas(self):
+        '''Genera las filas de todas las razas (ver modules.almacenamiento) sin cargarlas a memoria'''
+        if self._cargado:
+            with self._candado_indices: # copia: otro hilo puede registrar o eliminar mientras se exporta
+                objetos = list(self._razas.values())
+            return map(raza_a_fila, objetos)
+        return self.almacenamiento.cargar_razas() # lo guardado está al día (se escribe en cada cambio)
+
+    def filas_perros(self):
+        '''Genera las filas de todos los perros sin cargarlos a memoria'''
+        if self._cargado:
+            with self._candado_indices: # copia: otro hilo puede registrar o eliminar mientras se exporta
+                objetos = list(self._perros.values())
+            return map(perro_a_fila, objetos)
+        # vacunado y discapacitado como bool (algunas bases los guardan como 0/1)
+        return (fila[:6] + (bool(fila[6]), bool(fila[7])) + fila[8:] for fila in self.almacenamiento.cargar_perros())
 
+    def filas_usuarios(self):
+        '''Genera las filas de todos los usuarios (con reserva e historial de adopciones) sin cargarlos a memoria'''
+        if self._cargado:
+            with self._candado_indices: # copia: otro hilo puede registrar o eliminar mientras se exporta
+                objetos = list(self._usuarios.values())
+            return map(usuario_a_fila, objetos)
+        return self.almacenamiento.cargar_usuarios()
 
+    def exportar(self, carpeta:str, formato:str="jsonl", comprimir:bool=False):
+        '''Escribe razas, usuarios y perros en archivos JSONL o CSV (opcionalmente .gz) dentro de la carpeta.
+        Retorna {archivo: cantidad de registros}'''
+        from modules.exportacion import exportar_sistema
+        return exportar_sistema(self, carpeta, formato, comprimir)
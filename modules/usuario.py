@@ -1,11 +1,14 @@
+import sys
 if __name__ == "__main__":
-    import sys
     import os
     sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from modules.perro import Raza
+from modules.observable import Observable
 
-class Usuario:
+class Usuario(Observable):
+    __slots__ = ("nombre", "dni", "email") # sin __dict__: menos memoria por instancia
     def __init__(self, nombre:str, dni:str|int, email:str):
+        super().__init__() # Observable (avisa cambios al sistema)
         self.nombre = self.validar_nombre(nombre)
         self.dni = self.validar_dni(dni)
         self.email = self.validar_email(email)
@@ -39,10 +42,14 @@ class Usuario:
 
     # Cambiar datos
     def cambiar_nombre(self, nombre:str):
+        anterior = self.nombre
         self.nombre = self.validar_nombre(nombre)
+        self.notificar("nombre", anterior)
 
     def cambiar_email(self, email:str):
+        anterior = self.email
         self.email = self.validar_email(email)
+        self.notificar("email", anterior)
 
     # Mostrar datos
     def mostrar_datos_personales(self):
@@ -52,7 +59,8 @@ class Usuario:
         return self.mostrar_datos_personales()
 
 
-class Preferencias:
+class Preferencias(Observable):
+    __slots__ = ("raza", "edad", "tamanio")
     EDADES = {
         'C':'Cachorro',
         'J':'Joven',
@@ -60,6 +68,7 @@ class Preferencias:
         'M':'Adulto Mayor',
     }
     def __init__(self, raza:str="", edad:int|str="", tamanio:str=""):
+        super().__init__() # Observable (avisa cambios al usuario)
         self.raza = self.validar_raza(raza)
         self.edad = self.validar_edad(edad)
         self.tamanio = self.validar_tamanio(tamanio)
@@ -69,24 +78,28 @@ class Preferencias:
     def validar_raza(raza:str):
         if not isinstance(raza, str):
             raise TypeError("La raza debe ser un string")
-        return raza.strip().title()
+        return sys.intern(raza.strip().title()) # muchos usuarios prefieren la misma raza: comparten el string
 
     @staticmethod
     def validar_edad(edad:int|str):
         if not edad:
             return edad
         try:
-            edad = int(edad)
-            if edad < 1:
-                return "C"
-            if edad < 3:
-                return "J"
-            if edad < 7:
-                return "A"
-            return "M"
+            return Preferencias.rango_edad(int(edad))
         except ValueError:
             raise ValueError("Edad debe ser un número entero")
 
+    @staticmethod
+    def rango_edad(edad:int):
+        '''Retorna el rango de edad (C/J/A/M) que corresponde a una edad en años'''
+        if edad < 1:
+            return "C"
+        if edad < 3:
+            return "J"
+        if edad < 7:
+            return "A"
+        return "M"
+
     @staticmethod
     def validar_tamanio(tamanio:str): # (S/M/L/X)
         if not isinstance(tamanio, str):
@@ -99,15 +112,25 @@ class Preferencias:
                 return clave
         raise ValueError(f"El tamaño '{tamanio}' no está registrado. Opciones disponibles: {list(Raza.TAMANIOS.values())}")
 
+    def huella(self):
+        '''(raza, edad, tamanio) con "" en las vacías: igual para todas las preferencias que aceptan los mismos perros'''
+        return (self.raza or "", self.edad or "", self.tamanio or "")
+
     # Cambiar atributos
     def cambiar_raza(self, raza):
+        anterior = self.raza
         self.raza = self.validar_raza(raza)
+        self.notificar("raza", anterior)
 
     def cambiar_edad(self, edad):
+        anterior = self.edad
         self.edad = self.validar_edad(edad)
+        self.notificar("edad", anterior)
 
     def cambiar_tamanio(self, tamanio):
+        anterior = self.tamanio
         self.tamanio = self.validar_tamanio(tamanio)
+        self.notificar("tamanio", anterior)
 
     # Mostrar datos
     def mostrar_preferencias(self):
@@ -126,13 +149,55 @@ class Preferencias:
 
 
 
+class Historial(dict):
+    '''IDs de perros adoptados en el orden en que se adoptaron, sin repetidos (un conjunto ordenado).
+    Por dentro es un dict con las IDs como claves: agregar, quitar y preguntar "in" cuestan O(1)
+    aunque el usuario sea un refugio con miles de adopciones. Se usa como una lista: append, remove, extend'''
+    __slots__ = ()
+
+    def __init__(self, ids=()):
+        super().__init__(dict.fromkeys(ids))
+
+    def append(self, id_perro:int):
+        self[id_perro] = None
+
+    def extend(self, ids):
+        self.update(dict.fromkeys(ids))
+
+    def remove(self, id_perro:int):
+        '''Quita una ID, ValueError si no está (como list.remove)'''
+        try:
+            del self[id_perro]
+        except KeyError:
+            raise ValueError(f"El perro {id_perro} no está en el historial") from None
+
+    def __add__(self, otra):
+        return list(self) + list(otra)
+
+    def __eq__(self, otra):
+        if isinstance(otra, list):
+            return list(self) == otra
+        return super().__eq__(otra)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(list(self))
+
+
 class UsuarioAdoptante(Usuario):
+    __slots__ = ("preferencias", "historial_adopciones", "reserva")
     def __init__(self, nombre:str, dni:str|int, email:str, pref_raza:str="", pref_edad:str="", pref_tamanio:str=""):
         super().__init__(nombre, dni, email) # Herencia
         self.preferencias = Preferencias(pref_raza, pref_edad, pref_tamanio) # Composición (Preferencias solo existe dentro de UsuarioAdoptante)
-        self.historial_adopciones = []
+        self.preferencias.agregar_observador(self._al_cambiar_preferencias)
+        self.historial_adopciones = Historial() # conjunto ordenado de IDs
         self.reserva = None
 
+    def _al_cambiar_preferencias(self, preferencias, atributo:str, anterior):
+        '''Reenvía a los observadores del usuario los cambios de sus preferencias'''
+        self.notificar(f"preferencias.{atributo}", anterior)
+
     # Validar atributos
     def validar_preferencias(self, preferencias):
         if not isinstance(preferencias, Preferencias):
@@ -164,13 +229,16 @@ class UsuarioAdoptante(Usuario):
         if self.puede_adoptar(id_perro):
             self.historial_adopciones.append(id_perro)
             self.reserva = None
+            self.notificar("historial_adopciones", id_perro) # avisa qué perro entró al historial
             return True
         return False
 
     def reservar(self, id_perro:int):
         '''Reserva ID del perro, no lo agrega a historial de adopciones'''
         if self.puede_reservar(id_perro):
+            anterior = self.reserva
             self.reserva = id_perro
+            self.notificar("reserva", anterior)
             return True
         return False
 
@@ -179,11 +247,28 @@ class UsuarioAdoptante(Usuario):
         if self.puede_devolver(id_perro):
             if id_perro == self.reserva:
                 self.reserva = None
+                self.notificar("reserva", id_perro)
             else:
                 self.historial_adopciones.remove(id_perro)
+                self.notificar("historial_adopciones", id_perro) # avisa qué perro salió del historial
             return True
         return False
 
+    def devolver_varios(self, ids_perros:list[int]):
+        '''Remueve varios perros del historial de adopciones o de la reserva con un solo aviso.
+        Ignora los que no son suyos. Retorna cuántos removió'''
+        removidos = 0
+        for id_perro in ids_perros:
+            if self.puede_devolver(id_perro):
+                if id_perro == self.reserva:
+                    self.reserva = None
+                else:
+                    self.historial_adopciones.remove(id_perro)
+                removidos += 1
+        if removidos:
+            self.notificar("historial_adopciones", ids_perros) # se guarda todo el usuario (reserva incluida)
+        return removidos
+
     def mostrar_adopciones(self):
         return f"Perro reservado: {self.reserva}\nPerros Adoptados: {self.historial_adopciones}"
 